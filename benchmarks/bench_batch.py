@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Batch-Simulation vieler Haushalte mit 1..N Worker-Prozessen.
+
+Aufruf (aus dem Repository-Wurzelverzeichnis):
+    python benchmarks/bench_batch.py [households] [days]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "usage-sim-api"))
+
+from households import iter_batch  # noqa: E402
+
+
+def main():
+    households = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    kerne = os.cpu_count() or 1
+    print(f"{households} Haushalte × {days} Tage, {kerne} Kerne")
+    print(f"{'workers':>8} {'sekunden':>9} {'haushalte/s':>12} {'mio werte/s':>12}")
+    for workers in sorted({1, 2, kerne // 2, kerne} - {0}):
+        list(iter_batch(min(households, 100), days, workers=workers))  # Pool aufwärmen
+        start = time.perf_counter()
+        for _ in iter_batch(households, days, workers=workers):
+            pass
+        dauer = time.perf_counter() - start
+        print(f"{workers:>8} {dauer:>9.2f} {households / dauer:>12.0f} {households * days * 24 / dauer / 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
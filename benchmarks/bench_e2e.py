@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+End-to-End-Lasttest: beide Dienste gegen einen Modell-Stub.
+
+usage-sim-api und recommendation-api laufen je in einem eigenen
+uvicorn-Prozess (beide Verzeichnisse haben ein ``app.py`` und weitere
+gleichnamige Module, daher kein gemeinsamer Importpfad) und sind wie in
+Produktion über HTTP verbunden: recommendation-api fragt /stats der
+usage-sim-api über den Verbindungspool ab. Das Modell ist ``stubs.openai_stub`` (Chat, gestreamter
+Chat, Embeddings) mit einstellbarer Latenz, Token-Abstand und Fehlerrate;
+der Stub ist deterministisch (Seed).
+
+Szenarien: "tips" (POST /tips), "tips_stream" (POST /tips/stream, SSE),
+"simulate" (GET /simulate, stündliche JSON-Liste) und "stats" (GET /stats).
+Jedes Szenario läuft für jede Fenstergröße (days) und jede Parallelität eine
+feste Zeit lang. Gemessen werden Durchsatz, Latenz (p50/p95/p99), Zeit bis
+zum ersten Byte, Antwortgröße sowie RSS und Spitzen-RSS des Dienstprozesses,
+der das Szenario beantwortet (aus /proc, nur Linux; sonst nan).
+
+Die Ergebnisse werden als JSON geschrieben (mit git-Stand und Parametern),
+standardmäßig nach benchmarks/results/. Mit --vergleich wird ein früherer
+Lauf daneben gestellt (Änderung von req/s und p95 in %).
+
+Aufruf (aus dem Repository-Wurzelverzeichnis):
+    python benchmarks/bench_e2e.py [--szenarien tips,stats] [--days 1,30,3650] [--parallel 1,16]
+        [--sekunden 2] [--llm-latenz 0.2] [--token-latenz 0] [--llm-fehlerrate 0]
+        [--llm-cache off] [--ausgabe datei.json] [--vergleich frueher.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import httpx
+
+WURZEL = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+USAGE_DIR = os.path.join(WURZEL, "usage-sim-api")
+API_DIR = os.path.join(WURZEL, "recommendation-api")
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from stubs import _freier_port, openai_stub, serve  # noqa: E402
+
+SZENARIEN = {
+    "tips": ("POST", "/tips"),
+    "tips_stream": ("POST", "/tips/stream"),
+    "simulate": ("GET", "/simulate"),
+    "stats": ("GET", "/stats"),
+}
+
+
+@contextmanager
+def dienst_starten(verzeichnis: str, bereit: str, env: dict, timeout: float = 120):
+    """
+    Startet ``app:app`` aus ``verzeichnis`` mit uvicorn in einem eigenen Prozess.
+
+    Wartet, bis ``bereit`` mit 200 antwortet; liefert (Basis-URL, Prozess).
+    """
+    port = _freier_port()
+    url = f"http://127.0.0.1:{port}"
+    prozess = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=verzeichnis, env=dict(os.environ, **env),
+    )
+    try:
+        start = time.perf_counter()
+        while True:
+            if prozess.poll() is not None:
+                raise RuntimeError(f"{os.path.basename(verzeichnis)} wurde vorzeitig beendet ({prozess.returncode})")
+            if time.perf_counter() - start > timeout:
+                raise TimeoutError(f"{os.path.basename(verzeichnis)} nicht bereit")
+            try:
+                if httpx.get(url + bereit, timeout=2).status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            time.sleep(0.1)
+        yield url, prozess
+    finally:
+        prozess.terminate()
+        try:
+            prozess.wait(10)
+        except subprocess.TimeoutExpired:
+            prozess.kill()
+            prozess.wait()
+
+
+def speicher_mb(pid: int) -> dict:
+    """RSS und Spitzen-RSS des Prozesses ``pid`` in MB (/proc; sonst nan)."""
+    werte = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for zeile in f:
+                if zeile.startswith(("VmRSS:", "VmHWM:")):
+                    werte[zeile.split(":")[0]] = int(zeile.split()[1]) / 1024
+    except OSError:
+        pass
+    return {"rss_mb": werte.get("VmRSS", float("nan")), "rss_spitze_mb": werte.get("VmHWM", float("nan"))}
+
+
+def perzentil(werte: list[float], p: float) -> float:
+    return werte[min(len(werte) - 1, int(p * len(werte)))]
+
+
+def git_stand() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=WURZEL, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def anfrage(c: httpx.AsyncClient, methode: str, url: str, days: int) -> tuple[float, float, int, int]:
+    """Eine Anfrage mit Zeit bis zum ersten Byte; liefert (ttfb_s, gesamt_s, bytes, status)."""
+    kwargs = {"json": {"days": days}} if methode == "POST" else {"params": {"days": days}}
+    start = time.perf_counter()
+    ttfb, groesse = None, 0
+    async with c.stream(methode, url, **kwargs) as r:
+        async for teil in r.aiter_raw():
+            if ttfb is None:
+                ttfb = time.perf_counter() - start
+            groesse += len(teil)
+    gesamt = time.perf_counter() - start
+    return ttfb if ttfb is not None else gesamt, gesamt, groesse, r.status_code
+
+
+async def szenario(basis: str, pid: int, name: str, days: int, parallel: int, sekunden: float) -> dict:
+    methode, pfad = SZENARIEN[name]
+    url = basis + pfad
+    latenzen, ttfbs, groessen = [], [], []
+    fehler = 0
+    limits = httpx.Limits(max_connections=parallel, max_keepalive_connections=parallel)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as c:
+        await asyncio.gather(*(anfrage(c, methode, url, days) for _ in range(parallel)))  # Verbindungen, Caches
+        vorher = speicher_mb(pid)
+        ende = time.perf_counter() + sekunden
+
+        async def client():
+            nonlocal fehler
+            while time.perf_counter() < ende:
+                try:
+                    ttfb, gesamt, groesse, status = await anfrage(c, methode, url, days)
+                except httpx.HTTPError:
+                    fehler += 1
+                    continue
+                if status != 200:
+                    fehler += 1
+                    continue
+                ttfbs.append(ttfb)
+                latenzen.append(gesamt)
+                groessen.append(groesse)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(parallel)))
+        dauer = time.perf_counter() - start
+    nachher = speicher_mb(pid)
+    latenzen.sort()
+    ttfbs.sort()
+    ergebnis = {"szenario": name, "days": days, "parallel": parallel, "anfragen": len(latenzen), "fehler": fehler,
+                "req_s": len(latenzen) / dauer}
+    if latenzen:
+        ergebnis.update(
+            p50_ms=statistics.median(latenzen) * 1000,
+            p95_ms=perzentil(latenzen, 0.95) * 1000,
+            p99_ms=perzentil(latenzen, 0.99) * 1000,
+            ttfb_p50_ms=statistics.median(ttfbs) * 1000,
+            bytes_mittel=statistics.mean(groessen),
+        )
+    ergebnis.update(rss_mb=nachher["rss_mb"], rss_delta_mb=nachher["rss_mb"] - vorher["rss_mb"],
+                    rss_spitze_mb=nachher["rss_spitze_mb"])
+    return ergebnis
+
+
+def vergleichen(ergebnisse: list[dict], frueher: dict):
+    alt = {(e["szenario"], e["days"], e["parallel"]): e for e in frueher["ergebnisse"]}
+    print(f"\nVergleich mit {frueher['meta'].get('git') or '?'} vom {frueher['meta']['zeit']}")
+    print(f"{'szenario':>12} {'days':>5} {'par':>4} {'req_s':>9} {'Δ%':>7} {'p95_ms':>9} {'Δ%':>7}")
+    for e in ergebnisse:
+        a = alt.get((e["szenario"], e["days"], e["parallel"]))
+        if a is None or "p95_ms" not in e or "p95_ms" not in a:
+            continue
+        print(f"{e['szenario']:>12} {e['days']:>5} {e['parallel']:>4} {e['req_s']:>9.1f} "
+              f"{(e['req_s'] / a['req_s'] - 1) * 100:>+7.1f} {e['p95_ms']:>9.2f} "
+              f"{(e['p95_ms'] / a['p95_ms'] - 1) * 100:>+7.1f}")
+
+
+def liste(text: str, typ=str) -> list:
+    return [typ(t) for t in text.split(",") if t]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--szenarien", type=liste, default=list(SZENARIEN))
+    parser.add_argument("--days", type=lambda t: liste(t, int), default=[1, 30, 365, 3650])
+    parser.add_argument("--parallel", type=lambda t: liste(t, int), default=[1, 16])
+    parser.add_argument("--sekunden", type=float, default=2.0)
+    parser.add_argument("--llm-latenz", type=float, default=0.2, help="Modell: Latenz bis zur Antwort bzw. zum ersten Token (s)")
+    parser.add_argument("--token-latenz", type=float, default=0.0, help="Modell: Abstand zwischen zwei Tokens (s)")
+    parser.add_argument("--llm-fehlerrate", type=float, default=0.0, help="Modell: Anteil fehlschlagender Aufrufe")
+    parser.add_argument("--llm-cache", default="off", help="LLM_CACHE_BACKEND der recommendation-api")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ausgabe", default=None, help="JSON-Datei (Standard: benchmarks/results/e2e-<zeit>.json)")
+    parser.add_argument("--vergleich", default=None, help="früherer Lauf (JSON) zum Vergleich")
+    args = parser.parse_args()
+    unbekannt = set(args.szenarien) - set(SZENARIEN)
+    if unbekannt:
+        parser.error(f"unbekannte Szenarien: {', '.join(sorted(unbekannt))}")
+
+    modell = openai_stub(latency=args.llm_latenz, fail_rate=args.llm_fehlerrate, seed=args.seed,
+                         token_latency=args.token_latenz)
+    with tempfile.TemporaryDirectory() as tmp, serve(modell) as modell_url:
+        with dienst_starten(USAGE_DIR, "/", {"PROFILE_SAMPLE_RATE": "0",
+                                             "METER_STORE_DIR": os.path.join(tmp, "meter_data")}) as (usage_url, usage):
+            with dienst_starten(API_DIR, "/ready", {
+                "PROFILE_SAMPLE_RATE": "0", "USAGE_API": usage_url, "USAGE_PROVIDER": "http",
+                "OPENAI_API_KEY": "stub", "OPENAI_BASE_URL": f"{modell_url}/v1",
+                "LLM_CACHE_BACKEND": args.llm_cache, "EMBEDDINGS_DIR": os.path.join(tmp, "embeddings"),
+            }) as (api_url, api):
+                geladen_mb = {"usage-sim-api": speicher_mb(usage.pid)["rss_mb"],
+                              "recommendation-api": speicher_mb(api.pid)["rss_mb"]}
+                ergebnisse = []
+                for name in args.szenarien:
+                    basis, prozess = (api_url, api) if name.startswith("tips") else (usage_url, usage)
+                    for days in args.days:
+                        for parallel in args.parallel:
+                            ergebnisse.append(asyncio.run(
+                                szenario(basis, prozess.pid, name, days, parallel, args.sekunden)))
+
+    meta = {
+        "zeit": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git": git_stand(),
+        "python": platform.python_version(),
+        "plattform": platform.platform(),
+        "cpu_kerne": os.cpu_count(),
+        "parameter": {k: v for k, v in vars(args).items() if k not in ("ausgabe", "vergleich")},
+        "modell_aufrufe": dict(modell.state.calls),
+        "rss_nach_laden_mb": geladen_mb,
+    }
+    ausgabe = args.ausgabe or os.path.join(WURZEL, "benchmarks", "results",
+                                           f"e2e-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(ausgabe)), exist_ok=True)
+    with open(ausgabe, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "ergebnisse": ergebnisse}, f, ensure_ascii=False, indent=2)
+
+    print(f"{args.sekunden:.0f} s je Messung, Modell: Latenz {args.llm_latenz} s, Fehlerrate {args.llm_fehlerrate}, "
+          f"LLM-Cache {args.llm_cache}; RSS nach dem Laden: "
+          + ", ".join(f"{dienst} {mb:.0f} MB" for dienst, mb in geladen_mb.items()))
+    print(f"{'szenario':>12} {'days':>5} {'par':>4} {'req_s':>9} {'p50_ms':>9} {'p95_ms':>9} {'p99_ms':>9} "
+          f"{'ttfb_ms':>8} {'kb':>8} {'rss_mb':>7} {'fehler':>6}")
+    for e in ergebnisse:
+        if "p50_ms" not in e:
+            print(f"{e['szenario']:>12} {e['days']:>5} {e['parallel']:>4}  keine erfolgreiche Anfrage ({e['fehler']} Fehler)")
+            continue
+        print(f"{e['szenario']:>12} {e['days']:>5} {e['parallel']:>4} {e['req_s']:>9.1f} {e['p50_ms']:>9.2f} "
+              f"{e['p95_ms']:>9.2f} {e['p99_ms']:>9.2f} {e['ttfb_p50_ms']:>8.2f} {e['bytes_mittel'] / 1024:>8.1f} "
+              f"{e['rss_mb']:>7.0f} {e['fehler']:>6}")
+    print(f"Ergebnisse: {ausgabe}")
+    if args.vergleich:
+        with open(args.vergleich, encoding="utf-8") as f:
+            vergleichen(ergebnisse, json.load(f))
+
+    # /tips fällt bei Modellfehlern auf regelbasierte Tipps zurück: auch dann kein Fehlerstatus
+    assert all(e["fehler"] == 0 for e in ergebnisse), [e for e in ergebnisse if e["fehler"]]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Payload-Größe und Kodierzeit der /simulate-Formate.
+
+Verglichen wird die bisherige JSON-Zeilenantwort (Dicts pro Stunde +
+json.dumps) mit NDJSON und den spaltenbasierten Binärformaten.
+
+Aufruf (aus dem Repository-Wurzelverzeichnis):
+    python benchmarks/bench_formats.py
+"""
+
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "usage-sim-api"))
+
+from formats import ENCODERS, available_formats  # noqa: E402
+from simulation import gen_hourly_arrays, hour_index, rows_from_arrays  # noqa: E402
+
+
+def kodiere_json(werte, start_day):
+    zeilen = rows_from_arrays(*hour_index(len(werte) // 24, start_day), werte)
+    return json.dumps(zeilen, separators=(",", ":")).encode()
+
+
+def kodiere_ndjson(werte, start_day):
+    day, hour = hour_index(len(werte) // 24, start_day)
+    return "".join(
+        f'{{"day":{d},"hour":{h},"kwh":{k}}}\n'
+        for d, h, k in zip(day.tolist(), hour.tolist(), werte.tolist())
+    ).encode()
+
+
+def main():
+    kodierer = {"json": kodiere_json, "ndjson": kodiere_ndjson}
+    for fmt in ("float32", "msgpack", "arrow"):
+        if fmt in available_formats():
+            kodierer[fmt] = lambda w, s, enc=ENCODERS[fmt]: enc("hour", w, s)
+        else:
+            print(f"({fmt} nicht installiert, übersprungen)")
+
+    print(f"{'days':>6} {'format':>8} {'bytes':>10} {'vs json':>8} {'encode ms':>10}")
+    for days in (7, 365, 3650):
+        _, _, werte = gen_hourly_arrays(days)
+        basis = len(kodiere_json(werte, 0))
+        for name, enc in kodierer.items():
+            groesse = len(enc(werte, 0))
+            ms = min(timeit.repeat(lambda: enc(werte, 0), number=1, repeat=5)) * 1000
+            print(f"{days:>6} {name:>8} {groesse:>10} {groesse / basis:>7.1%} {ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Schleifen-Implementierung von gen_hourly vs. NumPy-Engine.
+
+Aufruf (aus dem Repository-Wurzelverzeichnis):
+    python benchmarks/bench_gen_hourly.py
+"""
+
+import math
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "usage-sim-api"))
+
+from simulation import gen_hourly_arrays, rows_from_arrays  # noqa: E402
+
+
+def gen_hourly_loop(days: int = 7):
+    """Ursprüngliche Implementierung (ein Dict pro Stunde)."""
+    random.seed(42)
+    data = []
+    for d in range(days):
+        for h in range(24):
+            basis = 0.4 + 0.2 * math.sin(h / 24 * 2 * math.pi)
+            abend_peak = 0.6 if 18 <= h <= 22 else 0.0
+            kwh = round(max(0.1, basis + abend_peak + random.uniform(-0.1, 0.1)), 3)
+            data.append({"day": d, "hour": h, "kwh": kwh})
+    return data
+
+
+def messen(fn, wiederholungen: int) -> float:
+    """Bester Durchlauf in Millisekunden."""
+    return min(timeit.repeat(fn, number=1, repeat=wiederholungen)) * 1000
+
+
+def main():
+    print(f"{'days':>6} {'schleife ms':>12} {'arrays ms':>10} {'arrays+zeilen ms':>17} {'speedup':>8}")
+    for days in (7, 365, 3650):
+        wdh = 20 if days < 1000 else 5
+        t_loop = messen(lambda: gen_hourly_loop(days), wdh)
+        t_arr = messen(lambda: gen_hourly_arrays(days), wdh)
+        t_rows = messen(lambda: rows_from_arrays(*gen_hourly_arrays(days)), wdh)
+        print(f"{days:>6} {t_loop:>12.2f} {t_arr:>10.2f} {t_rows:>17.2f} {t_loop / t_arr:>7.1f}x")
+
+    # Zeitfenster Tage 3000-3007: Präfix mitgenerieren vs. direkter Zugriff über start_day
+    _, _, voll = gen_hourly_arrays(3007)
+    _, _, fenster = gen_hourly_arrays(7, start_day=3000)
+    assert (voll[3000 * 24:] == fenster).all()
+    t_praefix = messen(lambda: gen_hourly_arrays(3007)[2][3000 * 24:], 5)
+    t_fenster = messen(lambda: gen_hourly_arrays(7, start_day=3000), 20)
+    print(f"\nFenster 3000-3007: Präfix {t_praefix:.2f} ms, start_day {t_fenster:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Lastbenchmark: Upstream-Aufrufe von get_avg vor und nach Verbindungspool
+und Single-Flight-Koaleszierung.
+
+"vorher" entspricht der ursprünglichen Implementierung (neuer
+httpx.AsyncClient pro Aufruf, keine Koaleszierung).
+
+Aufruf (aus dem Repository-Wurzelverzeichnis):
+    python benchmarks/bench_get_avg.py [burst] [runden]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "recommendation-api"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import app as reco  # noqa: E402
+from stubs import serve, usage_stub  # noqa: E402
+
+
+async def get_avg_vorher(days: int):
+    try:
+        async with httpx.AsyncClient(timeout=10) as client:
+            r = await client.get(f"{reco.USAGE_API}/stats", params={"days": days})
+        if r.status_code == 200 and "avg" in r.json():
+            return float(r.json()["avg"])
+    except Exception:
+        pass
+    return None
+
+
+async def last(fn, burst: int, runden: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runden):
+        await asyncio.gather(*(fn(7) for _ in range(burst)))
+    return time.perf_counter() - start
+
+
+def main():
+    burst = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    runden = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    stub = usage_stub(latency=0.02)
+    with serve(stub) as url:
+        reco.USAGE_API = url
+        print(f"{burst} gleichzeitige Anfragen × {runden} Runden")
+        print(f"{'variante':>8} {'sekunden':>9} {'anfragen/s':>11} {'upstream':>9} {'upstream/s':>11}")
+        for name, fn in (("vorher", get_avg_vorher), ("nachher", reco.get_avg)):
+            stub.state.calls = 0
+            dauer = asyncio.run(last(fn, burst, runden))
+            n = burst * runden
+            print(f"{name:>8} {dauer:>9.2f} {n / dauer:>11.0f} {stub.state.calls:>9} {stub.state.calls / dauer:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
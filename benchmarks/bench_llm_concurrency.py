@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Durchsatz der LLM-Stufe bei steigender Parallelität.
+
+"vorher" ruft den synchronen OpenAI-Client innerhalb einer async-Funktion
+auf (blockiert die Event-Loop, Anfragen laufen nacheinander); "nachher"
+nutzt den gemeinsamen AsyncOpenAI-Client mit Semaphore.
+
+Aufruf (aus dem Repository-Wurzelverzeichnis):
+    python benchmarks/bench_llm_concurrency.py [latenz_s]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "recommendation-api"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import app as reco  # noqa: E402
+from stubs import openai_stub, serve  # noqa: E402
+
+
+async def chat_vorher(messages):
+    from openai import OpenAI
+    client = OpenAI(api_key=reco.OPENAI_API_KEY, base_url=reco.OPENAI_BASE_URL)
+    resp = client.chat.completions.create(model=reco.OPENAI_MODEL, messages=messages, max_tokens=300)
+    return resp.choices[0].message.content
+
+
+async def runde(fn, parallel: int) -> float:
+    nachricht = [{"role": "user", "content": "Tipps"}]
+    start = time.perf_counter()
+    await asyncio.gather(*(fn(nachricht) for _ in range(parallel)))
+    return time.perf_counter() - start
+
+
+async def messen(stufen):
+    ergebnisse = []
+    for parallel in stufen:
+        for name, fn in (("vorher", chat_vorher), ("nachher", reco.chat_completion)):
+            ergebnisse.append((parallel, name, await runde(fn, parallel)))
+    await reco.get_openai_client().close()
+    return ergebnisse
+
+
+def main():
+    latenz = float(sys.argv[1]) if len(sys.argv) > 1 else 0.2
+    with serve(openai_stub(latency=latenz)) as url:
+        reco.OPENAI_API_KEY = "stub"
+        reco.OPENAI_BASE_URL = f"{url}/v1"
+        stufen = (1, 4, reco.LLM_MAX_CONCURRENCY, 4 * reco.LLM_MAX_CONCURRENCY)
+        print(f"Modell-Latenz {latenz}s, LLM_MAX_CONCURRENCY={reco.LLM_MAX_CONCURRENCY}")
+        print(f"{'parallel':>8} {'variante':>8} {'sekunden':>9} {'anfragen/s':>11}")
+        for parallel, name, dauer in asyncio.run(messen(stufen)):
+            print(f"{parallel:>8} {name:>8} {dauer:>9.2f} {parallel / dauer:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
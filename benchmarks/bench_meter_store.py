@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Zählerstände einliefern und Bereichsstatistiken aus den Rollups.
+
+- Ingest: dieselben 15-Minuten-Werte (mehrere Zähler, mehrere Jahre) als CSV,
+  NDJSON und binär; gemessen werden Parsen und Speichern (Werte/s)
+- Abfrage: /stats-Kern (``meter_stats``) für Fenster von 1 Tag bis zu allen
+  Jahren, verglichen mit einem vollständigen Durchlauf über die Rohwerte.
+  Beide müssen dieselben Werte liefern.
+
+Aufruf (aus dem Repository-Wurzelverzeichnis):
+    python benchmarks/bench_meter_store.py [zaehler] [jahre]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "usage-sim-api"))
+
+from meter_ingest import PARSERS, encode_binary  # noqa: E402
+from meter_store import ROH, MeterStore  # noqa: E402
+from usage_stats import meter_stats  # noqa: E402
+
+EPOCHE = "2020-01-01"
+EPOCHE_S = 1577836800
+
+
+def messwerte(zaehler: int, jahre: int) -> list[tuple[str, np.ndarray, np.ndarray]]:
+    """15-Minuten-Werte je Zähler, mit Lücken (ca. 1 % der Werte fehlt)."""
+    rng = np.random.default_rng(7)
+    ts = np.arange(EPOCHE_S, EPOCHE_S + jahre * 365 * 86400, 900)
+    daten = []
+    for z in range(zaehler):
+        behalten = rng.random(len(ts)) > 0.01
+        kwh = np.round(rng.gamma(2.0, 0.06, len(ts)), 3)
+        daten.append((f"zaehler-{z}", ts[behalten], kwh[behalten]))
+    return daten
+
+
+def kodieren(daten, format: str) -> bytes:
+    if format == "binary":
+        return b"".join(encode_binary(m, ts, kwh) for m, ts, kwh in daten)
+    zeilen = []
+    for m, ts, kwh in daten:
+        if format == "csv":
+            zeilen.extend(f"{m},{t},{k}" for t, k in zip(ts.tolist(), kwh.tolist()))
+        else:
+            zeilen.extend(json.dumps({"meter_id": m, "timestamp": t, "kwh": k}) for t, k in zip(ts.tolist(), kwh.tolist()))
+    return ("\n".join(zeilen) + "\n").encode()
+
+
+def vollstaendig(store: MeterStore, meter_id: str, days: int, start_day: int = 0) -> tuple[float, float, float]:
+    """Vergleichswert: alle Rohwerte lesen, auf Stunden summieren, Fenster auswerten."""
+    roh = np.fromfile(os.path.join(store.verzeichnis, meter_id, "roh.bin"), dtype=ROH)
+    stunde = (roh["ts"] - EPOCHE_S) // 3600
+    auswahl = (stunde >= start_day * 24) & (stunde < (start_day + days) * 24)
+    stunden, zuordnung = np.unique(stunde[auswahl], return_inverse=True)
+    summen = np.bincount(zuordnung, weights=roh["kwh"][auswahl].astype(np.float32))
+    summen = summen.astype(np.float32).astype(np.float64)
+    return round(summen.mean(), 3), round(summen.max(), 3), round(summen.min(), 3)
+
+
+def zeit(fn, wiederholungen: int) -> float:
+    start = time.perf_counter()
+    for _ in range(wiederholungen):
+        fn()
+    return (time.perf_counter() - start) / wiederholungen
+
+
+def main():
+    zaehler = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    jahre = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    daten = messwerte(zaehler, jahre)
+    anzahl = sum(len(ts) for _, ts, _ in daten)
+
+    print(f"Ingest: {zaehler} Zähler × {jahre} Jahre 15-Minuten-Werte = {anzahl} Werte")
+    print(f"{'format':>7} {'mb':>6} {'parsen_s':>9} {'speichern_s':>12} {'werte/s':>11}")
+    for format in ("csv", "ndjson", "binary"):
+        nutzlast = kodieren(daten, format)
+        with tempfile.TemporaryDirectory() as verzeichnis:
+            store = MeterStore(verzeichnis, EPOCHE, max_future_days=jahre * 366)  # synthetische Jahre ab der Epoche
+            start = time.perf_counter()
+            spalten = PARSERS[format](nutzlast)
+            geparst = time.perf_counter()
+            store.ingest(*spalten)
+            fertig = time.perf_counter()
+            assert store.ingested == anzahl
+        print(f"{format:>7} {len(nutzlast) / 1e6:>6.1f} {geparst - start:>9.3f} {fertig - geparst:>12.3f} "
+              f"{anzahl / (fertig - start):>11.0f}")
+
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        store = MeterStore(verzeichnis, EPOCHE, max_future_days=jahre * 366)
+        for m, ts, kwh in daten:  # in Stapeln wie aus einem Ingest-Client
+            for a in range(0, len(ts), 50_000):
+                store.ingest(np.full(len(ts[a:a + 50_000]), m), ts[a:a + 50_000], kwh[a:a + 50_000])
+        serie = store.get("zaehler-0")
+        print("\nAbfrage zaehler-0 (Mittel, ms); vollständig = alle Rohwerte lesen")
+        print(f"{'days':>6} {'start_day':>9} {'rollups_ms':>11} {'vollst_ms':>10}  avg")
+        for days, start_day in ((1, 100), (30, 45), (365, 17), (jahre * 365 - 40, 20), (jahre * 365, 0)):
+            ergebnis = meter_stats(serie, days, start_day)
+            erwartet = vollstaendig(store, "zaehler-0", days, start_day)
+            # gleiche Werte bis auf die Rundung der float32-Stundensummen
+            assert np.allclose((ergebnis["avg"], ergebnis["max"], ergebnis["min"]), erwartet, atol=1e-3), \
+                (days, ergebnis, erwartet)
+            rollups = zeit(lambda: meter_stats(serie, days, start_day), 200)
+            scan = zeit(lambda: vollstaendig(store, "zaehler-0", days, start_day), 5)
+            print(f"{days:>6} {start_day:>9} {rollups * 1000:>11.3f} {scan * 1000:>10.1f}  {ergebnis['avg']}")
+        print(f"Speicher je Zähler (Stunden + Rollups): {serie.info()['bytes'] / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
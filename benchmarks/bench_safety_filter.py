@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-Benchmark des kompilierten Sicherheitsfilters: naive ``in``-Schleifen
+vs. kompilierter Filter bei 14 / 200 / 800 Begriffen und AI-typischen
+Textlängen. Die Korrektheit prüft recommendation-api/tests/test_safety_filter.py.
+
+Aufruf (aus dem Repository-Wurzelverzeichnis):
+    python benchmarks/bench_safety_filter.py
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "recommendation-api"))
+
+from safety_filter import DEFAULT_TERMS, SafetyFilter  # noqa: E402
+
+
+def zufallstexte(anzahl: int, laenge: int, seed: int = 1) -> list[str]:
+    zufall = random.Random(seed)
+    woerter = ("energie sparen led standby gerät kühlschrank deckel waschen heizung "
+               "sicherung kabel strom zähler schalter anlage elektrische").split()
+    alle = [t for liste in DEFAULT_TERMS.values() for t in liste]
+    texte = []
+    for i in range(anzahl):
+        teile = [zufall.choice(woerter) for _ in range(laenge // 7)]
+        if i % 4 == 0:
+            teile.insert(zufall.randrange(len(teile)), zufall.choice(alle).upper())
+        texte.append(" ".join(teile))
+    return texte
+
+
+def begriffe_skaliert(anzahl: int) -> dict:
+    zufall = random.Random(2)
+    buchstaben = "abcdefghijklmnopqrstuvwxyzäöüß"
+    extra = ["".join(zufall.choice(buchstaben) for _ in range(zufall.randint(6, 20)))
+             for _ in range(max(0, anzahl - 14))]
+    return {
+        "verbotene_begriffe": DEFAULT_TERMS["verbotene_begriffe"] + extra[: len(extra) // 2],
+        "gefaehrliche_woerter": DEFAULT_TERMS["gefaehrliche_woerter"] + extra[len(extra) // 2:],
+    }
+
+
+def naiv(terms: dict, text: str) -> bool:
+    lower = text.lower()
+    return any(t in lower for liste in terms.values() for t in liste)
+
+
+def main():
+    print(f"{'begriffe':>8} {'zeichen':>8} {'naiv µs':>9} {'kompiliert µs':>14} {'speedup':>8}")
+    for anzahl in (14, 200, 800):
+        terms = begriffe_skaliert(anzahl)
+        f = SafetyFilter(terms)
+        for laenge in (300, 1500):
+            texte = zufallstexte(200, laenge, seed=3)
+            t_naiv = min(timeit.repeat(lambda: [naiv(terms, t) for t in texte], number=5, repeat=3)) / 1000
+            t_neu = min(timeit.repeat(lambda: [f.is_unsafe(t) for t in texte], number=5, repeat=3)) / 1000
+            t_naiv, t_neu = t_naiv * 1e6, t_neu * 1e6
+            print(f"{anzahl:>8} {laenge:>8} {t_naiv:>9.1f} {t_neu:>14.1f} {t_naiv / t_neu:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Importzeit und Time-to-ready von recommendation-api.
+
+Jede Messung läuft in einem frischen Python-Prozess:
+- Import: ``import app`` (Median), dazu welche schweren Module dabei geladen werden
+- Time-to-ready: Start von uvicorn bis /ready mit 200 antwortet, gegen lokale
+  Stubs der Verbrauchs- und der OpenAI-API; einmal "kalt" (Index wird über
+  die Embeddings-API gebaut) und einmal "warm" (Index liegt bereits auf Platte)
+
+Optional wird derselbe Ablauf für einen älteren Stand gemessen (git-Referenz,
+z.B. ``HEAD~5``); Stände ohne /ready gelten als bereit, sobald /health antwortet.
+
+Aufruf (aus dem Repository-Wurzelverzeichnis):
+    python benchmarks/bench_startup.py [wiederholungen] [git-referenz]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from stubs import _freier_port, openai_stub, serve, usage_stub  # noqa: E402
+
+WURZEL = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCHWER = ("numpy", "faiss", "httpx", "openai", "dotenv", "redis")
+
+IMPORT_SKRIPT = (
+    "import sys, time, json; t = time.perf_counter(); import app; "
+    "print(json.dumps({'sekunden': time.perf_counter() - t, "
+    f"'geladen': [m for m in {SCHWER!r} if m in sys.modules]}}))"
+)
+
+
+def importzeit(verzeichnis: str, env: dict, wiederholungen: int) -> tuple[float, list]:
+    messungen = []
+    for _ in range(wiederholungen):
+        ausgabe = subprocess.run([sys.executable, "-c", IMPORT_SKRIPT], cwd=verzeichnis, env=env,
+                                 capture_output=True, text=True, check=True).stdout
+        messungen.append(json.loads(ausgabe.strip().splitlines()[-1]))
+    return statistics.median(m["sekunden"] for m in messungen), messungen[-1]["geladen"]
+
+
+def time_to_ready(verzeichnis: str, env: dict) -> float:
+    port = _freier_port()
+    start = time.perf_counter()
+    prozess = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=verzeichnis, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            if prozess.poll() is not None:
+                raise RuntimeError("uvicorn wurde vorzeitig beendet")
+            try:
+                r = httpx.get(f"http://127.0.0.1:{port}/ready", timeout=1)
+                if r.status_code == 404:
+                    r = httpx.get(f"http://127.0.0.1:{port}/health", timeout=30)
+                if r.status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            time.sleep(0.05)
+    finally:
+        prozess.terminate()
+        prozess.wait()
+
+
+def stand_exportieren(ref: str, ziel: str) -> str:
+    archiv = os.path.join(ziel, "stand.tar")
+    subprocess.run(["git", "archive", "-o", archiv, ref, "recommendation-api"], cwd=WURZEL, check=True)
+    with tarfile.open(archiv) as tar:
+        tar.extractall(ziel)
+    return os.path.join(ziel, "recommendation-api")
+
+
+def messen(name: str, verzeichnis: str, env: dict, wiederholungen: int) -> dict:
+    import_s, geladen = importzeit(verzeichnis, env, wiederholungen)
+    with tempfile.TemporaryDirectory() as index_dir:
+        env = dict(env, EMBEDDINGS_DIR=index_dir)
+        kalt = time_to_ready(verzeichnis, env)
+        warm = statistics.median(time_to_ready(verzeichnis, env) for _ in range(wiederholungen))
+    return {"stand": name, "import_s": round(import_s, 3), "ready_kalt_s": round(kalt, 3),
+            "ready_warm_s": round(warm, 3), "beim_import_geladen": geladen}
+
+
+def main():
+    wiederholungen = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    ref = sys.argv[2] if len(sys.argv) > 2 else None
+    with serve(usage_stub(latency=0.02)) as usage_url, serve(openai_stub(latency=0.2)) as modell_url, \
+            tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, USAGE_API=usage_url, OPENAI_API_KEY="stub",
+                   OPENAI_BASE_URL=f"{modell_url}/v1", LLM_CACHE_BACKEND="memory")
+        staende = [("aktuell", os.path.join(WURZEL, "recommendation-api"))]
+        if ref:
+            staende.insert(0, (ref, stand_exportieren(ref, tmp)))
+        ergebnisse = [messen(name, verzeichnis, env, wiederholungen) for name, verzeichnis in staende]
+
+    print(f"Median über {wiederholungen} Prozessstarts (ready_kalt: einmalig, Index wird gebaut)")
+    print(f"{'stand':>10} {'import_s':>9} {'ready_kalt_s':>13} {'ready_warm_s':>13}  beim Import geladen")
+    for e in ergebnisse:
+        print(f"{e['stand']:>10} {e['import_s']:>9.3f} {e['ready_kalt_s']:>13.3f} {e['ready_warm_s']:>13.3f}"
+              f"  {', '.join(e['beim_import_geladen']) or '-'}")
+    print(json.dumps(ergebnisse, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
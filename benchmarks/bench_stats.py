@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Einpass-Statistik-Pipeline vs. exakte Berechnung auf dem
+vollständig materialisierten Array (Genauigkeit und Laufzeit).
+
+Aufruf (aus dem Repository-Wurzelverzeichnis):
+    python benchmarks/bench_stats.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "usage-sim-api"))
+
+from simulation import gen_hourly_arrays, iter_blocks  # noqa: E402
+from streaming_stats import METRICS, PERCENTILES, ROLLING_WINDOWS, StatsPipeline  # noqa: E402
+
+
+def exakt(days: int, top_k: int = 5) -> dict:
+    day, hour, kwh = gen_hourly_arrays(days)
+    ergebnis = {
+        "variance": float(kwh.var()),
+        "percentiles": {f"p{p}": float(np.percentile(kwh, p)) for p in PERCENTILES},
+        "rolling_mean": {},
+    }
+    for name, n in ROLLING_WINDOWS.items():
+        mittel = np.convolve(kwh, np.ones(n) / n, mode="valid")
+        ergebnis["rolling_mean"][name] = {"last": mittel[-1], "max": mittel.max(), "min": mittel.min()}
+    top = np.lexsort((np.arange(len(kwh)), -kwh))[:top_k]
+    ergebnis["peaks"] = kwh[top].tolist()
+    return ergebnis
+
+
+def main():
+    print(f"{'days':>6} {'exakt ms':>9} {'stream ms':>10} {'max |Δ| perzentil':>18} {'|Δ| varianz':>12} {'rolling ok':>11} {'peaks ok':>9}")
+    for days in (7, 365, 3650):
+        start = time.perf_counter()
+        ref = exakt(days)
+        t_exakt = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        res = StatsPipeline(set(METRICS)).consume(iter_blocks(days)).result()
+        t_stream = (time.perf_counter() - start) * 1000
+
+        d_perz = max(abs(res["percentiles"][k] - v) for k, v in ref["percentiles"].items())
+        d_var = abs(res["variance"] - ref["variance"])
+        rolling_ok = all(
+            abs(res["rolling_mean"][n][k] - ref["rolling_mean"][n][k]) <= 0.0005
+            for n in ROLLING_WINDOWS if res["rolling_mean"][n]["last"] is not None
+            for k in ("last", "max", "min")
+        )
+        peaks_ok = [p["kwh"] for p in res["peaks"]] == ref["peaks"]
+        print(f"{days:>6} {t_exakt:>9.2f} {t_stream:>10.2f} {d_perz:>18.4f} {d_var:>12.5f} {str(rolling_ok):>11} {str(peaks_ok):>9}")
+
+
+if __name__ == "__main__":
+    main()
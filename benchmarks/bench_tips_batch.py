@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: nächtlicher Job mit vielen Haushalten – einzelne /tips-Aufrufe
+gegenüber einem /tips/batch-Aufruf.
+
+Die Haushalte verteilen sich auf 30 days-Werte; der Verbrauchs-Stub liefert
+je days-Wert einen anderen Durchschnitt (alle drei Verbrauchsklassen kommen
+vor). Gezählt werden Upstream-Aufrufe (/stats) und Modellaufrufe. Der
+Antwort-Cache ist abgeschaltet, damit die Zahl der Generierungen sichtbar ist.
+
+Aufruf (aus dem Repository-Wurzelverzeichnis):
+    python benchmarks/bench_tips_batch.py [haushalte] [einzeln_stichprobe]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "recommendation-api"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import app as reco  # noqa: E402
+from llm_cache import ResponseCache  # noqa: E402
+from stubs import openai_stub, serve, usage_stub  # noqa: E402
+
+
+def avg_fuer(days: int) -> float:
+    """0.30 … 0.99 kWh/h je nach days (niedrig, normal, hoch)."""
+    return round(0.3 + (days * 0.023) % 0.7, 3)
+
+
+def haushalte(n: int) -> list[dict]:
+    return [{"id": f"hh-{i}", "days": 1 + i % 30, "max_tips": 5 if i % 4 else 3} for i in range(n)]
+
+
+async def einzeln(client: httpx.AsyncClient, items: list[dict]) -> list[dict]:
+    return [(await client.post("/tips", json=item)).json() for item in items]
+
+
+async def batch(client: httpx.AsyncClient, items: list[dict]) -> list[dict]:
+    zeilen = []
+    async with client.stream("POST", "/tips/batch", json={"items": items}) as r:
+        r.raise_for_status()
+        async for zeile in r.aiter_lines():
+            if zeile:
+                zeilen.append(json.loads(zeile))
+    return zeilen
+
+
+async def messen(url: str, n: int, stichprobe: int, usage, modell) -> list[tuple]:
+    ergebnisse = []
+    items = haushalte(n)
+    async with httpx.AsyncClient(base_url=url, timeout=300) as client:
+        for name, fn, teil in (("einzeln", einzeln, items[:stichprobe]), ("batch", batch, items)):
+            usage.state.calls = 0
+            modell.state.calls["chat"] = 0
+            start = time.perf_counter()
+            antworten = await fn(client, teil)
+            dauer = time.perf_counter() - start
+            ergebnisse.append((name, len(teil), dauer, usage.state.calls, modell.state.calls["chat"], antworten))
+
+    # Jeder Eintrag genau einmal, mit eigenem Durchschnitt und passender Klasse
+    zeilen = ergebnisse[-1][-1]
+    assert sorted(z["index"] for z in zeilen) == list(range(n))
+    for z in zeilen:
+        item = items[z["index"]]
+        assert z["id"] == item["id"] and z["durchschnitt_kwh"] == avg_fuer(item["days"])
+        assert z["quelle"] == "ai-enhanced"
+    return ergebnisse
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    stichprobe = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    usage = usage_stub(latency=0.02, avg=avg_fuer)
+    modell = openai_stub(latency=0.2)
+    with serve(usage) as usage_url, serve(modell) as modell_url, tempfile.TemporaryDirectory() as verzeichnis:
+        reco.USAGE_API = usage_url
+        reco.OPENAI_API_KEY = "stub"
+        reco.OPENAI_BASE_URL = f"{modell_url}/v1"
+        reco.EMBEDDINGS_DIR = verzeichnis
+        reco.llm_response_cache = ResponseCache(None)
+        with serve(reco.app) as url:
+            ergebnisse = asyncio.run(messen(url, n, stichprobe, usage, modell))
+
+    print(f"{n} Haushalte, 30 days-Werte; einzeln gemessen an {stichprobe} Haushalten, hochgerechnet")
+    print(f"{'variante':>8} {'haushalte':>9} {'sekunden':>9} {'haushalte/s':>12} {'upstream':>9} {'modell':>7}")
+    for name, anzahl, dauer, upstream, chat, _ in ergebnisse:
+        faktor = n / anzahl
+        print(f"{name:>8} {n:>9} {dauer * faktor:>9.2f} {anzahl / dauer:>12.1f} "
+              f"{upstream * faktor:>9.0f} {chat * faktor:>7.0f}")
+
+
+if __name__ == "__main__":
+    main()
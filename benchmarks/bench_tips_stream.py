@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Time-to-first-byte von /tips gegenüber /tips/stream (SSE).
+
+Beide Endpunkte laufen gegen einen lokalen Modell-Stub, der die Antwort
+wortweise streamt (Latenz bis zum ersten Token + Abstand je Token). /tips
+antwortet erst nach dem letzten Token; /tips/stream sendet das meta-Ereignis
+sofort und die ersten geprüften Tokens, sobald sie den Sicherheitsfilter
+passiert haben. Der Antwort-Cache ist abgeschaltet, damit jede Anfrage das
+Modell erreicht.
+
+Zusätzlich wird geprüft, dass ein über Chunk-Grenzen verteilter gesperrter
+Begriff nie (auch nicht teilweise) gesendet wird und der Stream auf die
+regelbasierten Tipps umschaltet.
+
+Aufruf (aus dem Repository-Wurzelverzeichnis):
+    python benchmarks/bench_tips_stream.py [erstes_token_s] [token_abstand_s] [wiederholungen]
+"""
+
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "recommendation-api"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import app as reco  # noqa: E402
+from llm_cache import ResponseCache  # noqa: E402
+from safety_filter import SafetyFilter, StreamGuard, DEFAULT_TERMS  # noqa: E402
+from stubs import openai_stub, serve, usage_stub  # noqa: E402
+
+TEXT = (
+    "1. Schalten Sie Geräte im Standby-Modus nachts vollständig aus, statt sie laufen zu lassen.\n"
+    "2. Nutzen Sie LED-Beleuchtung in allen häufig genutzten Räumen.\n"
+    "3. Waschen Sie bei 30°C und nur mit voller Trommel.\n"
+    "4. Tauen Sie den Gefrierschrank regelmäßig ab.\n"
+    "5. Verwenden Sie beim Kochen passende Deckel."
+)
+UNSICHER = "1. Nutzen Sie LED-Lampen.\n2. Bei Problemen einfach das Kabel durchtrennen und neu verlegen."
+
+
+def pruefe_guard():
+    """StreamGuard an jeder möglichen Chunk-Grenze: nichts Gesperrtes wird freigegeben."""
+    sf = SafetyFilter(DEFAULT_TERMS)
+    for schnitt in range(1, len(UNSICHER)):
+        guard = StreamGuard(sf)
+        gesendet = guard.feed(UNSICHER[:schnitt]) + guard.feed(UNSICHER[schnitt:])
+        assert guard.blockiert and "kabel durchtr" not in gesendet.lower(), schnitt
+    for schnitt in range(1, len(TEXT), 7):
+        guard = StreamGuard(sf)
+        gesendet = guard.feed(TEXT[:schnitt]) + guard.feed(TEXT[schnitt:]) + guard.finish()
+        assert not guard.blockiert and gesendet == TEXT, schnitt
+
+
+async def tips(client: httpx.AsyncClient) -> tuple[float, float, float]:
+    start = time.perf_counter()
+    r = await client.post("/tips", json={"days": 7, "max_tips": 5})
+    r.raise_for_status()
+    dauer = time.perf_counter() - start
+    return dauer, dauer, dauer
+
+
+async def tips_stream(client: httpx.AsyncClient, ereignisse: list | None = None) -> tuple[float, float, float]:
+    start = time.perf_counter()
+    ttfb = erstes_token = None
+    async with client.stream("POST", "/tips/stream", json={"days": 7, "max_tips": 5}) as r:
+        r.raise_for_status()
+        event = None
+        async for zeile in r.aiter_lines():
+            if ttfb is None:
+                ttfb = time.perf_counter() - start
+            if zeile.startswith("event: "):
+                event = zeile[7:]
+            elif zeile.startswith("data: "):
+                if event == "token" and erstes_token is None:
+                    erstes_token = time.perf_counter() - start
+                if ereignisse is not None:
+                    ereignisse.append((event, json.loads(zeile[6:])))
+    return ttfb, erstes_token or float("nan"), time.perf_counter() - start
+
+
+async def messen(url: str, wiederholungen: int, modell) -> dict:
+    ergebnisse = {}
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        for name, fn in (("/tips", tips), ("/tips/stream", tips_stream)):
+            werte = [await fn(client) for _ in range(wiederholungen)]
+            ergebnisse[name] = [statistics.median(spalte) for spalte in zip(*werte)]
+
+        # Gesperrter Begriff, vom Stub auf zwei Chunks verteilt ("… Kabel", " durchtrennen …")
+        modell.state.text = UNSICHER
+        ereignisse = []
+        await tips_stream(client, ereignisse)
+        modell.state.text = TEXT
+    gesendet = "".join(d["text"] for e, d in ereignisse if e == "token")
+    assert "kabel" not in gesendet.lower(), gesendet
+    assert [e for e, _ in ereignisse][-2:] == ["fallback", "done"]
+    assert ereignisse[-1][1]["quelle"] == "regelbasiert-fallback"
+    return ergebnisse
+
+
+def main():
+    erstes_token = float(sys.argv[1]) if len(sys.argv) > 1 else 0.3
+    abstand = float(sys.argv[2]) if len(sys.argv) > 2 else 0.03
+    wiederholungen = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    pruefe_guard()
+
+    modell = openai_stub(latency=erstes_token, token_latency=abstand, text=TEXT)
+    with serve(usage_stub(latency=0.0)) as usage_url, serve(modell) as modell_url, \
+            tempfile.TemporaryDirectory() as verzeichnis:
+        reco.USAGE_API = usage_url
+        reco.OPENAI_API_KEY = "stub"
+        reco.OPENAI_BASE_URL = f"{modell_url}/v1"
+        reco.EMBEDDINGS_DIR = verzeichnis
+        reco.llm_response_cache = ResponseCache(None)
+        with serve(reco.app) as url:
+            ergebnisse = asyncio.run(messen(url, wiederholungen, modell))
+
+    woerter = len(TEXT.split())
+    print(f"Modell-Stub: erstes Token nach {erstes_token}s, {woerter} Tokens im Abstand von {abstand}s")
+    print(f"Median über {wiederholungen} Anfragen")
+    print(f"{'endpunkt':>13} {'ttfb_s':>8} {'erstes_token_s':>15} {'gesamt_s':>9}")
+    for name, (ttfb, token, gesamt) in ergebnisse.items():
+        print(f"{name:>13} {ttfb:>8.3f} {token:>15.3f} {gesamt:>9.3f}")
+    print("Gesperrter Begriff über Chunk-Grenze: nicht gesendet, Fallback aktiv")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: /tips-Durchsatz mit USAGE_PROVIDER=http gegenüber inprocess.
+
+- http:      die echte usage-sim-api läuft als eigener uvicorn-Prozess,
+             jede /stats-Abfrage geht über den Verbindungspool
+- inprocess: recommendation-api berechnet den Durchschnitt mit dem
+             Statistik-Kern der usage-sim-api im selben Prozess
+
+Das Modell ist ein lokaler Stub, der Antwort-Cache bleibt aktiv: nach dem
+Aufwärmen kommt jede Antwort aus dem Cache, gemessen wird also im
+Wesentlichen der Weg zum Durchschnitt. Die Anfragen verteilen sich auf
+days = 1 … 90; beide Modi müssen dieselben Durchschnitte liefern.
+
+Aufruf (aus dem Repository-Wurzelverzeichnis):
+    python benchmarks/bench_usage_provider.py [anfragen] [parallel]
+"""
+
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "recommendation-api"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import app as reco  # noqa: E402
+from stubs import _freier_port, openai_stub, serve  # noqa: E402
+
+WURZEL = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TAGE = 90
+
+
+def perzentil(werte: list[float], p: float) -> float:
+    werte = sorted(werte)
+    return werte[min(len(werte) - 1, int(p * len(werte)))]
+
+
+def usage_sim_starten() -> tuple[subprocess.Popen, str]:
+    port = _freier_port()
+    prozess = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=os.path.join(WURZEL, "usage-sim-api"), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    while True:
+        if prozess.poll() is not None:
+            raise RuntimeError("usage-sim-api wurde vorzeitig beendet")
+        try:
+            httpx.get(f"{url}/", timeout=1).raise_for_status()
+            return prozess, url
+        except httpx.TransportError:
+            time.sleep(0.05)
+
+
+async def last(url: str, anfragen: int, parallel: int) -> tuple[float, list[float], dict]:
+    dauern, durchschnitte = [], {}
+    naechste = iter(range(anfragen))
+
+    async def arbeiter(client: httpx.AsyncClient):
+        for i in naechste:
+            days = 1 + i % TAGE
+            start = time.perf_counter()
+            r = await client.post("/tips", json={"days": days, "max_tips": 3})
+            dauern.append(time.perf_counter() - start)
+            r.raise_for_status()
+            antwort = r.json()
+            durchschnitte[days] = None if "nachricht" in antwort else antwort["durchschnitt_kwh"]
+
+    limits = httpx.Limits(max_connections=parallel, max_keepalive_connections=parallel)
+    async with httpx.AsyncClient(base_url=url, timeout=30, limits=limits) as client:
+        # Aufwärmen: Antwort-Cache und Rollup-Cache für alle days-Werte füllen
+        for days in range(1, TAGE + 1):
+            (await client.post("/tips", json={"days": days, "max_tips": 3})).raise_for_status()
+        start = time.perf_counter()
+        await asyncio.gather(*(arbeiter(client) for _ in range(parallel)))
+        return time.perf_counter() - start, dauern, durchschnitte
+
+
+def messen(modus: str, usage_url: str, anfragen: int, parallel: int) -> dict:
+    reco.USAGE_PROVIDER = modus
+    reco.USAGE_API = usage_url
+    reco.usage_provider = None
+    with serve(reco.app) as url:
+        dauer, dauern, durchschnitte = asyncio.run(last(url, anfragen, parallel))
+    # Keine Ersatzwerte: jeder Durchschnitt kam von der gemessenen Quelle
+    assert reco.usage_fallbacks.value() == 0 and None not in durchschnitte.values()
+    return {
+        "modus": modus,
+        "anfragen_pro_s": anfragen / dauer,
+        "p50_ms": statistics.median(dauern) * 1000,
+        "p99_ms": perzentil(dauern, 0.99) * 1000,
+        "durchschnitte": durchschnitte,
+    }
+
+
+def main():
+    anfragen = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    parallel = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    usage_sim, usage_url = usage_sim_starten()
+    try:
+        with serve(openai_stub(latency=0.05)) as modell_url, tempfile.TemporaryDirectory() as verzeichnis:
+            reco.OPENAI_API_KEY = "stub"
+            reco.OPENAI_BASE_URL = f"{modell_url}/v1"
+            reco.EMBEDDINGS_DIR = verzeichnis
+            ergebnisse = [messen(modus, usage_url, anfragen, parallel) for modus in ("http", "inprocess")]
+    finally:
+        usage_sim.terminate()
+        usage_sim.wait()
+
+    # Beide Quellen liefern für jedes days denselben Durchschnitt
+    assert ergebnisse[0]["durchschnitte"] == ergebnisse[1]["durchschnitte"]
+
+    print(f"{anfragen} /tips-Anfragen, {parallel} parallel, days 1…{TAGE}, Antwort-Cache warm")
+    print(f"{'modus':>10} {'anfragen/s':>11} {'p50_ms':>8} {'p99_ms':>8}")
+    for e in ergebnisse:
+        print(f"{e['modus']:>10} {e['anfragen_pro_s']:>11.1f} {e['p50_ms']:>8.2f} {e['p99_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Recall und Latenz der Index-Backends für das Tipp-Retrieval.
+
+Synthetische Embeddings: Katalog aus Clustern (wie Tipps zu wenigen Themen
+in mehreren Sprachen), normalisiert; Queries sind verrauschte Katalogvektoren.
+Die Referenz ist die exakte Suche (numpy). Gemessen werden je Backend und
+Parametersatz:
+- Bauzeit
+- Latenz einer Einzel-Query (p50/p99), wie im /tips-Pfad
+- Durchsatz bei Batch-Suche (alle Queries in einem Aufruf)
+- recall@k gegenüber der exakten Suche
+
+Aufruf (aus dem Repository-Wurzelverzeichnis):
+    python benchmarks/bench_vector_index.py [katalog] [dim] [queries] [k]
+"""
+
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "recommendation-api"))
+
+from vector_index import IndexParams, build_index, configure, normalize  # noqa: E402
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+
+def daten(n: int, dim: int, queries: int, cluster: int = 200) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(3)
+    zentren = rng.standard_normal((cluster, dim))
+    katalog = zentren[rng.integers(cluster, size=n)] + 0.6 * rng.standard_normal((n, dim))
+    anfragen = katalog[rng.integers(n, size=queries)] + 0.3 * rng.standard_normal((queries, dim))
+    return normalize(katalog), normalize(anfragen)
+
+
+def recall(gefunden: np.ndarray, exakt: np.ndarray) -> float:
+    return float(np.mean([len(set(g) & set(e)) / len(e) for g, e in zip(gefunden.tolist(), exakt.tolist())]))
+
+
+def messen(name: str, index, anfragen: np.ndarray, exakt: np.ndarray, k: int, bau_s: float) -> dict:
+    einzel = []
+    for q in anfragen:
+        start = time.perf_counter()
+        index.search(q[None, :], k)
+        einzel.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    _, gefunden = index.search(anfragen, k)
+    batch_s = time.perf_counter() - start
+    einzel.sort()
+    return {
+        "backend": name,
+        "bau_s": bau_s,
+        "p50_ms": statistics.median(einzel) * 1000,
+        "p99_ms": einzel[min(len(einzel) - 1, int(0.99 * len(einzel)))] * 1000,
+        "batch_qps": len(anfragen) / batch_s,
+        "recall": recall(gefunden, exakt),
+    }
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    dim = int(sys.argv[2]) if len(sys.argv) > 2 else 384
+    anzahl = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    k = int(sys.argv[4]) if len(sys.argv) > 4 else 10
+    katalog, anfragen = daten(n, dim, anzahl)
+
+    _, exakt = build_index("numpy", katalog, IndexParams()).search(anfragen, k)
+
+    varianten = [("numpy", IndexParams()), ("numpy block=4096", IndexParams(numpy_block=4096))]
+    if faiss is not None:
+        varianten += [("flat", IndexParams())]
+        varianten += [(f"ivf nprobe={p}", IndexParams(ivf_nlist=256, ivf_nprobe=p)) for p in (1, 8, 32)]
+        varianten += [(f"hnsw ef={e}", IndexParams(hnsw_m=32, hnsw_ef_search=e)) for e in (16, 64, 128)]
+    else:
+        print("faiss nicht installiert: nur das numpy-Backend wird gemessen")
+
+    ergebnisse = []
+    gebaut = {}
+    for name, params in varianten:
+        backend = name.split()[0]
+        # Suchparameter ändern den Index nicht: je Backend nur einmal bauen
+        schluessel = (backend, params.ivf_nlist, params.hnsw_m, params.numpy_block)
+        if schluessel not in gebaut:
+            start = time.perf_counter()
+            gebaut[schluessel] = (build_index(backend, katalog, params, faiss), time.perf_counter() - start)
+        index, bau_s = gebaut[schluessel]
+        configure(index, backend, params, faiss)
+        ergebnisse.append(messen(name, index, anfragen, exakt, k, bau_s))
+
+    for e in ergebnisse:
+        if e["backend"] in ("numpy", "flat"):
+            assert e["recall"] > 0.999, e  # exakte Backends
+
+    threads = faiss.omp_get_max_threads() if faiss is not None else 1
+    print(f"Katalog {n} × {dim}, {anzahl} Queries, recall@{k} gegen exakte Suche, faiss-Threads: {threads}")
+    print(f"{'backend':>17} {'bau_s':>7} {'p50_ms':>8} {'p99_ms':>8} {'batch_qps':>10} {'recall':>7}")
+    for e in ergebnisse:
+        print(f"{e['backend']:>17} {e['bau_s']:>7.2f} {e['p50_ms']:>8.3f} {e['p99_ms']:>8.3f} "
+              f"{e['batch_qps']:>10.0f} {e['recall']:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
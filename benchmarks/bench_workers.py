@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Produktionsmodus von recommendation-api mit 1 bis N Workern.
+
+Je Worker-Anzahl wird ``python app.py`` mit SERVER_MODE=production in einem
+frischen Prozess gestartet (leeres EMBEDDINGS_DIR, OpenAI-Stub, Verbrauchsdaten
+im Prozess). Gemessen werden:
+- Time-to-ready und Aufrufe der Embeddings-API beim kalten Start (nur ein
+  Worker baut den Index: 1 Katalog-Aufruf + 1 Vorwärm-Aufruf je Worker)
+- Speicher je Worker aus /proc: RSS, PSS und privater Anteil; dazu, ob die
+  Index-Vektoren in jedem Worker memory-mapped (also geteilt) sind
+- Durchsatz und Latenz von POST /tips unter Last (eingeschwungen, Antwort-Cache warm)
+- Beenden per SIGTERM während laufender Anfragen (Exit-Code, Dauer, Antworten)
+
+Nur Linux (/proc). Auf einem Host mit einem Kern kann der Durchsatz mit mehr
+Workern nicht steigen; die Anzahl der Kerne wird mit ausgegeben.
+
+Aufruf (aus dem Repository-Wurzelverzeichnis):
+    python benchmarks/bench_workers.py [worker,...] [sekunden] [parallel]
+"""
+
+import asyncio
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from stubs import _freier_port, openai_stub, serve  # noqa: E402
+
+WURZEL = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+API_DIR = os.path.join(WURZEL, "recommendation-api")
+GRACEFUL_S = 5.0
+
+
+def worker_pids(pid: int) -> list[int]:
+    """Worker-Prozesse des uvicorn-Supervisors (ohne resource_tracker); bei einem Worker der Prozess selbst."""
+    pids = []
+    for tid in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{tid}/children") as f:
+            pids += [int(p) for p in f.read().split()]
+    worker = []
+    for kind in pids:
+        with open(f"/proc/{kind}/cmdline", "rb") as f:
+            if b"spawn_main" in f.read():
+                worker.append(kind)
+    return worker or [pid]
+
+
+def speicher(pid: int) -> dict:
+    """RSS, PSS und privater Anteil in MB sowie gemappte Index-Dateien."""
+    werte = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for zeile in f:
+            teile = zeile.split()
+            if len(teile) == 3 and teile[2] == "kB":
+                werte[teile[0].rstrip(":")] = int(teile[1]) / 1024
+    with open(f"/proc/{pid}/maps") as f:
+        gemappt = sorted({z.split()[-1].rsplit("/", 1)[-1] for z in f if "/tips-" in z})
+    return {
+        "rss_mb": werte["Rss"],
+        "pss_mb": werte["Pss"],
+        "privat_mb": werte.get("Private_Clean", 0) + werte.get("Private_Dirty", 0),
+        "gemappt": gemappt,
+    }
+
+
+def warten_bis_bereit(prozess: subprocess.Popen, url: str, worker: int, timeout: float = 120) -> float:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if prozess.poll() is not None:
+            raise RuntimeError("Server wurde vorzeitig beendet")
+        try:
+            if httpx.get(f"{url}/ready", timeout=2).status_code == 200:
+                # jeder Worker muss bereit sein, nicht nur der erste
+                if len(worker_pids(prozess.pid)) == worker and all(
+                        httpx.get(f"{url}/ready", timeout=2).status_code == 200 for _ in range(4 * worker)):
+                    return time.perf_counter() - start
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise TimeoutError("Server nicht bereit")
+
+
+async def last(url: str, sekunden: float, parallel: int) -> dict:
+    latenzen, fehler = [], 0
+    ende = time.perf_counter() + sekunden
+
+    async def client(c: httpx.AsyncClient, nr: int):
+        nonlocal fehler
+        days = (7, 30, 90, 365)[nr % 4]
+        while time.perf_counter() < ende:
+            start = time.perf_counter()
+            try:
+                r = await c.post(f"{url}/tips", json={"days": days})
+                r.raise_for_status()
+                latenzen.append(time.perf_counter() - start)
+            except httpx.HTTPError:
+                fehler += 1
+
+    limits = httpx.Limits(max_connections=parallel, max_keepalive_connections=parallel)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as c:
+        # Antwort-Cache jedes Workers vorwärmen
+        await asyncio.gather(*(c.post(f"{url}/tips", json={"days": d}) for d in (7, 30, 90, 365) * 8))
+        start = time.perf_counter()
+        await asyncio.gather(*(client(c, i) for i in range(parallel)))
+        dauer = time.perf_counter() - start
+    latenzen.sort()
+    return {
+        "req_s": len(latenzen) / dauer,
+        "p50_ms": statistics.median(latenzen) * 1000,
+        "p99_ms": latenzen[int(0.99 * (len(latenzen) - 1))] * 1000,
+        "fehler": fehler,
+    }
+
+
+async def beenden_unter_last(prozess: subprocess.Popen, url: str, modell_app, anfragen: int = 32) -> dict:
+    """
+    Schickt SIGTERM, während Anfragen laufen (Modell-Stub antwortet erst nach 1 s);
+    alle angenommenen Anfragen müssen noch beantwortet werden.
+    """
+    modell_app.state.latency = 1.0
+    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=anfragen), timeout=30) as c:
+        await asyncio.gather(*(c.get(f"{url}/health") for _ in range(anfragen)))  # Verbindungen öffnen
+        laufend = [asyncio.ensure_future(c.post(f"{url}/tips", json={"days": 7 + i})) for i in range(anfragen)]
+        await asyncio.sleep(0.3)
+        start = time.perf_counter()
+        prozess.send_signal(signal.SIGTERM)
+        antworten = await asyncio.gather(*laufend, return_exceptions=True)
+    code = await asyncio.to_thread(prozess.wait, GRACEFUL_S + 10)
+    modell_app.state.latency = 0.0
+    return {
+        "exit_code": code,
+        "beenden_s": time.perf_counter() - start,
+        "beantwortet": sum(1 for a in antworten if isinstance(a, httpx.Response) and a.status_code == 200),
+        "anfragen": anfragen,
+    }
+
+
+def messen(worker: int, sekunden: float, parallel: int, modell_url: str, modell_app) -> dict:
+    port = _freier_port()
+    url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as index_dir:
+        env = dict(
+            os.environ, SERVER_MODE="production", SERVER_WORKERS=str(worker), SERVER_GRACEFUL_TIMEOUT=str(GRACEFUL_S),
+            API_HOST="127.0.0.1", API_PORT=str(port), EMBEDDINGS_DIR=index_dir, EMBEDDINGS_INDEX="numpy",
+            OPENAI_API_KEY="stub", OPENAI_BASE_URL=f"{modell_url}/v1", USAGE_PROVIDER="inprocess",
+            LLM_CACHE_BACKEND="memory", PROFILE_SAMPLE_RATE="0",
+        )
+        modell_app.state.calls["embeddings"] = 0
+        prozess = subprocess.Popen([sys.executable, "app.py"], cwd=API_DIR, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            ready_s = warten_bis_bereit(prozess, url, worker)
+            embedding_aufrufe = modell_app.state.calls["embeddings"]
+            ergebnis = asyncio.run(last(url, sekunden, parallel))
+            pids = worker_pids(prozess.pid)
+            mem = [speicher(pid) for pid in pids]
+            stopp = asyncio.run(beenden_unter_last(prozess, url, modell_app))
+        finally:
+            if prozess.poll() is None:
+                prozess.kill()
+                prozess.wait()
+
+    assert len(pids) == worker, pids
+    assert embedding_aufrufe == 1 + worker, embedding_aufrufe  # Katalog nur einmal eingebettet
+    assert all(any(name.endswith(".npy") for name in m["gemappt"]) for m in mem), mem  # Vektoren geteilt
+    assert ergebnis["fehler"] == 0, ergebnis
+    # uvicorn meldet ein sauberes Ende nach SIGTERM mit dem Signal als Exit-Status
+    assert stopp["exit_code"] in (0, -signal.SIGTERM) and stopp["beenden_s"] < GRACEFUL_S + 5, stopp
+    assert stopp["beantwortet"] == stopp["anfragen"], stopp
+    return {
+        "worker": worker,
+        "ready_s": ready_s,
+        "embedding_aufrufe": embedding_aufrufe,
+        "rss_mb": statistics.mean(m["rss_mb"] for m in mem),
+        "pss_mb": statistics.mean(m["pss_mb"] for m in mem),
+        "privat_mb": statistics.mean(m["privat_mb"] for m in mem),
+        **ergebnis,
+        "stopp": stopp,
+    }
+
+
+def main():
+    worker_liste = [int(w) for w in sys.argv[1].split(",")] if len(sys.argv) > 1 else [1, 2, 4]
+    sekunden = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    parallel = int(sys.argv[3]) if len(sys.argv) > 3 else 32
+    modell_app = openai_stub(latency=0.0)
+    with serve(modell_app) as modell_url:
+        ergebnisse = [messen(w, sekunden, parallel, modell_url, modell_app) for w in worker_liste]
+
+    print(f"POST /tips, {parallel} parallele Clients, {sekunden:.0f} s je Messung, {os.cpu_count()} CPU-Kern(e)")
+    print(f"{'worker':>6} {'ready_s':>8} {'rss_mb':>7} {'pss_mb':>7} {'privat_mb':>10} {'req_s':>8} "
+          f"{'p50_ms':>7} {'p99_ms':>7}  SIGTERM")
+    for e in ergebnisse:
+        s = e["stopp"]
+        print(f"{e['worker']:>6} {e['ready_s']:>8.2f} {e['rss_mb']:>7.1f} {e['pss_mb']:>7.1f} {e['privat_mb']:>10.1f} "
+              f"{e['req_s']:>8.0f} {e['p50_ms']:>7.2f} {e['p99_ms']:>7.2f}  "
+              f"{s['beantwortet']}/{s['anfragen']} beantwortet, {s['beenden_s']:.2f} s")
+    print(json.dumps(ergebnisse, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
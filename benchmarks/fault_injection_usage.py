@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Fault-Injection: /tips gegen eine langsame bzw. ausfallende Verbrauchs-API.
+
+Der Verbrauchs-Stub wird zur Laufzeit umgeschaltet; je Phase werden
+Antwortzeiten von /tips, Upstream-Aufrufe und der Zustand des
+Leistungsschalters festgehalten:
+
+- gesund:        normale Antworten, letzte gültige Durchschnitte werden gemerkt
+- langsam:       Stub antwortet erst nach 5 s – /tips bleibt nahe USAGE_DEADLINE,
+                 nach einigen Zeitüberschreitungen öffnet der Kreis
+- ausfall:       Stub antwortet mit 503 – der Kreis öffnet, weitere Anfragen
+                 erreichen den Stub nicht mehr und bekommen den letzten
+                 gültigen Durchschnitt
+- erholung:      nach der Abkühlzeit schließt ein erfolgreicher Probeaufruf den Kreis
+
+Das Modell ist ein lokaler Stub; der Antwort-Cache bleibt aktiv, damit die
+Messung die Verbrauchs-Stufe zeigt. Das Verhalten selbst (Frist, Öffnen,
+halboffene Probe, letzter gültiger Durchschnitt) prüft
+recommendation-api/tests/test_usage_resilience.py.
+
+Aufruf (aus dem Repository-Wurzelverzeichnis):
+    python benchmarks/fault_injection_usage.py [anfragen_je_phase]
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "recommendation-api"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import app as reco  # noqa: E402
+from resilience import CircuitBreaker  # noqa: E402
+from stubs import openai_stub, serve, usage_stub  # noqa: E402
+
+USAGE_DEADLINE = 0.3
+COOLDOWN = 1.0
+DAYS = (1, 7, 30)
+
+
+def perzentil(werte: list[float], p: float) -> float:
+    werte = sorted(werte)
+    return werte[min(len(werte) - 1, int(p * len(werte)))]
+
+
+async def phase(client: httpx.AsyncClient, usage, n: int) -> dict:
+    usage.state.calls = 0
+    dauern, antworten = [], []
+    for i in range(n):
+        start = time.perf_counter()
+        r = await client.post("/tips", json={"days": DAYS[i % len(DAYS)], "max_tips": 3})
+        dauern.append(time.perf_counter() - start)
+        r.raise_for_status()
+        antworten.append(r.json())
+    return {
+        "p50_s": statistics.median(dauern),
+        "p95_s": perzentil(dauern, 0.95),
+        "max_s": max(dauern),
+        "upstream": usage.state.calls,
+        # ohne Verbrauchsdaten kommen allgemeine Tipps mit "nachricht"
+        "mit_durchschnitt": sum("nachricht" not in a for a in antworten),
+        "zustand": reco.usage_breaker.state,
+    }
+
+
+async def ablauf(url: str, usage, n: int) -> dict:
+    ergebnisse = {}
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+        ergebnisse["gesund"] = await phase(client, usage, n)
+
+        usage.state.latency = 5.0
+        ergebnisse["langsam"] = await phase(client, usage, n)
+
+        usage.state.latency = 0.01
+        usage.state.fail_rate = 1.0
+        await asyncio.sleep(COOLDOWN)
+        ergebnisse["ausfall"] = await phase(client, usage, n)
+
+        usage.state.fail_rate = 0.0
+        await asyncio.sleep(COOLDOWN)
+        ergebnisse["erholung"] = await phase(client, usage, n)
+    return ergebnisse
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    usage = usage_stub(latency=0.01, avg=lambda days: round(0.4 + days / 100, 2))
+    with serve(usage) as usage_url, serve(openai_stub(latency=0.05)) as modell_url, \
+            tempfile.TemporaryDirectory() as verzeichnis:
+        reco.USAGE_API = usage_url
+        reco.OPENAI_API_KEY = "stub"
+        reco.OPENAI_BASE_URL = f"{modell_url}/v1"
+        reco.EMBEDDINGS_DIR = verzeichnis
+        reco.USAGE_DEADLINE = USAGE_DEADLINE
+        reco.usage_breaker = CircuitBreaker(failure_rate=0.5, window=10, min_calls=3, cooldown=COOLDOWN)
+        with serve(reco.app) as url:
+            ergebnisse = asyncio.run(ablauf(url, usage, n))
+
+    print(f"{n} /tips-Anfragen je Phase, USAGE_DEADLINE={USAGE_DEADLINE}s, Abkühlzeit {COOLDOWN}s")
+    print(f"{'phase':>9} {'p50_s':>7} {'p95_s':>7} {'max_s':>7} {'upstream':>9} {'mit_avg':>8}  schalter")
+    for name, e in ergebnisse.items():
+        print(f"{name:>9} {e['p50_s']:>7.3f} {e['p95_s']:>7.3f} {e['max_s']:>7.3f} {e['upstream']:>9} "
+              f"{e['mit_durchschnitt']:>8}  {e['zustand']}")
+    print(f"Schalter geöffnet: {reco.usage_breaker.opened}x, abgewiesen: {reco.usage_breaker.rejected}, "
+          f"Ersatzdurchschnitte: {reco.usage_fallbacks.value()}")
+
+
+if __name__ == "__main__":
+    main()
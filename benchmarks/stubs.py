@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Lokale Stand-ins für Benchmarks und Fault-Injection.
+
+- ``serve(app)``: startet eine ASGI-App mit uvicorn in einem Hintergrund-Thread
+- ``usage_stub(...)``: Nachbildung von usage-sim-api /stats mit konfigurierbarer
+  Latenz und Fehlerrate; zählt eingehende Aufrufe
+- ``openai_stub(...)``: deterministische Nachbildung der OpenAI-Endpunkte
+  /v1/chat/completions (auch gestreamt, ``"stream": true``) und /v1/embeddings
+  mit Latenz und Fehlerrate
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+
+def _freier_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def serve(app, port: int | None = None):
+    """Startet ``app`` lokal und liefert die Basis-URL; stoppt beim Verlassen."""
+    port = port or _freier_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+
+def usage_stub(latency: float = 0.02, fail_rate: float = 0.0, avg=0.52, seed: int = 0) -> FastAPI:
+    """
+    Stub der Verbrauchs-API.
+
+    Args:
+        latency: Antwortzeit pro /stats-Aufruf in Sekunden
+        fail_rate: Anteil der Aufrufe, die mit 503 beantwortet werden
+        avg: gelieferter Durchschnitt (Zahl oder Funktion days → Durchschnitt)
+        seed: Seed für die Fehlerauswahl (reproduzierbar)
+    """
+    app = FastAPI()
+    app.state.calls = 0
+    app.state.latency = latency
+    app.state.fail_rate = fail_rate
+    zufall = random.Random(seed)
+
+    @app.get("/stats")
+    async def stats(days: int = 7):
+        app.state.calls += 1
+        await asyncio.sleep(app.state.latency)
+        if zufall.random() < app.state.fail_rate:
+            raise HTTPException(503, "stub: simulierter Ausfall")
+        return {"days": days, "avg": avg(days) if callable(avg) else avg, "max": 1.0, "min": 0.1}
+
+    return app
+
+
+STUB_TIPPS = (
+    "1. Schalten Sie Geräte im Standby-Modus vollständig aus.\n"
+    "2. Nutzen Sie LED-Beleuchtung.\n"
+    "3. Waschen Sie bei 30°C."
+)
+
+
+def stub_embedding(text: str, dim: int = 64) -> list[float]:
+    """Deterministischer Pseudo-Embedding-Vektor eines Textes."""
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+    return np.random.default_rng(seed).standard_normal(dim).round(6).tolist()
+
+
+def _teile(text: str) -> list[str]:
+    """Zerlegt eine Antwort wortweise in Stream-Tokens (Leerraum vorn)."""
+    return re.findall(r"\s*\S+", text)
+
+
+def openai_stub(latency: float = 0.2, fail_rate: float = 0.0, text: str = STUB_TIPPS,
+                dim: int = 64, seed: int = 0, token_latency: float = 0.0) -> FastAPI:
+    """
+    Stub der OpenAI-API (als OPENAI_BASE_URL = "<url>/v1" verwenden).
+
+    Args:
+        latency: Antwortzeit pro Aufruf in Sekunden (gestreamt: bis zum ersten Token)
+        fail_rate: Anteil der Aufrufe, die mit 500 beantwortet werden
+        text: Inhalt jeder Chat-Antwort (gestreamt: wortweise zerlegt)
+        dim: Dimension der Embeddings
+        seed: Seed für die Fehlerauswahl (reproduzierbar)
+        token_latency: Abstand zwischen zwei Tokens in Sekunden (ohne Streaming
+            entsprechend später beantwortet)
+    """
+    app = FastAPI()
+    app.state.calls = {"chat": 0, "embeddings": 0}
+    app.state.latency = latency
+    app.state.token_latency = token_latency
+    app.state.fail_rate = fail_rate
+    app.state.text = text
+    zufall = random.Random(seed)
+
+    async def verzoegern():
+        await asyncio.sleep(app.state.latency)
+        if zufall.random() < app.state.fail_rate:
+            raise HTTPException(500, "stub: simulierter Modellfehler")
+
+    async def tokens(body: dict, nummer: int):
+        def chunk(delta: dict, finish_reason=None) -> str:
+            daten = {
+                "id": f"chatcmpl-stub-{nummer}",
+                "object": "chat.completion.chunk",
+                "created": 0,
+                "model": body.get("model", "stub"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(daten, ensure_ascii=False)}\n\n"
+
+        yield chunk({"role": "assistant", "content": ""})
+        for i, teil in enumerate(_teile(app.state.text)):
+            if i and app.state.token_latency:
+                await asyncio.sleep(app.state.token_latency)
+            yield chunk({"content": teil})
+        yield chunk({}, "stop")
+        yield "data: [DONE]\n\n"
+
+    @app.post("/v1/chat/completions")
+    async def chat(request: Request):
+        body = await request.json()
+        app.state.calls["chat"] += 1
+        await verzoegern()
+        if body.get("stream"):
+            return StreamingResponse(tokens(body, app.state.calls["chat"]), media_type="text/event-stream")
+        # Ohne Streaming kommt die Antwort erst nach dem letzten Token
+        await asyncio.sleep(app.state.token_latency * (len(_teile(app.state.text)) - 1))
+        return {
+            "id": f"chatcmpl-stub-{app.state.calls['chat']}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": app.state.text},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        app.state.calls["embeddings"] += 1
+        await verzoegern()
+        eingaben = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        return {
+            "object": "list",
+            "data": [
+                {"object": "embedding", "index": i, "embedding": stub_embedding(t, dim)}
+                for i, t in enumerate(eingaben)
+            ],
+            "model": body.get("model", "stub"),
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        }
+
+    return app
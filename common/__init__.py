@@ -0,0 +1 @@
+"""Gemeinsame Module beider Dienste (im Container unter /app/common)."""
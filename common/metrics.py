@@ -0,0 +1,378 @@
+"""
+Leichtgewichtige Metriken im Prometheus-Textformat (ohne Zusatzpaket)
+
+- ``Registry``: Zähler, Histogramme und Callback-Metriken (z.B. Cache-Kennzahlen),
+  ``render()`` liefert den Inhalt für /metrics
+- ``MetricsMiddleware``: ASGI-Middleware, misst Dauer und Status je Route und
+  übergibt Stichproben von Anfragen optional dem Profiler
+- ``RequestProfiler``: Stack-Sampling aller Threads während einer Anfrage
+  (erfasst auch synchrone Endpunkte im Threadpool); das Ergebnis geht an einen
+  Hook, standardmäßig eine .folded-Datei (Flamegraph-/speedscope-Format)
+
+Jede Beobachtung kostet ein Lock und eine binäre Suche über die Bucket-Grenzen.
+Gemeinsam genutzt von beiden Diensten (``common/``, in beide Images kopiert).
+"""
+import asyncio
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as _Zaehler
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Iterable
+
+# Sekunden; deckt Cache-Treffer (ms) bis Modellaufrufe (10 s+) ab
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+logger = logging.getLogger(__name__)
+
+
+def _escape(wert: str) -> str:
+    return wert.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(namen: tuple[str, ...], werte: tuple[str, ...], extra: str = "") -> str:
+    teile = [f'{n}="{_escape(str(w))}"' for n, w in zip(namen, werte)]
+    if extra:
+        teile.append(extra)
+    return "{" + ",".join(teile) + "}" if teile else ""
+
+
+def _zahl(wert: float) -> str:
+    if wert == float("inf"):
+        return "+Inf"
+    return repr(float(wert)) if isinstance(wert, float) else str(wert)
+
+
+class _Metrik:
+    typ = "untyped"
+
+    def __init__(self, name: str, beschreibung: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.beschreibung = beschreibung
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _schluessel(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def kopf(self) -> list[str]:
+        return [f"# HELP {self.name} {self.beschreibung}", f"# TYPE {self.name} {self.typ}"]
+
+
+class Counter(_Metrik):
+    """
+    Monoton steigender Zähler
+    """
+    typ = "counter"
+
+    def __init__(self, name, beschreibung, labelnames=()):
+        super().__init__(name, beschreibung, labelnames)
+        self._werte: dict[tuple[str, ...], float] = {}
+
+    def inc(self, n: float = 1, **labels):
+        schluessel = self._schluessel(labels)
+        with self._lock:
+            self._werte[schluessel] = self._werte.get(schluessel, 0) + n
+
+    def value(self, **labels) -> float:
+        return self._werte.get(self._schluessel(labels), 0)
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            werte = list(self._werte.items())
+        return self.kopf() + [f"{self.name}{_labels(self.labelnames, k)} {_zahl(v)}" for k, v in werte]
+
+
+class Histogram(_Metrik):
+    """
+    Histogramm mit festen Bucket-Grenzen (Sekunden)
+    """
+    typ = "histogram"
+
+    def __init__(self, name, beschreibung, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, beschreibung, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # je Label-Kombination: [Zähler je Bucket (+Inf zuletzt), Summe, Anzahl]
+        self._werte: dict[tuple[str, ...], list] = {}
+
+    def observe(self, wert: float, **labels):
+        schluessel = self._schluessel(labels)
+        i = bisect_left(self.buckets, wert)
+        with self._lock:
+            eintrag = self._werte.get(schluessel)
+            if eintrag is None:
+                eintrag = self._werte[schluessel] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            eintrag[0][i] += 1
+            eintrag[1] += wert
+            eintrag[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Misst die Dauer des with-Blocks (auch bei Ausnahmen)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def timed(self, **labels):
+        """
+        Decorator für synchrone Funktionen
+        """
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.time(**labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, **labels) -> int:
+        eintrag = self._werte.get(self._schluessel(labels))
+        return eintrag[2] if eintrag else 0
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            werte = [(k, list(v[0]), v[1], v[2]) for k, v in self._werte.items()]
+        zeilen = self.kopf()
+        for schluessel, zaehler, summe, anzahl in werte:
+            kumuliert = 0
+            for grenze, n in zip(self.buckets + (float("inf"),), zaehler):
+                kumuliert += n
+                le = f'le="{_zahl(grenze)}"'
+                zeilen.append(f"{self.name}_bucket{_labels(self.labelnames, schluessel, le)} {kumuliert}")
+            zeilen.append(f"{self.name}_sum{_labels(self.labelnames, schluessel)} {_zahl(summe)}")
+            zeilen.append(f"{self.name}_count{_labels(self.labelnames, schluessel)} {anzahl}")
+        return zeilen
+
+
+class CallbackMetric(_Metrik):
+    """
+    Wird erst beim Abruf von /metrics ausgelesen
+
+    fn liefert eine Zahl (ohne Labels) oder ein Dict Label-Tupel → Zahl;
+    None-Werte werden ausgelassen. Scheitert das Auslesen an einem noch nicht
+    (oder nicht mehr) vorhandenen Objekt, fehlt die Metrik in dieser Ausgabe;
+    der Fehler wird protokolliert und in ``errors`` gezählt.
+    """
+
+    def __init__(self, name, beschreibung, fn: Callable, labelnames=(), typ: str = "gauge"):
+        super().__init__(name, beschreibung, labelnames)
+        self.fn = fn
+        self.typ = typ
+        self.errors = 0
+
+    def collect(self) -> list[str]:
+        try:
+            werte = self.fn()
+        except (AttributeError, LookupError, TypeError, ValueError, OSError):
+            self.errors += 1
+            logger.exception("Metrik %s konnte nicht ausgelesen werden", self.name)
+            return []
+        if not isinstance(werte, dict):
+            werte = {(): werte}
+        zeilen = self.kopf()
+        for schluessel, wert in werte.items():
+            if wert is None:
+                continue
+            if not isinstance(schluessel, tuple):
+                schluessel = (schluessel,)
+            zeilen.append(f"{self.name}{_labels(self.labelnames, schluessel)} {_zahl(float(wert))}")
+        return zeilen
+
+
+class Registry:
+    """
+    Sammlung aller Metriken eines Dienstes
+    """
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self._metriken: list[_Metrik] = []
+
+    def _add(self, metrik):
+        self._metriken.append(metrik)
+        return metrik
+
+    def counter(self, name: str, beschreibung: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._add(Counter(self.prefix + name, beschreibung, labelnames))
+
+    def histogram(self, name: str, beschreibung: str, labelnames: Iterable[str] = (),
+                  buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(self.prefix + name, beschreibung, labelnames, buckets))
+
+    def callback(self, name: str, beschreibung: str, fn: Callable, labelnames: Iterable[str] = (),
+                 typ: str = "gauge") -> CallbackMetric:
+        return self._add(CallbackMetric(self.prefix + name, beschreibung, fn, labelnames, typ))
+
+    def render(self) -> str:
+        zeilen = []
+        for metrik in self._metriken:
+            zeilen.extend(metrik.collect())
+        return "\n".join(zeilen) + "\n"
+
+
+def cache_callbacks(registry: Registry, caches: dict[str, Callable[[], dict]]):
+    """
+    Registriert Treffer/Fehlschläge/Größe für Caches mit info()-Dict
+    (Schlüssel hits, misses und optional size, evictions, bytes, errors)
+    """
+    def feld(name: str):
+        def lesen():
+            ergebnis = {}
+            for cache, info in caches.items():
+                wert = info().get(name)
+                if isinstance(wert, (int, float)) and not isinstance(wert, bool):
+                    ergebnis[(cache,)] = wert
+            return ergebnis
+        return lesen
+
+    for name, typ, beschreibung in (
+        ("hits", "counter", "Cache-Treffer"),
+        ("misses", "counter", "Cache-Fehlschläge"),
+        ("evictions", "counter", "Verdrängte Cache-Einträge"),
+        ("errors", "counter", "Fehler des Cache-Backends"),
+        ("size", "gauge", "Anzahl Cache-Einträge"),
+        ("bytes", "gauge", "Belegter Speicher des Caches in Bytes"),
+    ):
+        registry.callback(f"cache_{name}" + ("_total" if typ == "counter" else ""), beschreibung,
+                          feld(name), ("cache",), typ)
+
+
+class RequestProfiler:
+    """
+    Stack-Sampling für einen zufälligen Anteil der Anfragen
+
+    Während einer ausgewählten Anfrage liest ein Hintergrund-Thread alle
+    intervall Sekunden die Stacks aller Threads; gleichzeitig läuft höchstens
+    eine Stichprobe. Das Ergebnis (Stack → Anzahl) geht an
+    hook(route, dauer, stacks).
+
+    Args:
+        rate: Anteil der Anfragen (0 = aus, 1 = jede)
+        directory: Zielverzeichnis des Standard-Hooks
+        intervall: Abtastintervall in Sekunden
+        hook: eigener Hook statt .folded-Dateien
+
+    Attribute:
+        samples: geschriebene Stichproben
+        errors: Stichproben, deren Hook mit OSError gescheitert ist (z.B. Verzeichnis nicht beschreibbar)
+    """
+
+    def __init__(self, rate: float, directory: str = "profiles", intervall: float = 0.005,
+                 hook: Callable[[str, float, _Zaehler], None] | None = None):
+        self.rate = rate
+        self.directory = directory
+        self.intervall = intervall
+        self.hook = hook or self.write_folded
+        self._lock = threading.Lock()
+        self._aktiv = False
+        self.samples = 0
+        self.errors = 0
+
+    def start(self) -> "_Abtaster | None":
+        if self.rate <= 0 or random.random() >= self.rate:
+            return None
+        with self._lock:
+            if self._aktiv:
+                return None
+            self._aktiv = True
+        abtaster = _Abtaster(self.intervall)
+        abtaster.start()
+        return abtaster
+
+    def stop(self, abtaster: "_Abtaster", route: str, dauer: float):
+        stacks = abtaster.beenden()
+        with self._lock:
+            self._aktiv = False
+        try:
+            self.hook(route, dauer, stacks)
+        except OSError:
+            self.errors += 1
+            logger.exception("Profiling-Stichprobe für %s konnte nicht geschrieben werden", route)
+            return
+        self.samples += 1
+
+    def write_folded(self, route: str, dauer: float, stacks: _Zaehler):
+        """
+        Standard-Hook: eine Zeile "frame;frame;... anzahl" pro Stack
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(dauer * 1000)}ms-{route.strip('/').replace('/', '_') or 'root'}.folded"
+        with open(os.path.join(self.directory, name), "w", encoding="utf-8") as f:
+            for stack, anzahl in stacks.most_common():
+                f.write(f"{stack} {anzahl}\n")
+
+
+class _Abtaster(threading.Thread):
+    def __init__(self, intervall: float):
+        super().__init__(daemon=True)
+        self.intervall = intervall
+        self.stacks: _Zaehler = _Zaehler()
+        self._ende = threading.Event()
+
+    def run(self):
+        while not self._ende.wait(self.intervall):
+            for tid, frame in sys._current_frames().items():
+                if tid == self.ident:
+                    continue
+                teile = []
+                while frame is not None:
+                    code = frame.f_code
+                    teile.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(teile))] += 1
+
+    def beenden(self) -> _Zaehler:
+        self._ende.set()
+        self.join()
+        return self.stacks
+
+
+class MetricsMiddleware:
+    """
+    ASGI-Middleware: Anfragedauer je Route, Methode und Status
+
+    Gemessen wird bis zum letzten Body-Chunk (bei Streaming also die
+    gesamte Übertragung). Nicht zugeordnete Pfade laufen unter "unbekannt",
+    damit die Zahl der Label-Kombinationen begrenzt bleibt.
+    """
+
+    def __init__(self, app, registry: Registry, profiler: RequestProfiler | None = None):
+        self.app = app
+        self.profiler = profiler
+        self.dauer = registry.histogram(
+            "http_request_duration_seconds", "Dauer der HTTP-Anfragen", ("route", "methode", "status")
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = [500]
+
+        async def senden(nachricht):
+            if nachricht["type"] == "http.response.start":
+                status[0] = nachricht["status"]
+            await send(nachricht)
+
+        abtaster = self.profiler.start() if self.profiler is not None else None
+        try:
+            await self.app(scope, receive, senden)
+        finally:
+            dauer = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", "unbekannt")
+            self.dauer.observe(dauer, route=route, methode=scope["method"], status=status[0])
+            if abtaster is not None:
+                # join des Abtasters und Schreiben der Datei blockieren: nicht im Event-Loop
+                await asyncio.to_thread(self.profiler.stop, abtaster, route, dauer)
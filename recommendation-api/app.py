@@ -1,16 +1,40 @@
 import os
-from typing import List, Optional
-from fastapi import FastAPI
+import sys
+import json
+import time
+import asyncio
+import importlib
+import importlib.util
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, List, Optional
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-import httpx
 from dotenv import load_dotenv
-import numpy as np
-try:
-    import faiss
-    EMBEDDINGS_AVAILABLE = True
-except ImportError:
-    EMBEDDINGS_AVAILABLE = False
-    faiss = None
+from singleflight import SingleFlight
+from embeddings_store import catalog_key, load_index, lock_build, save_index, unlock_build
+from ttl_cache import TTLCache
+from llm_cache import ResponseCache, cache_key, make_backend, quantize
+from safety_filter import SafetyFilter, StreamGuard, UNSICHER_MELDUNG, load_terms
+# common/ liegt im Repository neben den Diensten, im Container unter /app/common
+_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if os.path.isdir(os.path.join(_REPO, "common")) and _REPO not in sys.path:
+    sys.path.append(_REPO)
+from common.metrics import CONTENT_TYPE, MetricsMiddleware, Registry, RequestProfiler, cache_callbacks
+from resilience import CircuitBreaker, Deadline
+from usage_provider import UsageUnavailable, make_provider
+from vector_index import FAISS_BACKENDS, IndexParams, build_index, configure, index_tag, normalize, resolve_backend
+
+if TYPE_CHECKING:
+    import httpx
+
+# Schwere Module (numpy, faiss, httpx, openai) werden erst beim Aufwärmen im
+# Lifespan bzw. beim ersten Bedarf importiert, nicht beim Modulimport.
+# Ohne faiss sucht das exakte NumPy-Backend (siehe vector_index).
+FAISS_AVAILABLE = importlib.util.find_spec("faiss") is not None
+EMBEDDINGS_AVAILABLE = importlib.util.find_spec("numpy") is not None
+np = None
+faiss = None
 
 # Lade Umgebungsvariablen aus .env Datei
 load_dotenv()
@@ -19,16 +43,106 @@ load_dotenv()
 USAGE_API = os.getenv("USAGE_API", "http://usage-sim-api:8000")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")  
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+OPENAI_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+# Cache für Query-Embeddings und Retrieval-Ergebnisse (Größe, TTL in s)
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "256"))
+RETRIEVAL_CACHE_TTL = float(os.getenv("RETRIEVAL_CACHE_TTL", "3600"))
+# Antwort-Cache für AI-Tipps: Backend (memory/disk/redis/off), Ziel (SQLite-Pfad
+# oder Redis-URL), Größe, TTL in s und Quantisierungsschritt für avg in kWh
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory").lower()
+LLM_CACHE_URL = os.getenv("LLM_CACHE_URL", "")
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "1024"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_AVG_STEP = float(os.getenv("LLM_CACHE_AVG_STEP", "0.01"))
+# Verzeichnis für den persistenten Embeddings-Index (Vektoren + FAISS, memory-mapped)
+EMBEDDINGS_DIR = os.getenv("EMBEDDINGS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "embeddings_cache"))
+# Index-Backend für das Retrieval (auto/numpy/flat/ivf/hnsw) und seine Bau-/Suchparameter
+EMBEDDINGS_INDEX = os.getenv("EMBEDDINGS_INDEX", "auto").lower()
+EMBEDDINGS_INDEX_PARAMS = IndexParams(
+    ivf_nlist=int(os.getenv("EMBEDDINGS_IVF_NLIST", "256")),
+    ivf_nprobe=int(os.getenv("EMBEDDINGS_IVF_NPROBE", "8")),
+    hnsw_m=int(os.getenv("EMBEDDINGS_HNSW_M", "32")),
+    hnsw_ef_construction=int(os.getenv("EMBEDDINGS_HNSW_EF_CONSTRUCTION", "200")),
+    hnsw_ef_search=int(os.getenv("EMBEDDINGS_HNSW_EF_SEARCH", "64")),
+    numpy_block=int(os.getenv("EMBEDDINGS_NUMPY_BLOCK", "65536")),
+)
 AI_SAFE_MODE = os.getenv("AI_SAFE_MODE", "true").lower() == "true"
 DEFAULT_LANGUAGE = os.getenv("DEFAULT_LANGUAGE", "de")
 API_HOST = os.getenv("API_HOST", "0.0.0.0")
 API_PORT = int(os.getenv("API_PORT", "8000"))
 
+# Serverstart über ``python app.py``: "development" = ein Prozess mit Auto-Reload,
+# "production" = SERVER_WORKERS Prozesse ohne Reload. Event-Loop und HTTP-Parser
+# ("auto" = uvloop bzw. httptools, falls installiert) und Frist (s), die laufende
+# Anfragen beim Beenden (SIGTERM/SIGINT) noch bekommen
+SERVER_MODE = os.getenv("SERVER_MODE", "development").lower()
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", os.getenv("WEB_CONCURRENCY", "1")))
+SERVER_LOOP = os.getenv("SERVER_LOOP", "auto")
+SERVER_HTTP = os.getenv("SERVER_HTTP", "auto")
+SERVER_GRACEFUL_TIMEOUT = float(os.getenv("SERVER_GRACEFUL_TIMEOUT", "20"))
+SERVER_ACCESS_LOG = os.getenv("SERVER_ACCESS_LOG", "false").lower() == "true"
+
+# HTTP-Verbindungspool zur Verbrauchs-API (ein Client für die gesamte App-Laufzeit)
+USAGE_HTTP_TIMEOUT = float(os.getenv("USAGE_HTTP_TIMEOUT", "10"))
+USAGE_HTTP_MAX_CONNECTIONS = int(os.getenv("USAGE_HTTP_MAX_CONNECTIONS", "100"))
+USAGE_HTTP_MAX_KEEPALIVE = int(os.getenv("USAGE_HTTP_MAX_KEEPALIVE", "20"))
+USAGE_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("USAGE_HTTP_KEEPALIVE_EXPIRY", "30"))
+
+# Quelle der Verbrauchsdaten: "http" (usage-sim-api unter USAGE_API) oder
+# "inprocess" (Statistik-Kern der usage-sim-api aus USAGE_SIM_PATH im selben Prozess,
+# mit eigenem Rollup-Cache von USAGE_SIM_CACHE_MB)
+USAGE_PROVIDER = os.getenv("USAGE_PROVIDER", "http").lower()
+USAGE_SIM_PATH = os.getenv("USAGE_SIM_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "usage-sim-api"))
+USAGE_SIM_CACHE_MB = float(os.getenv("USAGE_SIM_CACHE_MB", "64"))
+
+# LLM-Aufrufe: max. gleichzeitige Modellaufrufe, Deadline pro /tips-Anfrage (s)
+# und optionales Hedging (zweiter Aufruf nach LLM_HEDGE_DELAY s, 0 = aus)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "15"))
+LLM_HEDGE_DELAY = float(os.getenv("LLM_HEDGE_DELAY", "0"))
+
+# Zeitbudget pro /tips-Anfrage (s), geteilt von Verbrauchsdaten und LLM-Stufe;
+# die Verbrauchs-API bekommt davon höchstens USAGE_DEADLINE Sekunden
+TIPS_DEADLINE = float(os.getenv("TIPS_DEADLINE", "15"))
+USAGE_DEADLINE = float(os.getenv("USAGE_DEADLINE", "2"))
+
+# Leistungsschalter vor der Verbrauchs-API: Fehlerquote, Fenstergröße,
+# Mindestaufrufe und Abkühlzeit (s) bis zur Probe im halboffenen Zustand
+USAGE_BREAKER_FAILURE_RATE = float(os.getenv("USAGE_BREAKER_FAILURE_RATE", "0.5"))
+USAGE_BREAKER_WINDOW = int(os.getenv("USAGE_BREAKER_WINDOW", "20"))
+USAGE_BREAKER_MIN_CALLS = int(os.getenv("USAGE_BREAKER_MIN_CALLS", "5"))
+USAGE_BREAKER_COOLDOWN = float(os.getenv("USAGE_BREAKER_COOLDOWN", "10"))
+# Letzter gültiger Durchschnitt je days als Ersatz bei Ausfall (max. Alter in s, 0 = aus)
+USAGE_LAST_GOOD_TTL = float(os.getenv("USAGE_LAST_GOOD_TTL", "600"))
+
+# Größtes Analysefenster (days) für /tips, /tips/stream und /tips/batch
+TIPS_MAX_DAYS = int(os.getenv("TIPS_MAX_DAYS", "3660"))
+
+# /tips/batch: max. Einträge pro Anfrage und gleichzeitige /stats-Abfragen
+TIPS_BATCH_MAX_ITEMS = int(os.getenv("TIPS_BATCH_MAX_ITEMS", "10000"))
+TIPS_BATCH_STATS_CONCURRENCY = int(os.getenv("TIPS_BATCH_STATS_CONCURRENCY", "16"))
+
 # Verbrauchs-Schwellen (kWh pro Stunde) - konfigurierbar über ENV
 # Beispiel-Werte basieren auf der internen Simulations-API (avg ≈ 0.52 kWh/h)
 LOW_THRESHOLD = float(os.getenv("LOW_THRESHOLD", "0.4"))
 HIGH_THRESHOLD = float(os.getenv("HIGH_THRESHOLD", "0.8"))
 
+# Begriffslisten des Sicherheitsfilters (JSON-Datei; leer = eingebaute Listen)
+SAFETY_TERMS_FILE = os.getenv("SAFETY_TERMS_FILE", "")
+
+# Start: max. Wartezeit (s) auf das Aufwärmen, bevor Anfragen angenommen werden
+# (der Rest läuft im Hintergrund weiter, siehe /ready), und Abstand (s) zwischen
+# erneuten Versuchen, den Embeddings-Index aufzubauen
+STARTUP_WAIT = float(os.getenv("STARTUP_WAIT", "30"))
+EMBEDDINGS_RETRY_INTERVAL = float(os.getenv("EMBEDDINGS_RETRY_INTERVAL", "60"))
+
+# Profiling-Stichproben: Anteil der Anfragen (0 = aus), Zielverzeichnis, Abtastintervall (s)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+
 # Embeddings-Datenbank für verbesserte AI-Antworten
 ENERGY_TIPS_DATABASE = [
     {
@@ -66,12 +180,321 @@ ENERGY_TIPS_DATABASE = [
 # Embeddings-Index (wird bei Bedarf initialisiert)
 embeddings_index = None
 embeddings_texts = None
+embeddings_version = None  # Katalog-Schlüssel des geladenen Index
+embeddings_backend = None  # tatsächlich verwendetes Index-Backend
+
+# Kontext-Queries je Verbrauchsklasse (werden beim Start vorberechnet)
+CONTEXT_QUERIES = {
+    "high": "hoher energieverbrauch reduzieren sparen effizienz",
+    "low": "niedriger verbrauch optimieren effizienz standby",
+    "normal": "normaler energieverbrauch optimieren haushalt"
+}
+CONTEXT_TOP_K = 2
+
+# Query-Embeddings (Schlüssel: Modell, Query) und Top-k-Ergebnisse
+# (Schlüssel: Query, top_k, Index-Version); letztere werden beim Neuaufbau geleert
+query_embedding_cache = TTLCache(RETRIEVAL_CACHE_SIZE, RETRIEVAL_CACHE_TTL)
+retrieval_cache = TTLCache(RETRIEVAL_CACHE_SIZE, RETRIEVAL_CACHE_TTL)
+
+# Cache für gefilterte AI-Antworten (nur sichere Antworten werden gespeichert)
+llm_response_cache = ResponseCache(make_backend(LLM_CACHE_BACKEND, LLM_CACHE_SIZE, LLM_CACHE_TTL, LLM_CACHE_URL))
+
+# Gemeinsamer HTTP-Client und Koaleszierung gleichzeitiger /stats-Abfragen
+http_client: "httpx.AsyncClient | None" = None
+usage_provider = None
+stats_flight = SingleFlight()
+
+# Leistungsschalter und letzte gültige Durchschnitte der Verbrauchs-API
+usage_breaker = CircuitBreaker(
+    failure_rate=USAGE_BREAKER_FAILURE_RATE,
+    window=USAGE_BREAKER_WINDOW,
+    min_calls=USAGE_BREAKER_MIN_CALLS,
+    cooldown=USAGE_BREAKER_COOLDOWN
+)
+last_good_avg = TTLCache(1024, USAGE_LAST_GOOD_TTL)
+
+# Gemeinsamer asynchroner OpenAI-Client und Begrenzung gleichzeitiger Modellaufrufe
+openai_client = None
+llm_semaphore = asyncio.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+
+# Metriken (/metrics): Dauer je Stufe, gewählte Antwortquelle, unterdrückte Fehler
+metrics = Registry("reco_")
+stage_seconds = metrics.histogram("stage_duration_seconds", "Dauer je Verarbeitungsstufe", ("stufe",))
+tips_source = metrics.counter("tips_total", "Beantwortete Tipp-Anfragen je Quelle", ("endpunkt", "quelle"))
+errors = metrics.counter("errors_total", "Abgefangene Fehler je Stufe und Typ", ("stufe", "typ"))
+usage_fallbacks = metrics.counter("usage_last_good_total", "Mit letztem gültigem Durchschnitt beantwortete Ausfälle")
+llm_in_flight = 0
+profiler = RequestProfiler(PROFILE_SAMPLE_RATE, PROFILE_DIR, PROFILE_INTERVAL)
+
+def record_error(stufe: str, e: BaseException | str):
+    """
+    Zählt einen abgefangenen Fehler (die Verarbeitung fällt weiter still zurück)
+    """
+    errors.inc(stufe=stufe, typ=e if isinstance(e, str) else type(e).__name__)
+
+# Aufwärmstatus je Subsystem (ausstehend → lädt → bereit / eingeschränkt / deaktiviert)
+subsystems = {name: {"status": "ausstehend"} for name in ("verbrauchsdaten", "modell_client", "embeddings_index")}
+background_tasks: set = set()
+
+def load_numerics():
+    """
+    Importiert numpy und (falls installiert und benötigt) faiss beim ersten Bedarf
+    """
+    global np, faiss
+    if np is None:
+        import numpy
+        np = numpy
+    if faiss is None and FAISS_AVAILABLE and EMBEDDINGS_INDEX != "numpy":
+        import faiss as faiss_modul
+        faiss = faiss_modul
+
+def get_http_client() -> "httpx.AsyncClient":
+    """
+    Liefert den gemeinsamen, gepoolten HTTP-Client (wird bei Bedarf erzeugt)
+    """
+    global http_client
+    if http_client is None or http_client.is_closed:
+        import httpx
+        http_client = httpx.AsyncClient(
+            timeout=USAGE_HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=USAGE_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=USAGE_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=USAGE_HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+    return http_client
+
+def get_usage_provider():
+    """
+    Liefert die konfigurierte Quelle der Verbrauchsdaten (wird bei Bedarf erzeugt)
+    """
+    global usage_provider
+    if usage_provider is None:
+        usage_provider = make_provider(
+            USAGE_PROVIDER, USAGE_API, get_http_client, USAGE_SIM_PATH, int(USAGE_SIM_CACHE_MB * 1024 * 1024)
+        )
+    return usage_provider
+
+def get_openai_client():
+    """
+    Liefert den gemeinsamen asynchronen OpenAI-Client (wird bei Bedarf erzeugt)
+    """
+    global openai_client
+    if openai_client is None:
+        from openai import AsyncOpenAI
+        openai_client = AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            base_url=OPENAI_BASE_URL,
+            max_retries=OPENAI_MAX_RETRIES
+        )
+    return openai_client
+
+@asynccontextmanager
+async def llm_slot():
+    """
+    Platz im llm_semaphore; misst die Wartezeit und zählt laufende Modellaufrufe
+    """
+    global llm_in_flight
+    with stage_seconds.time(stufe="llm_warteschlange"):
+        await llm_semaphore.acquire()
+    llm_in_flight += 1
+    try:
+        yield
+    finally:
+        llm_in_flight -= 1
+        llm_semaphore.release()
+
+async def _hedged(make_call):
+    """
+    Führt make_call aus; ist nach LLM_HEDGE_DELAY Sekunden noch keine Antwort da,
+    wird ein zweiter Versuch gestartet und die erste erfolgreiche Antwort verwendet
+    """
+    if LLM_HEDGE_DELAY <= 0:
+        return await make_call()
+    erster = asyncio.ensure_future(make_call())
+    done, _ = await asyncio.wait({erster}, timeout=LLM_HEDGE_DELAY)
+    if done:
+        return erster.result()
+    laufend = {erster, asyncio.ensure_future(make_call())}
+    try:
+        while laufend:
+            done, laufend = await asyncio.wait(laufend, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+        return erster.result()  # beide fehlgeschlagen → Fehler des ersten Versuchs
+    finally:
+        for task in laufend:
+            task.cancel()
+
+async def chat_completion(messages: List[dict]) -> str | None:
+    """
+    Chat-Completion über den gemeinsamen Client, begrenzt durch llm_semaphore
+    """
+    async def aufruf():
+        async with llm_slot():
+            with stage_seconds.time(stufe="chat_completion"):
+                resp = await get_openai_client().chat.completions.create(
+                    model=OPENAI_MODEL,
+                    messages=messages,
+                    temperature=0.2 if AI_SAFE_MODE else 0.5,
+                    max_tokens=300
+                )
+        return resp.choices[0].message.content
+    return await _hedged(aufruf)
+
+async def stream_chat_completion(messages: List[dict]) -> AsyncIterator[str]:
+    """
+    Gestreamte Chat-Completion; liefert die Textteile, sobald sie eintreffen
+    
+    Der Semaphore-Platz bleibt bis zum Ende (oder Abbruch) des Streams belegt.
+    """
+    async with llm_slot():
+        start = time.perf_counter()
+        stream = await get_openai_client().chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=messages,
+            temperature=0.2 if AI_SAFE_MODE else 0.5,
+            max_tokens=300,
+            stream=True
+        )
+        erstes = True
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if erstes:
+                        stage_seconds.observe(time.perf_counter() - start, stufe="chat_erstes_token")
+                        erstes = False
+                    yield chunk.choices[0].delta.content
+        finally:
+            stage_seconds.observe(time.perf_counter() - start, stufe="chat_stream")
+            await stream.close()
+
+async def create_embeddings(texts: List[str]) -> List[List[float]]:
+    """
+    Embeddings über den gemeinsamen Client, begrenzt durch llm_semaphore
+    """
+    async with llm_slot():
+        with stage_seconds.time(stufe="embeddings"):
+            response = await get_openai_client().embeddings.create(
+                input=texts,
+                model=OPENAI_EMBEDDING_MODEL
+            )
+    return [d.embedding for d in response.data]
+
+async def _warm(name: str, aufwaermen):
+    """
+    Führt das Aufwärmen eines Subsystems aus und hält Status und Dauer fest
+    """
+    subsystems[name] = {"status": "lädt"}
+    start = time.perf_counter()
+    try:
+        status = await aufwaermen()
+    except Exception as e:
+        status = "eingeschränkt"
+        subsystems[name]["fehler"] = type(e).__name__
+        record_error(name, e)
+    subsystems[name].update(status=status, sekunden=round(time.perf_counter() - start, 3))
+
+async def warm_usage_provider() -> str:
+    """
+    Erzeugt die Quelle der Verbrauchsdaten: bei "http" den Verbindungspool samt
+    erster Verbindung zur Verbrauchs-API, bei "inprocess" den Rollup-Cache
+    """
+    if USAGE_PROVIDER == "http":
+        await asyncio.to_thread(importlib.import_module, "httpx")
+    quelle = await asyncio.to_thread(get_usage_provider)
+    try:
+        await quelle.warm(min(USAGE_HTTP_TIMEOUT, 2.0))
+    except Exception as e:
+        record_error("verbrauchsdaten", e)
+        return "eingeschränkt"  # Quelle steht, Verbrauchs-API (noch) nicht erreichbar
+    return "bereit"
+
+async def warm_model_client() -> str:
+    """
+    Importiert das OpenAI-SDK (in einem Thread) und erzeugt den gemeinsamen Client
+    """
+    if not OPENAI_API_KEY:
+        return "deaktiviert"
+    await asyncio.to_thread(importlib.import_module, "openai")
+    get_openai_client()
+    return "bereit"
+
+async def warm_embeddings() -> str:
+    """
+    Lädt bzw. baut den Embeddings-Index und wärmt den Retrieval-Cache vor
+    
+    Schlägt der Aufbau fehl, wird er im Hintergrund alle
+    EMBEDDINGS_RETRY_INTERVAL Sekunden erneut versucht.
+    """
+    if not EMBEDDINGS_AVAILABLE:
+        return "deaktiviert"
+    await asyncio.to_thread(load_numerics)
+    if await initialize_embeddings():
+        await warm_retrieval_cache()
+        return "bereit"
+    if OPENAI_API_KEY and EMBEDDINGS_RETRY_INTERVAL > 0:
+        _im_hintergrund(_retry_embeddings())
+    return "eingeschränkt"
+
+async def _retry_embeddings():
+    while embeddings_index is None:
+        await asyncio.sleep(EMBEDDINGS_RETRY_INTERVAL)
+        if await initialize_embeddings():
+            await warm_retrieval_cache()
+            subsystems["embeddings_index"]["status"] = "bereit"
+
+def _im_hintergrund(coro) -> asyncio.Task:
+    task = asyncio.ensure_future(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+async def warm_up():
+    """
+    Wärmt alle Subsysteme parallel auf
+    """
+    await asyncio.gather(
+        _warm("verbrauchsdaten", warm_usage_provider),
+        _warm("modell_client", warm_model_client),
+        _warm("embeddings_index", warm_embeddings),
+    )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Wärmt beim Start Verbindungspool, Modell-Client und Embeddings-Index
+    parallel auf und hält die gemeinsamen Clients für die gesamte Laufzeit
+    offen; schließt sie beim Beenden
+    
+    Gewartet wird höchstens STARTUP_WAIT Sekunden; was dann noch lädt, läuft
+    im Hintergrund weiter und wird über /ready gemeldet.
+    """
+    global openai_client
+    aufwaermen = _im_hintergrund(warm_up())
+    if STARTUP_WAIT > 0:
+        await asyncio.wait({aufwaermen}, timeout=STARTUP_WAIT)
+    yield
+    for task in list(background_tasks):
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    if http_client is not None:
+        await http_client.aclose()
+    if openai_client is not None:
+        await openai_client.close()
+        openai_client = None
+    if llm_response_cache.backend is not None:
+        await llm_response_cache.backend.close()
 
 app = FastAPI(
     title="Energie-Spar-Empfehlungs-API",
     description="API für personalisierte Energiespartipps basierend auf Verbrauchsdaten",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
+app.add_middleware(MetricsMiddleware, registry=metrics, profiler=profiler)
 
 class TipsRequest(BaseModel):
     """
@@ -86,94 +509,243 @@ class TipsRequest(BaseModel):
     max_tips: int = 5
     languages: Optional[List[str]] = ["de"]  # Standardsprache ist Deutsch
 
-async def get_avg(days: int) -> float | None:
+class TipsBatchItem(TipsRequest):
+    """
+    Eintrag einer Batch-Anfrage (z.B. ein Haushalt)
+    
+    Attribute:
+        id: frei wählbare Kennung, wird im Ergebnis zurückgegeben
+    """
+    id: Optional[str] = None
+
+class TipsBatchRequest(BaseModel):
+    """
+    Anfrage-Modell für /tips/batch
+    """
+    items: List[TipsBatchItem]
+
+def check_days(days: int):
+    """
+    Begrenzt das Analysefenster (400 oberhalb von TIPS_MAX_DAYS)
+    """
+    if days > TIPS_MAX_DAYS:
+        raise HTTPException(400, f"days darf höchstens {TIPS_MAX_DAYS} sein.")
+
+async def get_avg(days: int, deadline: Deadline | None = None) -> float | None:
     """
     Holt den durchschnittlichen Energieverbrauch für die angegebene Anzahl von Tagen
     
+    Gleichzeitige Anfragen für denselben Wert von days teilen sich einen
+    einzigen Upstream-Aufruf über den gemeinsamen Verbindungspool. Gewartet
+    wird höchstens USAGE_DEADLINE bzw. der Rest des Anfrage-Budgets. Schlägt
+    der Aufruf fehl (oder ist der Leistungsschalter offen), wird der letzte
+    gültige Durchschnitt für days verwendet, sofern er jünger als
+    USAGE_LAST_GOOD_TTL ist.
+    
     Args:
         days: Anzahl der Tage für die Durchschnittsberechnung
+        deadline: Zeitbudget der Anfrage (optional)
         
     Returns:
         Durchschnittlicher Verbrauch in kWh oder None bei Fehlern
     """
+    frist = deadline.remaining(USAGE_DEADLINE) if deadline else USAGE_DEADLINE
+    try:
+        avg = await asyncio.wait_for(stats_flight.do(days, lambda: _fetch_avg(days)), frist)
+    except asyncio.TimeoutError as e:
+        record_error("get_avg_deadline", e)
+        avg = None
+    if avg is not None:
+        return avg
+    if USAGE_LAST_GOOD_TTL > 0:
+        avg = last_good_avg.get(days)
+        if avg is not None:
+            usage_fallbacks.inc()
+    return avg
+
+async def _fetch_avg(days: int) -> float | None:
+    """
+    Holt den Durchschnitt von der konfigurierten Quelle (USAGE_PROVIDER)
+    
+    Läuft durch den Leistungsschalter: bei offenem Kreis sofort None, sonst
+    wird das Ergebnis als Erfolg/Fehlschlag gemeldet.
+    """
+    if not usage_breaker.allow():
+        record_error("get_avg", "circuit_open")
+        return None
+    erfolg = False
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            r = await client.get(f"{USAGE_API}/stats", params={"days": days})
-        if r.status_code == 200 and "avg" in r.json():
-            return float(r.json()["avg"])
-    except Exception:
-        pass
+        with stage_seconds.time(stufe="get_avg"):
+            avg = await get_usage_provider().avg(days, timeout=min(USAGE_DEADLINE, USAGE_HTTP_TIMEOUT))
+        erfolg = True
+        last_good_avg.set(days, avg)
+        return avg
+    except UsageUnavailable as e:
+        record_error("get_avg", str(e))
+    except Exception as e:
+        record_error("get_avg", e)
+    finally:
+        usage_breaker.record(erfolg)
     return None
 
-def initialize_embeddings():
+async def initialize_embeddings():
     """
     Initialisiert die Embeddings-Datenbank für verbesserte AI-Antworten
-    """
-    global embeddings_index, embeddings_texts
     
-    if not OPENAI_API_KEY or not EMBEDDINGS_AVAILABLE:
+    Lädt den Index memory-mapped aus EMBEDDINGS_DIR, falls für den aktuellen
+    Katalog und das Modell bereits einer gespeichert ist (ohne API-Aufruf).
+    Liegen nur die Vektoren vor (z.B. nach einem Wechsel des Backends), wird
+    der Index daraus gebaut. Andernfalls werden alle Tipps in einem einzigen
+    Embeddings-Aufruf eingebettet und Vektoren und Index gespeichert.
+    """
+    if not EMBEDDINGS_AVAILABLE:
         return False
         
     try:
-        from openai import OpenAI
-        client = OpenAI(api_key=OPENAI_API_KEY)
-        
-        # Erstelle Embeddings für alle sicheren Energietipps
+        load_numerics()
+        backend = resolve_backend(EMBEDDINGS_INDEX, faiss is not None)
+        if backend != EMBEDDINGS_INDEX and EMBEDDINGS_INDEX in FAISS_BACKENDS:
+            record_error("embeddings_index", "faiss_fehlt")  # exakte NumPy-Suche statt faiss
+        subsystems["embeddings_index"]["backend"] = backend
+        params = EMBEDDINGS_INDEX_PARAMS
+        tag = index_tag(backend, params)
+        faiss_modul = faiss if backend in FAISS_BACKENDS else None
         texts = [f"{tip['kategorie']}: {tip['tipp']}" for tip in ENERGY_TIPS_DATABASE]
-        embeddings_texts = texts
-        
-        embeddings = []
-        for text in texts:
-            response = client.embeddings.create(
-                input=text,
-                model="text-embedding-3-small"
-            )
-            embeddings.append(response.data[0].embedding)
+        key = catalog_key(texts, OPENAI_EMBEDDING_MODEL)
         
-        # Erstelle FAISS-Index
-        embeddings_array = np.array(embeddings).astype('float32')
-        embeddings_index = faiss.IndexFlatIP(embeddings_array.shape[1])  # Inner Product für Similarität
-        faiss.normalize_L2(embeddings_array)  # Normalisiere für Cosine-Similarity
-        embeddings_index.add(embeddings_array)
+        geladen = load_index(EMBEDDINGS_DIR, key, faiss_modul, tag)
+        if geladen is None or (geladen[0] is None and faiss_modul is not None):
+            if geladen is None and not OPENAI_API_KEY:
+                return False
+            # Bei mehreren Workern baut nur einer; die anderen warten auf die
+            # Sperre und laden danach dieselben Dateien
+            sperre = await asyncio.to_thread(lock_build, EMBEDDINGS_DIR, key)
+            try:
+                geladen = await _build_embeddings(key, texts, backend, tag, faiss_modul)
+            finally:
+                unlock_build(sperre)
         
+        index, vektoren = geladen
+        if index is not None:
+            configure(index, backend, params, faiss_modul)
+        else:
+            # numpy-Backend: Suche direkt auf den memory-mapped Vektoren
+            index = await asyncio.to_thread(build_index, backend, vektoren, params, faiss_modul)
+        _set_index(index, texts, key, backend)
         return True
         
-    except Exception:
+    except Exception as e:
+        record_error("embeddings_index", e)
         return False
 
-def get_context_from_embeddings(query: str, top_k: int = 3) -> List[str]:
+async def _build_embeddings(key: str, texts: List[str], backend: str, tag: str, faiss_modul):
+    """
+    Erzeugt fehlende Vektoren bzw. den fehlenden faiss-Index, speichert beides
+    und lädt es memory-mapped zurück, damit sich alle Worker die Seiten teilen
+    
+    Returns:
+        (index oder None, vektoren)
+    """
+    geladen = load_index(EMBEDDINGS_DIR, key, faiss_modul, tag)  # evtl. von einem anderen Worker gebaut
+    if geladen is not None and (geladen[0] is not None or faiss_modul is None):
+        return geladen
+    if geladen is not None:
+        vektoren = geladen[1]
+    else:
+        # Erstelle Embeddings für alle sicheren Energietipps (ein Batch-Aufruf),
+        # normalisiert für Kosinus-Ähnlichkeit über das Skalarprodukt
+        vektoren = normalize(await create_embeddings(texts))
+    index = None
+    if faiss_modul is not None:
+        index = await asyncio.to_thread(build_index, backend, vektoren, EMBEDDINGS_INDEX_PARAMS, faiss_modul)
+    if _save_index_quietly(key, vektoren, texts, index, tag):
+        gespeichert = load_index(EMBEDDINGS_DIR, key, faiss_modul, tag)
+        if gespeichert is not None:
+            return gespeichert
+    return index, vektoren
+
+def _save_index_quietly(key: str, vektoren, texts: List[str], index, tag: str):
+    try:
+        save_index(EMBEDDINGS_DIR, key, vektoren, texts, OPENAI_EMBEDDING_MODEL, index, faiss, tag)
+        return True
+    except OSError:
+        return False  # Ohne beschreibbares Verzeichnis bleibt der Index nur im Speicher
+
+def _set_index(index, texts: List[str], version: str, backend: str):
+    """
+    Setzt den aktiven Index; bei neuer Version werden die Retrieval-Ergebnisse verworfen
+    """
+    global embeddings_index, embeddings_texts, embeddings_version, embeddings_backend
+    if version != embeddings_version:
+        retrieval_cache.clear()
+    embeddings_index, embeddings_texts, embeddings_version, embeddings_backend = index, texts, version, backend
+
+async def embed_queries(queries: List[str]) -> list:
+    """
+    Normalisierte Query-Embeddings (float32-Vektoren); fehlende werden in einem
+    Aufruf erzeugt und gecacht
+    """
+    load_numerics()
+    ergebnis = {q: query_embedding_cache.get((OPENAI_EMBEDDING_MODEL, q)) for q in queries}
+    fehlend = [q for q, v in ergebnis.items() if v is None]
+    if fehlend:
+        vektoren = normalize(await create_embeddings(fehlend))
+        for q, v in zip(fehlend, vektoren):
+            query_embedding_cache.set((OPENAI_EMBEDDING_MODEL, q), v)
+            ergebnis[q] = v
+    return [ergebnis[q] for q in queries]
+
+async def warm_retrieval_cache():
+    """
+    Berechnet Embeddings und Top-k-Ergebnisse der bekannten Kontext-Queries vor
+    """
+    if not embeddings_index or not OPENAI_API_KEY:
+        return
+    try:
+        await embed_queries(list(CONTEXT_QUERIES.values()))
+        for query in CONTEXT_QUERIES.values():
+            await get_context_from_embeddings(query, top_k=CONTEXT_TOP_K)
+    except Exception as e:
+        record_error("retrieval_vorwaermen", e)
+
+async def get_context_from_embeddings(query: str, top_k: int = 3) -> List[str]:
     """
     Sucht relevante Tipps basierend auf Embeddings-Ähnlichkeit
+    
+    Ergebnisse werden pro (Query, top_k, Index-Version) gecacht; im
+    eingeschwungenen Zustand entsteht dadurch kein Netzwerkaufruf.
     """
-    global embeddings_index, embeddings_texts
+    if not embeddings_index:
+        return []
     
-    if not embeddings_index or not OPENAI_API_KEY:
+    cache_key = (query, top_k, embeddings_version)
+    treffer = retrieval_cache.get(cache_key)
+    if treffer is not None:
+        return list(treffer)
+    
+    if not OPENAI_API_KEY:
         return []
         
     try:
-        from openai import OpenAI
-        client = OpenAI(api_key=OPENAI_API_KEY)
-        
-        # Erstelle Embedding für Query
-        response = client.embeddings.create(
-            input=query,
-            model="text-embedding-3-small"
-        )
-        query_embedding = np.array([response.data[0].embedding]).astype('float32')
-        faiss.normalize_L2(query_embedding)
+        # Embedding für Query (aus Cache oder neu erzeugt)
+        with stage_seconds.time(stufe="query_embedding"):
+            query_embedding = (await embed_queries([query]))[0][None, :]
         
         # Suche ähnliche Tipps
-        scores, indices = embeddings_index.search(query_embedding, top_k)
+        with stage_seconds.time(stufe="index_suche"):
+            scores, indices = embeddings_index.search(query_embedding, top_k)
         
         relevant_tips = []
         for idx in indices[0]:
-            if idx < len(ENERGY_TIPS_DATABASE):
+            if 0 <= idx < len(ENERGY_TIPS_DATABASE):  # -1 = weniger als top_k Treffer
                 tip_data = ENERGY_TIPS_DATABASE[idx]
                 relevant_tips.append(f"Kategorie {tip_data['kategorie']}: {tip_data['tipp']}")
-                
+        
+        retrieval_cache.set(cache_key, tuple(relevant_tips))
         return relevant_tips
         
-    except Exception:
+    except Exception as e:
+        record_error("retrieval", e)
         return []
 
 def rule_based_tips(avg: float, max_tips: int, langs: List[str]) -> dict:
@@ -231,6 +803,49 @@ def rule_based_tips(avg: float, max_tips: int, langs: List[str]) -> dict:
             "Nutzen Sie Zeitschaltuhren und effiziente Betriebsweisen für Geräte."
         ])
 
+async def tips_messages(avg: float, max_tips: int, langs: List[str]) -> List[dict]:
+    """
+    Baut die Chat-Nachrichten für erweiterte AI-Tipps inkl. Embeddings-Kontext
+    
+    Args:
+        avg: Durchschnittlicher Verbrauch in kWh
+        max_tips: Maximale Anzahl von Tipps
+        langs: Liste der gewünschten Sprachen
+    """
+    # Bestimme die Sprache für den Prompt
+    language = "Deutsch" if "de" in langs else "Deutsch"
+    
+    # Erstelle Kontext-Query basierend auf Verbrauch
+    if avg > HIGH_THRESHOLD:
+        context_query = CONTEXT_QUERIES["high"]
+    elif avg < LOW_THRESHOLD:
+        context_query = CONTEXT_QUERIES["low"]
+    else:
+        context_query = CONTEXT_QUERIES["normal"]
+    
+    # Hole relevante Tipps aus Embeddings
+    context_tips = await get_context_from_embeddings(context_query, top_k=CONTEXT_TOP_K)
+    context_text = ""
+    if context_tips:
+        context_text = f"\\n\\nRelevante bewährte Methoden:\\n" + "\\n".join(context_tips)
+    
+    prompt = (
+        f"Erstelle präzise und sichere Energiespartipps für einen deutschen Haushalt auf {language}.\\n"
+        f"- Durchschnittlicher stündlicher Verbrauch: {avg} kWh.\\n"
+        f"- Gib zwischen 3 und {max_tips} praktische Tipps.\\n"
+        "WICHTIG: Keine gefährlichen technischen Ratschläge, keine erfundenen Zahlen. "
+        "Kurze, umsetzbare Sätze. Bei unzureichenden Informationen antworte: 'Keine genauen Angaben möglich.'\\n"
+        f"Fokus auf alltägliche, sichere Energiesparmaßnahmen.{context_text}"
+    )
+    
+    return [
+        {
+            "role": "system", 
+            "content": "Du bist ein Experte für Haushalts-Energieeffizienz. OBERSTE PRIORITÄT: Sicherheit und Genauigkeit. Antworte ausschließlich auf Deutsch. Gib NIEMALS gefährliche elektrische Ratschläge."
+        },
+        {"role": "user", "content": prompt}
+    ]
+
 async def call_llm_tips_enhanced(avg: float, max_tips: int, langs: List[str]) -> str | None:
     """
     Erweiterte AI-Tipps mit Embeddings-Kontext - SICHERHEITSFILTER BLEIBEN AKTIV
@@ -246,49 +861,9 @@ async def call_llm_tips_enhanced(avg: float, max_tips: int, langs: List[str]) ->
     if not OPENAI_API_KEY:
         return None
     try:
-        from openai import OpenAI
-        client = OpenAI(api_key=OPENAI_API_KEY)
-        
-        # Bestimme die Sprache für den Prompt
-        language = "Deutsch" if "de" in langs else "Deutsch"
-        
-        # Erstelle Kontext-Query basierend auf Verbrauch
-        if avg > HIGH_THRESHOLD:
-            context_query = "hoher energieverbrauch reduzieren sparen effizienz"
-        elif avg < LOW_THRESHOLD:
-            context_query = "niedriger verbrauch optimieren effizienz standby"
-        else:
-            context_query = "normaler energieverbrauch optimieren haushalt"
-        
-        # Hole relevante Tipps aus Embeddings
-        context_tips = get_context_from_embeddings(context_query, top_k=2)
-        context_text = ""
-        if context_tips:
-            context_text = f"\\n\\nRelevante bewährte Methoden:\\n" + "\\n".join(context_tips)
-        
-        prompt = (
-            f"Erstelle präzise und sichere Energiespartipps für einen deutschen Haushalt auf {language}.\\n"
-            f"- Durchschnittlicher stündlicher Verbrauch: {avg} kWh.\\n"
-            f"- Gib zwischen 3 und {max_tips} praktische Tipps.\\n"
-            "WICHTIG: Keine gefährlichen technischen Ratschläge, keine erfundenen Zahlen. "
-            "Kurze, umsetzbare Sätze. Bei unzureichenden Informationen antworte: 'Keine genauen Angaben möglich.'\\n"
-            f"Fokus auf alltägliche, sichere Energiesparmaßnahmen.{context_text}"
-        )
-        
-        resp = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {
-                    "role": "system", 
-                    "content": "Du bist ein Experte für Haushalts-Energieeffizienz. OBERSTE PRIORITÄT: Sicherheit und Genauigkeit. Antworte ausschließlich auf Deutsch. Gib NIEMALS gefährliche elektrische Ratschläge."
-                },
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2 if AI_SAFE_MODE else 0.5,
-            max_tokens=300
-        )
-        return resp.choices[0].message.content
-    except Exception:
+        return await chat_completion(await tips_messages(avg, max_tips, langs))
+    except Exception as e:
+        record_error("llm", e)
         return None
 
 async def call_llm_tips(avg: float, max_tips: int, langs: List[str]) -> str | None:
@@ -306,9 +881,6 @@ async def call_llm_tips(avg: float, max_tips: int, langs: List[str]) -> str | No
     if not OPENAI_API_KEY:
         return None
     try:
-        from openai import OpenAI
-        client = OpenAI(api_key=OPENAI_API_KEY)
-        
         # Bestimme die Sprache für den Prompt
         language = "Deutsch" if "de" in langs else "Deutsch"  # Standard auf Deutsch
         
@@ -321,22 +893,50 @@ async def call_llm_tips(avg: float, max_tips: int, langs: List[str]) -> str | No
             "Fokus auf alltägliche, sichere Energiesparmaßnahmen."
         )
         
-        resp = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {
-                    "role": "system", 
-                    "content": "Du bist ein Experte für Haushalts-Energieeffizienz. Priorität haben Sicherheit und Genauigkeit. Antworte ausschließlich auf Deutsch."
-                },
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2 if AI_SAFE_MODE else 0.5,
-            max_tokens=300
-        )
-        return resp.choices[0].message.content
-    except Exception:
+        return await chat_completion([
+            {
+                "role": "system", 
+                "content": "Du bist ein Experte für Haushalts-Energieeffizienz. Priorität haben Sicherheit und Genauigkeit. Antworte ausschließlich auf Deutsch."
+            },
+            {"role": "user", "content": prompt}
+        ])
+    except Exception as e:
+        record_error("llm", e)
         return None
 
+# KRITISCHE SICHERHEITSFILTER - MÜSSEN ERHALTEN BLEIBEN!
+# Einmalig kompiliert; prüft alle Kategorien in einem Durchlauf
+safety_filter = SafetyFilter(load_terms(SAFETY_TERMS_FILE))
+
+def classify_consumption(avg: float) -> str:
+    """
+    Klassifiziert den Verbrauch anhand der konfigurierten Schwellen
+    """
+    if avg < LOW_THRESHOLD:
+        return "low"
+    if avg > HIGH_THRESHOLD:
+        return "high"
+    return "normal"
+
+async def cached_llm_tips(avg: float, max_tips: int, langs: List[str]) -> str | None:
+    """
+    AI-Tipps über den Antwort-Cache
+    
+    Schlüssel: quantisierter Durchschnitt, Klasse, max_tips und Modell. Bei einem
+    Fehlschlag wird mit dem quantisierten Durchschnitt generiert, damit die
+    gespeicherte Antwort für den ganzen Bucket gilt; gespeichert wird nur, was
+    den Sicherheitsfilter besteht.
+    """
+    if not llm_response_cache.enabled:
+        return await call_llm_tips_enhanced(avg, max_tips, langs)
+    bucket = quantize(avg, LLM_CACHE_AVG_STEP)
+    key = cache_key(avg, LLM_CACHE_AVG_STEP, classify_consumption(bucket), max_tips, OPENAI_MODEL)
+    return await llm_response_cache.get_or_create(
+        key,
+        lambda: call_llm_tips_enhanced(bucket, max_tips, langs),
+        lambda text: not safety_filter.is_unsafe(text)
+    )
+
 @app.post("/tips")
 async def tips(req: TipsRequest):
     """
@@ -352,50 +952,53 @@ async def tips(req: TipsRequest):
     Returns:
         Dictionary mit Energiespartipps und Metadaten
     """
-    avg = await get_avg(req.days)
+    check_days(req.days)
+    deadline = Deadline(TIPS_DEADLINE)
+    avg = await get_avg(req.days, deadline)
 
     # Falls kein Durchschnitt ermittelt werden kann, allgemeine Tipps zurückgeben
     if avg is None:
         fallback = rule_based_tips(0.7, req.max_tips, req.languages or ["de"])
         fallback["nachricht"] = "Keine genauen Verbrauchsdaten verfügbar. Hier sind allgemeine Energiespartipps."
+        tips_source.inc(endpunkt="/tips", quelle="keine_daten")
         return fallback
 
-    # Versuche zuerst erweiterte AI-Tipps mit Embeddings-Kontext
-    llm_text = await call_llm_tips_enhanced(avg, req.max_tips, req.languages or ["de"])
+    # Versuche zuerst erweiterte AI-Tipps mit Embeddings-Kontext (mit Deadline → sonst regelbasiert)
+    llm_text = await llm_tips_with_deadline(avg, req.max_tips, req.languages or ["de"], deadline)
+    result = tips_result(avg, llm_text, req.max_tips, req.languages or ["de"])
+    tips_source.inc(endpunkt="/tips", quelle=result["quelle"])
+    return result
+
+
+async def llm_tips_with_deadline(avg: float, max_tips: int, langs: List[str],
+                                 deadline: Deadline | None = None) -> str | None:
+    """
+    AI-Tipps über den Cache; None, wenn LLM_DEADLINE bzw. das Anfrage-Budget überschritten wird
+    """
+    frist = deadline.remaining(LLM_DEADLINE) if deadline else LLM_DEADLINE
+    if frist <= 0:
+        record_error("llm_deadline", "budget_erschoepft")
+        return None
+    try:
+        return await asyncio.wait_for(cached_llm_tips(avg, max_tips, langs), timeout=frist)
+    except asyncio.TimeoutError as e:
+        record_error("llm_deadline", e)
+        return None
+
+def tips_result(avg: float, llm_text: str | None, max_tips: int, langs: List[str]) -> dict:
+    """
+    Baut die /tips-Antwort aus AI-Text (gefiltert) oder regelbasierten Tipps
+    """
     if llm_text:
         # KRITISCHE SICHERHEITSFILTER - MÜSSEN ERHALTEN BLEIBEN!
-        verbotene_begriffe = [
-            "hauptschalter ausschalten", 
-            "stromzähler manipulieren", 
-            "sicherungen entfernen",
-            "sicherung entfernen", 
-            "elektrische anlage öffnen",
-            "kabel durchtrennen",
-            "elektrische installation",
-            "verkabelung ändern",
-            "sicherung überbrücken"
-        ]
-        
-        # Zusätzliche gefährliche Wörter (einzeln)
-        gefaehrliche_woerter = ["hochspannung", "starkstrom", "manipulation", "überbrücken", "manipulieren"]
-        
-        llm_lower = llm_text.lower()
-        
-        # Prüfe verbotene Begriffe (Phrasen)
-        for begriff in verbotene_begriffe:
-            if begriff in llm_lower:
-                llm_text = "Keine genauen Angaben möglich; unsichere Empfehlung erkannt. Hier sind bewährte allgemeine Tipps."
-                break
-        
-        # Prüfe einzelne gefährliche Wörter
-        if llm_text != "Keine genauen Angaben möglich; unsichere Empfehlung erkannt. Hier sind bewährte allgemeine Tipps.":
-            for wort in gefaehrliche_woerter:
-                if wort in llm_lower:
-                    llm_text = "Keine genauen Angaben möglich; unsichere Empfehlung erkannt. Hier sind bewährte allgemeine Tipps."
-                    break
+        # (auch für Cache-Treffer, obwohl dort nur gefilterte Antworten liegen)
+        with stage_seconds.time(stufe="sicherheitsfilter"):
+            unsicher = safety_filter.is_unsafe(llm_text)
+        if unsicher:
+            llm_text = UNSICHER_MELDUNG
                 
         return {
-            "quelle": "ai-enhanced" if llm_text != "Keine genauen Angaben möglich; unsichere Empfehlung erkannt. Hier sind bewährte allgemeine Tipps." else "regelbasiert-fallback", 
+            "quelle": "regelbasiert-fallback" if unsicher else "ai-enhanced", 
             "durchschnitt_kwh": avg, 
             "tipps_text": llm_text, 
             "sprache": "de",
@@ -404,11 +1007,178 @@ async def tips(req: TipsRequest):
         }
 
     # Falls AI nicht verfügbar/fehlgeschlagen → regelbasierte Tipps
-    result = rule_based_tips(avg, req.max_tips, req.languages or ["de"])
+    result = rule_based_tips(avg, max_tips, langs)
     result["sicherheitsfilter"] = "aktiv"
     return result
 
 
+def _sse(event: str, data: dict) -> str:
+    """
+    Formatiert ein Server-Sent-Event
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _tips_events(req: TipsRequest) -> AsyncIterator[str]:
+    """
+    Ereignisfolge für /tips/stream: meta → token* → (fallback) → done
+    """
+    langs = req.languages or ["de"]
+    deadline = Deadline(TIPS_DEADLINE)
+    avg = await get_avg(req.days, deadline)
+    if avg is None:
+        fallback = rule_based_tips(0.7, req.max_tips, langs)
+        fallback["nachricht"] = "Keine genauen Verbrauchsdaten verfügbar. Hier sind allgemeine Energiespartipps."
+        tips_source.inc(endpunkt="/tips/stream", quelle="keine_daten")
+        yield _sse("fallback", fallback)
+        yield _sse("done", {"quelle": fallback["quelle"]})
+        return
+
+    yield _sse("meta", {
+        "durchschnitt_kwh": avg,
+        "sprache": "de",
+        "sicherheitsfilter": "aktiv",
+        "embeddings_verwendet": bool(embeddings_index)
+    })
+
+    # KRITISCHE SICHERHEITSFILTER - MÜSSEN ERHALTEN BLEIBEN!
+    # Jeder Chunk wird vor dem Senden geprüft; das Ende bleibt zurückgehalten,
+    # bis feststeht, dass dort kein Begriff beginnt
+    guard = StreamGuard(safety_filter)
+    fehler = not OPENAI_API_KEY
+    if not fehler:
+        loop = asyncio.get_running_loop()
+        frist = loop.time() + deadline.remaining(LLM_DEADLINE)
+        start = time.perf_counter()
+        bucket = quantize(avg, LLM_CACHE_AVG_STEP) if llm_response_cache.enabled else avg
+        key = cache_key(avg, LLM_CACHE_AVG_STEP, classify_consumption(bucket), req.max_tips, OPENAI_MODEL)
+        gecacht = await llm_response_cache.get(key)
+        if gecacht is not None:
+            frei = guard.feed(gecacht)
+            if frei:
+                yield _sse("token", {"text": frei})
+        else:
+            tokens = None
+            try:
+                messages = await asyncio.wait_for(tips_messages(bucket, req.max_tips, langs), frist - loop.time())
+                tokens = stream_chat_completion(messages)
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(tokens.__anext__(), frist - loop.time())
+                    except StopAsyncIteration:
+                        break
+                    frei = guard.feed(chunk)
+                    if guard.blockiert:
+                        break
+                    if frei:
+                        yield _sse("token", {"text": frei})
+            except Exception as e:
+                record_error("llm_stream", e)
+                fehler = True
+            finally:
+                if tokens is not None:
+                    await tokens.aclose()
+            if not fehler and not guard.blockiert and guard.text:
+                await llm_response_cache.store(key, guard.text, time.perf_counter() - start)
+        fehler = fehler or not guard.text
+
+    if guard.blockiert or fehler:
+        # Bereits gesendete Tokens werden durch die regelbasierten Tipps ersetzt
+        fallback = rule_based_tips(avg, req.max_tips, langs)
+        fallback["sicherheitsfilter"] = "aktiv"
+        if guard.blockiert:
+            fallback["quelle"] = "regelbasiert-fallback"
+            fallback["nachricht"] = UNSICHER_MELDUNG
+        tips_source.inc(endpunkt="/tips/stream", quelle=fallback["quelle"])
+        yield _sse("fallback", fallback)
+        yield _sse("done", {"quelle": fallback["quelle"]})
+        return
+
+    rest = guard.finish()
+    if rest:
+        yield _sse("token", {"text": rest})
+    tips_source.inc(endpunkt="/tips/stream", quelle="ai-enhanced")
+    yield _sse("done", {"quelle": "ai-enhanced"})
+
+@app.post("/tips/stream")
+async def tips_stream(req: TipsRequest):
+    """
+    Streaming-Variante von /tips als Server-Sent Events
+    
+    Ereignisse:
+        meta: Durchschnitt und Filterstatus, sobald der Verbrauch bekannt ist
+        token: freigegebener, bereits geprüfter Textteil der AI-Antwort
+        fallback: regelbasierte Tipps; ersetzen alle bisher gesendeten Tokens
+                  (unsicherer Begriff erkannt, AI nicht verfügbar oder Deadline überschritten)
+        done: Ende des Streams mit der endgültigen Quelle
+    """
+    check_days(req.days)
+    return StreamingResponse(
+        _tips_events(req),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _batch_lines(items: List[TipsBatchItem]) -> AsyncIterator[str]:
+    """
+    NDJSON-Zeilen für /tips/batch, je Gruppe sobald deren Tipps vorliegen
+    """
+    def zeile(index: int, item: TipsBatchItem, ergebnis: dict) -> str:
+        return json.dumps({"index": index, "id": item.id, **ergebnis}, ensure_ascii=False) + "\n"
+
+    # Eine /stats-Abfrage pro unterschiedlichem days-Wert, begrenzt parallel
+    begrenzung = asyncio.Semaphore(TIPS_BATCH_STATS_CONCURRENCY)
+    async def avg_fuer(days: int) -> float | None:
+        async with begrenzung:
+            return await get_avg(days)
+    tage = sorted({item.days for item in items})
+    avgs = dict(zip(tage, await asyncio.gather(*(avg_fuer(d) for d in tage))))
+
+    # Gruppen: Klassifikation × max_tips × Sprachen → ein Generierungsaufruf je Gruppe
+    gruppen: dict = {}
+    for index, item in enumerate(items):
+        avg = avgs[item.days]
+        langs = item.languages or ["de"]
+        if avg is None:
+            fallback = rule_based_tips(0.7, item.max_tips, langs)
+            fallback["nachricht"] = "Keine genauen Verbrauchsdaten verfügbar. Hier sind allgemeine Energiespartipps."
+            tips_source.inc(endpunkt="/tips/batch", quelle="keine_daten")
+            yield zeile(index, item, fallback)
+            continue
+        key = (classify_consumption(avg), item.max_tips, tuple(langs))
+        gruppen.setdefault(key, []).append((index, item, avg))
+
+    async def generieren(key, mitglieder):
+        # Stellvertreter: Mittel der Gruppen-Durchschnitte (jeder Eintrag behält seinen eigenen Wert)
+        werte = sorted({avg for _, _, avg in mitglieder})
+        stellvertreter = round(sum(werte) / len(werte), 3)
+        return key, mitglieder, await llm_tips_with_deadline(stellvertreter, key[1], list(key[2]))
+
+    for fertig in asyncio.as_completed([generieren(k, m) for k, m in gruppen.items()]):
+        (_, max_tips, langs), mitglieder, llm_text = await fertig
+        for index, item, avg in mitglieder:
+            ergebnis = tips_result(avg, llm_text, max_tips, list(langs))
+            tips_source.inc(endpunkt="/tips/batch", quelle=ergebnis["quelle"])
+            yield zeile(index, item, ergebnis)
+
+@app.post("/tips/batch")
+async def tips_batch(req: TipsBatchRequest):
+    """
+    Energiespartipps für viele Haushalte in einer Anfrage (z.B. nächtlicher Job)
+    
+    Die Verbrauchsdaten werden pro unterschiedlichem days-Wert einmal und
+    begrenzt parallel abgefragt; Einträge mit gleicher Klassifikation,
+    max_tips und Sprache teilen sich einen Generierungsaufruf. Die Ergebnisse
+    werden als NDJSON gestreamt (eine Zeile pro Eintrag mit index und id,
+    Reihenfolge nach Fertigstellung), Inhalt wie bei /tips.
+    """
+    if not 1 <= len(req.items) <= TIPS_BATCH_MAX_ITEMS:
+        raise HTTPException(400, f"items muss zwischen 1 und {TIPS_BATCH_MAX_ITEMS} Einträge enthalten.")
+    for item in req.items:
+        check_days(item.days)
+    return StreamingResponse(_batch_lines(req.items), media_type="application/x-ndjson")
+
+
+@stage_seconds.timed(stufe="regel_fallback")
 def rule_based_tips(avg: float, max_tips: int, langs: List[str]) -> dict:
     """
     Generiert regelbasierte Energiespartipps auf Deutsch
@@ -484,44 +1254,132 @@ async def root():
         "beschreibung": "API für personalisierte Energiespartipps",
         "verfuegbare_endpunkte": {
             "/tips": "POST - Energiespartipps anfordern",
+            "/tips/stream": "POST - Energiespartipps als Server-Sent Events (Token-Streaming)",
+            "/tips/batch": "POST - Energiespartipps für viele Haushalte (NDJSON, gebündelte Abfragen)",
+            "/cache": "GET - Kennzahlen der Antwort- und Retrieval-Caches",
+            "/health": "GET - Liveness",
+            "/ready": "GET - Bereitschaft je Subsystem (Verbindungspool, Modell-Client, Embeddings-Index)",
+            "/metrics": "GET - Kennzahlen im Prometheus-Format (Latenz je Stufe, Antwortquellen, Caches, Pool)",
             "/docs": "GET - API Dokumentation"
         },
         "standardsprache": DEFAULT_LANGUAGE
     }
 
 
+@app.get("/cache")
+async def cache_stats():
+    """
+    Trefferquoten und eingesparte Latenz der Caches
+    """
+    return {
+        "llm_antworten": llm_response_cache.info(),
+        "query_embeddings": query_embedding_cache.info(),
+        "retrieval": retrieval_cache.info()
+    }
+
+
 @app.get("/health")
 async def health_check():
     """
-    Gesundheitsprüfung der API mit Embeddings-Status
+    Gesundheitsprüfung der API mit Embeddings-Status (Liveness; ohne Nebenwirkungen)
     """
-    # Initialisiere Embeddings bei erster Anfrage
-    global embeddings_index
-    if embeddings_index is None and OPENAI_API_KEY and EMBEDDINGS_AVAILABLE:
-        embeddings_ready = initialize_embeddings()
-    else:
-        embeddings_ready = bool(embeddings_index)
-    
     return {
         "status": "gesund",
         "ai_verfuegbar": bool(OPENAI_API_KEY),
-        "embeddings_verfuegbar": embeddings_ready and EMBEDDINGS_AVAILABLE,
+        "embeddings_verfuegbar": embeddings_index is not None,
+        "embeddings_backend": embeddings_backend,
         "safe_modus": AI_SAFE_MODE,
-        "sicherheitsfilter": "aktiv"
+        "sicherheitsfilter": "aktiv",
+        "verbrauchs_api": usage_breaker.state,
+        "verbrauchsdaten": USAGE_PROVIDER
     }
 
 
+def _pool_stats() -> dict:
+    """
+    Verbindungen im HTTP-Pool zur Verbrauchs-API (aus den httpcore-Interna, falls vorhanden)
+    """
+    pool = getattr(getattr(http_client, "_transport", None), "_pool", None)
+    verbindungen = list(getattr(pool, "connections", []))
+    leerlauf = sum(1 for c in verbindungen if c.is_idle())
+    return {("aktiv",): len(verbindungen) - leerlauf, ("leerlauf",): leerlauf}
+
+cache_callbacks(metrics, {
+    "llm_antworten": llm_response_cache.info,
+    "query_embeddings": query_embedding_cache.info,
+    "retrieval": retrieval_cache.info,
+})
+metrics.callback("llm_cache_coalesced_total", "Per Single-Flight gebündelte Cache-Fehlschläge",
+                 lambda: llm_response_cache.info()["coalesced"], typ="counter")
+metrics.callback("stats_upstream_calls_total", "Upstream-Aufrufe von /stats", lambda: stats_flight.calls, typ="counter")
+metrics.callback("stats_coalesced_total", "Per Single-Flight gebündelte /stats-Abfragen",
+                 lambda: stats_flight.coalesced, typ="counter")
+metrics.callback("usage_circuit_state", "Leistungsschalter der Verbrauchs-API (1 = aktueller Zustand)",
+                 lambda: {(z,): float(usage_breaker.state == z) for z in ("geschlossen", "halboffen", "offen")},
+                 ("zustand",))
+metrics.callback("usage_circuit_opened_total", "Öffnungen des Leistungsschalters", lambda: usage_breaker.opened,
+                 typ="counter")
+metrics.callback("usage_circuit_rejected_total", "Vom offenen Leistungsschalter abgewiesene Aufrufe",
+                 lambda: usage_breaker.rejected, typ="counter")
+metrics.callback("http_pool_connections", "Verbindungen im HTTP-Pool zur Verbrauchs-API", _pool_stats, ("zustand",))
+metrics.callback("llm_in_flight", "Laufende Modellaufrufe", lambda: llm_in_flight)
+metrics.callback("llm_max_concurrency", "Obergrenze gleichzeitiger Modellaufrufe", lambda: LLM_MAX_CONCURRENCY)
+metrics.callback("subsystem_ready", "Subsystem aufgewärmt (1) oder nicht (0)",
+                 lambda: {(n,): float(s["status"] not in ("ausstehend", "lädt")) for n, s in subsystems.items()},
+                 ("subsystem",))
+metrics.callback("profile_samples_total", "Geschriebene Profiling-Stichproben", lambda: profiler.samples, typ="counter")
+metrics.callback("profile_errors_total", "Nicht geschriebene Profiling-Stichproben", lambda: profiler.errors, typ="counter")
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """
+    Kennzahlen im Prometheus-Textformat
+    """
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/ready")
+async def readiness():
+    """
+    Bereitschaft mit Status je Subsystem (503, solange noch etwas aufgewärmt wird)
+    
+    "eingeschränkt" und "deaktiviert" gelten als bereit: die API antwortet
+    dann mit regelbasierten Tipps bzw. ohne Embeddings-Kontext.
+    """
+    bereit = all(s["status"] not in ("ausstehend", "lädt") for s in subsystems.values())
+    return JSONResponse(
+        {"bereit": bereit, "subsysteme": subsystems},
+        status_code=200 if bereit else 503
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
     print(f" Starte Energie-Spar-API auf {API_HOST}:{API_PORT}")
-    print(f"Verbrauchs-API: {USAGE_API}")
+    print(f"Verbrauchs-API: {USAGE_API if USAGE_PROVIDER == 'http' else 'im Prozess (' + USAGE_SIM_PATH + ')'}")
     print(f"AI-Modus: {'Aktiviert' if OPENAI_API_KEY else 'Deaktiviert'}")
     print(f"Sicherheitsmodus: {'An' if AI_SAFE_MODE else 'Aus'}")
     print(f"Standardsprache: {DEFAULT_LANGUAGE}")
     
-    uvicorn.run(
-        "app:app", 
-        host=API_HOST, 
-        port=API_PORT, 
-        reload=True
-    )
+    if SERVER_MODE == "production":
+        # Mehrere Prozesse ohne Reload; der Embeddings-Index liegt memory-mapped
+        # in EMBEDDINGS_DIR und wird von allen Workern geteilt
+        print(f"Produktionsmodus: {SERVER_WORKERS} Worker, Loop {SERVER_LOOP}, HTTP {SERVER_HTTP}")
+        uvicorn.run(
+            "app:app",
+            host=API_HOST,
+            port=API_PORT,
+            workers=SERVER_WORKERS,
+            loop=SERVER_LOOP,
+            http=SERVER_HTTP,
+            timeout_graceful_shutdown=SERVER_GRACEFUL_TIMEOUT,
+            access_log=SERVER_ACCESS_LOG,
+        )
+    else:
+        uvicorn.run(
+            "app:app", 
+            host=API_HOST, 
+            port=API_PORT, 
+            reload=True
+        )
@@ -0,0 +1,119 @@
+"""
+Persistenter Embeddings-Index für den Tipp-Katalog
+
+Die normalisierten Vektoren (.npy) und der FAISS-Index (.faiss) werden unter
+einem Schlüssel aus Inhalts-Hash des Katalogs und Modellname abgelegt; der
+Dateiname des Index enthält zusätzlich Backend und Bau-Parameter (siehe
+``vector_index.index_tag``). Fehlt nur der Index, wird er aus den
+gespeicherten Vektoren ohne API-Aufruf neu gebaut. Beim
+Start werden beide Dateien memory-mapped geladen; alle uvicorn-Worker und
+Neustarts nutzen dieselben Dateien ohne API-Aufrufe und teilen sich die
+Seiten im Page-Cache. Den Aufbau übernimmt bei mehreren Workern nur einer
+(``lock_build``). Ändert sich der Katalog oder das Modell, ändert sich der
+Schlüssel und der Index wird neu gebaut.
+"""
+import hashlib
+import json
+import os
+from typing import IO, TYPE_CHECKING, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: Aufbau ohne Sperre
+    fcntl = None
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+def catalog_key(texts: List[str], model: str) -> str:
+    """
+    Inhalts-Hash über Modellname und Katalogtexte
+    """
+    h = hashlib.sha256(model.encode("utf-8"))
+    for text in texts:
+        h.update(b"\0" + text.encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def _pfade(directory: str, key: str, tag: str = "") -> Tuple[str, str, str]:
+    basis = os.path.join(directory, f"tips-{key}")
+    return basis + ".npy", basis + (f"-{tag}" if tag else "") + ".faiss", basis + ".json"
+
+
+def load_index(directory: str, key: str, faiss=None, tag: str = "") -> Optional[Tuple[object, "np.ndarray"]]:
+    """
+    Lädt Vektoren (memory-mapped) und, falls faiss übergeben wird, den FAISS-Index
+
+    Returns:
+        (index oder None, vektoren) oder None, wenn für den Schlüssel nichts gespeichert ist
+    """
+    vektor_pfad, index_pfad, _ = _pfade(directory, key, tag)
+    if not os.path.exists(vektor_pfad):
+        return None
+    import numpy as np
+    vektoren = np.load(vektor_pfad, mmap_mode="r")
+    index = None
+    if faiss is not None and os.path.exists(index_pfad):
+        flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+        try:
+            index = faiss.read_index(index_pfad, flags)
+        except RuntimeError:
+            index = faiss.read_index(index_pfad)  # Indextyp ohne mmap-Unterstützung (z.B. HNSW)
+    return index, vektoren
+
+
+def save_index(directory: str, key: str, vektoren: "np.ndarray", texts: List[str], model: str, index=None, faiss=None,
+               tag: str = ""):
+    """
+    Schreibt Vektoren, optional den FAISS-Index und Metadaten atomar (tmp + rename)
+    """
+    import numpy as np
+    os.makedirs(directory, exist_ok=True)
+    vektor_pfad, index_pfad, meta_pfad = _pfade(directory, key, tag)
+    pid = os.getpid()
+
+    tmp = f"{vektor_pfad}.{pid}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, np.ascontiguousarray(vektoren, dtype="float32"))
+    os.replace(tmp, vektor_pfad)
+
+    if index is not None and faiss is not None:
+        tmp = f"{index_pfad}.{pid}.tmp"
+        faiss.write_index(index, tmp)
+        os.replace(tmp, index_pfad)
+
+    tmp = f"{meta_pfad}.{pid}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"key": key, "model": model, "texts": texts}, f, ensure_ascii=False)
+    os.replace(tmp, meta_pfad)
+
+
+def lock_build(directory: str, key: str) -> Optional[IO]:
+    """
+    Wartet auf die exklusive Bau-Sperre für einen Schlüssel (flock auf einer Sperrdatei)
+
+    Blockiert; aus async-Code in einem Thread aufrufen.
+
+    Returns:
+        geöffnete Sperrdatei für ``unlock_build`` oder None (ohne fcntl oder
+        ohne beschreibbares Verzeichnis wird ohne Sperre gebaut)
+    """
+    if fcntl is None:
+        return None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        sperre = open(os.path.join(directory, f"tips-{key}.lock"), "a")
+    except OSError:
+        return None
+    fcntl.flock(sperre, fcntl.LOCK_EX)
+    return sperre
+
+
+def unlock_build(sperre: Optional[IO]):
+    """
+    Gibt die Bau-Sperre frei
+    """
+    if sperre is not None:
+        fcntl.flock(sperre, fcntl.LOCK_UN)
+        sperre.close()
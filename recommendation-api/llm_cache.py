@@ -0,0 +1,256 @@
+"""
+Antwort-Cache für AI-generierte Tipps
+
+Der Schlüssel besteht aus Modell, Verbrauchsklasse, max_tips und dem auf
+eine konfigurierbare Schrittweite quantisierten Durchschnitt. Es werden nur
+Antworten gespeichert, die den Sicherheitsfilter bestanden haben. Fehlschläge
+werden per Single-Flight gebündelt, damit ein kalter Schlüssel nur einen
+Modellaufruf auslöst.
+
+Backends:
+- "memory": In-Memory-LRU mit TTL (Standard)
+- "disk":   lokale SQLite-Datei (überlebt Neustarts, von Workern geteilt)
+- "redis":  Redis-kompatibler Server (optional, benötigt ``redis``)
+"""
+import asyncio
+import importlib.util
+import logging
+import sqlite3
+import time
+from typing import Awaitable, Callable, Optional
+
+from singleflight import SingleFlight
+from ttl_cache import TTLCache
+
+# redis wird nur für das Redis-Backend (und erst dann) importiert
+REDIS_AVAILABLE = importlib.util.find_spec("redis") is not None
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(avg: float, step: float, classification: str, max_tips: int, model: str) -> str:
+    """
+    Schlüssel aus Modell, Klasse, max_tips und quantisiertem Durchschnitt
+    """
+    return f"{model}|{classification}|{max_tips}|{quantize(avg, step):.4f}"
+
+
+def quantize(avg: float, step: float) -> float:
+    """
+    Rundet avg auf ein Vielfaches von step (step <= 0: keine Quantisierung)
+    """
+    if step <= 0:
+        return avg
+    return round(round(avg / step) * step, 6)
+
+
+class MemoryBackend:
+    """
+    In-Memory-Backend auf Basis von TTLCache
+    """
+
+    # Fehlertypen des Backends, die ResponseCache abfängt (als Fehlschlag gezählt)
+    errors: tuple = ()
+
+    def __init__(self, size: int, ttl: float):
+        self._cache = TTLCache(size, ttl)
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: str):
+        self._cache.set(key, value)
+
+    async def close(self):
+        pass
+
+
+class DiskBackend:
+    """
+    SQLite-Backend; begrenzt auf size Einträge (älteste werden zuerst gelöscht)
+    """
+
+    errors: tuple = (sqlite3.Error,)
+
+    def __init__(self, path: str, size: int, ttl: float):
+        self.size = size
+        self.ttl = ttl
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT, created REAL)"
+        )
+        self._lock = asyncio.Lock()
+
+    def _get(self, key: str) -> Optional[str]:
+        zeile = self._db.execute("SELECT value, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if zeile is None or (self.ttl > 0 and zeile[1] + self.ttl <= time.time()):
+            return None
+        return zeile[0]
+
+    def _set(self, key: str, value: str):
+        self._db.execute("INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?)", (key, value, time.time()))
+        self._db.execute(
+            "DELETE FROM llm_cache WHERE key NOT IN "
+            "(SELECT key FROM llm_cache ORDER BY created DESC LIMIT ?)",
+            (self.size,),
+        )
+
+    async def get(self, key: str) -> Optional[str]:
+        async with self._lock:
+            return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: str):
+        async with self._lock:
+            await asyncio.to_thread(self._set, key, value)
+
+    async def close(self):
+        self._db.close()
+
+
+class RedisBackend:
+    """
+    Redis-Backend; TTL über SET EX, Größenbegrenzung über die maxmemory-Policy des Servers
+    """
+
+    def __init__(self, url: str, ttl: float, prefix: str = "energy-saver:llm:"):
+        self.ttl = ttl
+        self.prefix = prefix
+        import redis.asyncio as redis_asyncio
+        from redis.exceptions import RedisError
+        # OSError: Socket-Fehler, die der Client nicht in RedisError übersetzt
+        self.errors = (RedisError, OSError)
+        self._client = redis_asyncio.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._client.get(self.prefix + key)
+
+    async def set(self, key: str, value: str):
+        await self._client.set(self.prefix + key, value, ex=int(self.ttl) if self.ttl > 0 else None)
+
+    async def close(self):
+        await self._client.aclose()
+
+
+def make_backend(name: str, size: int, ttl: float, url: str = ""):
+    """
+    Erzeugt das konfigurierte Backend (None = Cache deaktiviert)
+    """
+    if name == "off":
+        return None
+    if name == "disk":
+        return DiskBackend(url or "llm_cache.sqlite3", size, ttl)
+    if name == "redis":
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("LLM_CACHE_BACKEND=redis benötigt das Paket 'redis'")
+        return RedisBackend(url or "redis://localhost:6379/0", ttl)
+    return MemoryBackend(size, ttl)
+
+
+class ResponseCache:
+    """
+    Cache mit Single-Flight und Kennzahlen
+
+    Attribute:
+        hits / misses: Treffer bzw. Fehlschläge
+        errors: Fehler des Backends (get: zusätzlich als Fehlschlag gezählt, set: nicht gespeichert)
+        saved_seconds: geschätzte eingesparte Modell-Latenz (Treffer × mittlere Erzeugungsdauer)
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.errors = 0
+        self._erzeugt = 0
+        self._erzeugungszeit = 0.0
+        self.saved_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def get_or_create(
+        self,
+        key: str,
+        erzeugen: Callable[[], Awaitable[Optional[str]]],
+        speicherbar: Callable[[str], bool],
+    ) -> Optional[str]:
+        """
+        Liefert die gecachte Antwort oder erzeugt sie (einmal pro Schlüssel gleichzeitig)
+
+        Args:
+            key: Cache-Schlüssel
+            erzeugen: erzeugt die Antwort bei einem Fehlschlag
+            speicherbar: nur Antworten, für die dies True liefert, werden gespeichert
+        """
+        if self.backend is None:
+            return await erzeugen()
+        wert = await self.get(key)
+        if wert is not None:
+            return wert
+        return await self._flight.do(key, lambda: self._erzeugen(key, erzeugen, speicherbar))
+
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Nachschlagen ohne Erzeugung (zählt Treffer und Fehlschläge)
+        """
+        if self.backend is None:
+            return None
+        try:
+            wert = await self.backend.get(key)
+        except self.backend.errors as e:
+            self._fehler("get", e)
+            wert = None
+        if wert is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self._erzeugt:
+            self.saved_seconds += self._erzeugungszeit / self._erzeugt
+        return wert
+
+    async def store(self, key: str, wert: str, dauer: float):
+        """
+        Speichert eine anderweitig erzeugte (bereits geprüfte) Antwort
+
+        Args:
+            dauer: Erzeugungsdauer in Sekunden (für latency_saved_seconds)
+        """
+        if self.backend is None:
+            return
+        self._erzeugt += 1
+        self._erzeugungszeit += dauer
+        try:
+            await self.backend.set(key, wert)
+            self.stored += 1
+        except self.backend.errors as e:
+            self._fehler("set", e)
+
+    def _fehler(self, operation: str, e: BaseException):
+        self.errors += 1
+        logger.warning("LLM-Cache %s (%s) fehlgeschlagen: %r", operation, type(self.backend).__name__, e)
+
+    async def _erzeugen(self, key, erzeugen, speicherbar) -> Optional[str]:
+        start = time.perf_counter()
+        wert = await erzeugen()
+        if wert and speicherbar(wert):
+            await self.store(key, wert, time.perf_counter() - start)
+        return wert
+
+    def info(self) -> dict:
+        anfragen = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self._flight.coalesced,
+            "stored": self.stored,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / anfragen, 4) if anfragen else 0.0,
+            "avg_generation_seconds": round(self._erzeugungszeit / self._erzeugt, 4) if self._erzeugt else None,
+            "latency_saved_seconds": round(self.saved_seconds, 3),
+        }
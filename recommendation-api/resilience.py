@@ -0,0 +1,131 @@
+"""
+Schutz vor langsamen oder ausgefallenen Upstream-Diensten
+
+- ``Deadline``: Zeitbudget einer Anfrage, das sich alle Stufen teilen
+  (Verbrauchsdaten, Retrieval, Modellaufruf); jede Stufe wartet höchstens
+  den Rest des Budgets bzw. ihre eigene Obergrenze
+- ``CircuitBreaker``: zählt Erfolge/Fehlschläge über ein gleitendes Fenster;
+  ab einer Fehlerquote wird der Kreis geöffnet und Aufrufe scheitern sofort.
+  Nach der Abkühlzeit lässt der halboffene Zustand einzelne Probeaufrufe
+  durch: Erfolg schließt den Kreis, ein Fehlschlag öffnet ihn erneut.
+"""
+import time
+from collections import deque
+from typing import Callable, Optional
+
+GESCHLOSSEN = "geschlossen"
+OFFEN = "offen"
+HALBOFFEN = "halboffen"
+
+
+class Deadline:
+    """
+    Zeitbudget einer Anfrage
+
+    Args:
+        seconds: Gesamtbudget in Sekunden
+    """
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self.ende = clock() + seconds
+
+    def remaining(self, cap: Optional[float] = None) -> float:
+        """
+        Verbleibende Zeit (nie negativ), optional begrenzt auf cap
+        """
+        rest = max(0.0, self.ende - self._clock())
+        return rest if cap is None else min(rest, cap)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+class CircuitBreaker:
+    """
+    Leistungsschalter für einen Upstream-Dienst
+
+    Args:
+        failure_rate: Fehlerquote im Fenster, ab der geöffnet wird
+        window: Anzahl der letzten Aufrufe im Fenster
+        min_calls: Mindestanzahl Aufrufe im Fenster, bevor geöffnet werden kann
+        cooldown: Sekunden im offenen Zustand bis zur ersten Probe
+        half_open_probes: gleichzeitig erlaubte Probeaufrufe im halboffenen Zustand
+
+    Attribute:
+        rejected: sofort abgewiesene Aufrufe
+        opened: Anzahl Öffnungen
+    """
+
+    def __init__(self, failure_rate: float = 0.5, window: int = 20, min_calls: int = 5,
+                 cooldown: float = 10.0, half_open_probes: int = 1,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.half_open_probes = half_open_probes
+        self._clock = clock
+        self._fenster: deque = deque(maxlen=window)
+        self._zustand = GESCHLOSSEN
+        self._geoeffnet_um = 0.0
+        self._proben = 0
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._zustand == OFFEN and self._clock() - self._geoeffnet_um >= self.cooldown:
+            self._zustand = HALBOFFEN
+            self._proben = 0
+        return self._zustand
+
+    def allow(self) -> bool:
+        """
+        True, wenn ein Aufruf erfolgen darf (danach record() aufrufen)
+        """
+        zustand = self.state
+        if zustand == GESCHLOSSEN:
+            return True
+        if zustand == HALBOFFEN and self._proben < self.half_open_probes:
+            self._proben += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def record(self, erfolg: bool):
+        """
+        Meldet das Ergebnis eines erlaubten Aufrufs
+        """
+        if self._zustand == HALBOFFEN:
+            if erfolg:
+                self._zustand = GESCHLOSSEN
+                self._fenster.clear()
+            else:
+                self._oeffnen()
+            return
+        if self._zustand == OFFEN:
+            return  # verspätetes Ergebnis eines Aufrufs von vor dem Öffnen
+        self._fenster.append(erfolg)
+        if len(self._fenster) >= self.min_calls and self.current_failure_rate() >= self.failure_rate:
+            self._oeffnen()
+
+    def _oeffnen(self):
+        self._zustand = OFFEN
+        self._geoeffnet_um = self._clock()
+        self._fenster.clear()
+        self.opened += 1
+
+    def current_failure_rate(self) -> float:
+        if not self._fenster:
+            return 0.0
+        return self._fenster.count(False) / len(self._fenster)
+
+    def info(self) -> dict:
+        return {
+            "state": self.state,
+            "failure_rate": round(self.current_failure_rate(), 4),
+            "window_calls": len(self._fenster),
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,183 @@
+"""
+Kompilierter Sicherheitsfilter für AI-Texte
+
+Alle Begriffe aller Kategorien werden einmalig zu einem einzigen regulären
+Ausdruck kompiliert. Die Alternation wird dabei als Präfixbaum (Trie)
+aufgebaut, z.B. ``sicherung(?:en entfernen| entfernen| überbrücken)``, sodass
+Begriffe mit gemeinsamem Präfix nur einmal verglichen werden. Ein Aufruf
+liefert jeden Treffer mit Kategorie und Position.
+
+Zum Aufwand: ``re`` ist ein Backtracking-Automat, die Suche bleibt also im
+schlechtesten Fall O(Textlänge × Begriffe); der Trie verringert nur den
+Faktor. Gemessen (benchmarks/bench_safety_filter.py, 300/1500 Zeichen):
+bei den 14 eingebauten Begriffen 0,6–0,9× so schnell wie die bisherigen
+``in``-Schleifen (etwa 10 µs statt 9 µs je Text, gegenüber dem Modellaufruf
+vernachlässigbar), bei 200 Begriffen 1,0–1,4×, bei 800 Begriffen 2,6–3,8×.
+Der Filter ist damit vor allem für eigene, größere Listen
+(SAFETY_TERMS_FILE), Trefferpositionen und ``StreamGuard`` da.
+
+Semantik wie bisher: ein Begriff trifft, sobald er als Teilstring im
+kleingeschriebenen Text vorkommt.
+
+Für gestreamte Antworten prüft ``StreamGuard`` jeden neuen Chunk zusammen mit
+den letzten ``max_laenge - 1`` Zeichen davor und hält ebenso viele Zeichen am
+Ende zurück. Ein Begriff, der über Chunk-Grenzen verteilt ankommt, wird so
+erkannt, bevor ein Teil davon freigegeben wurde.
+"""
+import json
+import re
+from typing import Dict, List, NamedTuple
+
+# KRITISCHE SICHERHEITSFILTER - MÜSSEN ERHALTEN BLEIBEN!
+DEFAULT_TERMS: Dict[str, List[str]] = {
+    "verbotene_begriffe": [
+        "hauptschalter ausschalten",
+        "stromzähler manipulieren",
+        "sicherungen entfernen",
+        "sicherung entfernen",
+        "elektrische anlage öffnen",
+        "kabel durchtrennen",
+        "elektrische installation",
+        "verkabelung ändern",
+        "sicherung überbrücken"
+    ],
+    # Zusätzliche gefährliche Wörter (einzeln)
+    "gefaehrliche_woerter": ["hochspannung", "starkstrom", "manipulation", "überbrücken", "manipulieren"]
+}
+
+# Meldung, die eine unsichere AI-Antwort ersetzt
+UNSICHER_MELDUNG = "Keine genauen Angaben möglich; unsichere Empfehlung erkannt. Hier sind bewährte allgemeine Tipps."
+
+
+class Treffer(NamedTuple):
+    """Ein Treffer; Positionen beziehen sich auf den kleingeschriebenen Text"""
+    begriff: str
+    kategorie: str
+    start: int
+    ende: int
+
+
+def _trie_pattern(begriffe: List[str]) -> str:
+    """
+    Baut aus den Begriffen eine präfix-faktorisierte Alternation (längster Treffer zuerst)
+    """
+    trie: dict = {}
+    for begriff in begriffe:
+        knoten = trie
+        for zeichen in begriff:
+            knoten = knoten.setdefault(zeichen, {})
+        knoten[""] = {}
+
+    def muster(knoten: dict) -> str:
+        kinder = [re.escape(z) + muster(k) for z, k in sorted(knoten.items()) if z]
+        if not kinder:
+            return ""
+        if len(kinder) == 1 and "" not in knoten:
+            return kinder[0]
+        # Endet hier ebenfalls ein Begriff, ist die Fortsetzung optional (gierig → längster Treffer)
+        return "(?:" + "|".join(kinder) + ")" + ("?" if "" in knoten else "")
+
+    return muster(trie)
+
+
+class SafetyFilter:
+    """
+    Prüft Texte in einem Durchlauf gegen alle Begriffslisten
+
+    Args:
+        terms: Kategorie → Liste von Begriffen (Groß-/Kleinschreibung egal)
+    """
+
+    def __init__(self, terms: Dict[str, List[str]]):
+        self.kategorie: Dict[str, str] = {}
+        for kategorie, begriffe in terms.items():
+            for begriff in begriffe:
+                self.kategorie.setdefault(begriff.lower(), kategorie)
+        self.max_laenge = max((len(b) for b in self.kategorie), default=0)
+        alternation = _trie_pattern(list(self.kategorie))
+        # search(): erster Treffer; finditer() mit Lookahead: Treffer an jeder Startposition
+        self._regex = re.compile(alternation) if alternation else None
+        self._alle = re.compile(f"(?=({alternation}))") if alternation else None
+
+    def is_unsafe(self, text: str) -> bool:
+        """
+        True, sobald ein Begriff im Text vorkommt
+        """
+        return self._regex is not None and self._regex.search(text.lower()) is not None
+
+    def matches(self, text: str) -> List[Treffer]:
+        """
+        Alle Treffer mit Kategorie (je Startposition der längste Begriff)
+        """
+        if self._alle is None:
+            return []
+        ergebnis = []
+        for m in self._alle.finditer(text.lower()):
+            begriff = m.group(1)
+            ergebnis.append(Treffer(begriff, self.kategorie[begriff], m.start(), m.start() + len(begriff)))
+        return ergebnis
+
+
+class StreamGuard:
+    """
+    Inkrementeller Sicherheitsfilter für einen Token-Stream
+
+    Attribute:
+        blockiert: True, sobald ein Begriff erkannt wurde (danach wird nichts mehr freigegeben)
+        text: bisher empfangener Gesamttext
+    """
+
+    def __init__(self, safety_filter: SafetyFilter):
+        self._filter = safety_filter
+        self._halten = max(safety_filter.max_laenge - 1, 0)
+        self.text = ""
+        self._geprueft = 0
+        self._freigegeben = 0
+        self.blockiert = False
+
+    def feed(self, chunk: str) -> str:
+        """
+        Nimmt einen Chunk auf und liefert den Teil, der sicher gesendet werden kann
+
+        Geprüft wird nur das Fenster aus neuem Chunk und den letzten
+        max_laenge - 1 Zeichen davor; jeder Begriff, der den neuen Chunk
+        berührt, liegt vollständig darin.
+        """
+        if self.blockiert:
+            return ""
+        self.text += chunk
+        fenster = self.text[max(0, self._geprueft - self._halten):]
+        self._geprueft = len(self.text)
+        if self._filter.is_unsafe(fenster):
+            self.blockiert = True
+            return ""
+        # Das Ende zurückhalten: es könnte der Anfang eines Begriffs sein
+        ende = max(self._freigegeben, len(self.text) - self._halten)
+        frei = self.text[self._freigegeben:ende]
+        self._freigegeben = ende
+        return frei
+
+    def finish(self) -> str:
+        """
+        Stream-Ende: gibt den zurückgehaltenen Rest frei (leer, falls blockiert)
+        """
+        if self.blockiert:
+            return ""
+        frei = self.text[self._freigegeben:]
+        self._freigegeben = len(self.text)
+        return frei
+
+
+def load_terms(path: str | None) -> Dict[str, List[str]]:
+    """
+    Lädt Begriffslisten aus einer JSON-Datei ({"kategorie": ["begriff", ...]})
+
+    Ohne Pfad werden die eingebauten Listen verwendet.
+    """
+    if not path:
+        return DEFAULT_TERMS
+    with open(path, encoding="utf-8") as f:
+        terms = json.load(f)
+    if not isinstance(terms, dict) or not all(isinstance(v, list) for v in terms.values()):
+        raise ValueError(f"{path}: erwartet ein Objekt Kategorie → Liste von Begriffen")
+    return terms
@@ -0,0 +1,38 @@
+"""
+Single-Flight-Koaleszierung für asynchrone Aufrufe
+
+Gleichzeitige Aufrufe mit demselben Schlüssel teilen sich einen einzigen
+laufenden Aufruf; alle Wartenden erhalten dasselbe Ergebnis (oder dieselbe
+Ausnahme). Nach Abschluss wird der Schlüssel wieder freigegeben.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Bündelt gleichzeitige Aufrufe pro Schlüssel zu einem Upstream-Aufruf
+
+    Attribute:
+        calls: Anzahl tatsächlich ausgeführter Aufrufe
+        coalesced: Anzahl Aufrufe, die sich einem laufenden Aufruf angeschlossen haben
+    """
+
+    def __init__(self):
+        self._laufend: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._laufend.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._laufend[key] = task
+            task.add_done_callback(lambda _t, k=key: self._laufend.pop(k, None))
+        else:
+            self.coalesced += 1
+        # shield: Abbruch eines Wartenden bricht den gemeinsamen Aufruf nicht ab
+        return await asyncio.shield(task)
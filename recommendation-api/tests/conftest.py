@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""Tests der recommendation-api: Module liegen flach im Dienstverzeichnis, common/ im Repository."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Tests des Antwort-Caches (llm_cache.py): Verhalten bei Fehlern des Backends.
+"""
+
+import asyncio
+import logging
+
+import pytest
+
+from llm_cache import DiskBackend, MemoryBackend, ResponseCache
+
+
+def test_memory_backend():
+    cache = ResponseCache(MemoryBackend(16, 60))
+    asyncio.run(cache.store("k", "tipps", 0.5))
+    assert asyncio.run(cache.get("k")) == "tipps"
+    assert cache.info()["hits"] == 1 and cache.info()["errors"] == 0
+
+
+def test_disk_backend_fehler_werden_gezaehlt_und_protokolliert(tmp_path, caplog):
+    backend = DiskBackend(str(tmp_path / "cache.sqlite3"), 16, 60)
+    cache = ResponseCache(backend)
+    asyncio.run(cache.store("k", "tipps", 0.5))
+    assert asyncio.run(cache.get("k")) == "tipps"
+
+    asyncio.run(backend.close())  # jeder weitere Zugriff: sqlite3.ProgrammingError
+    with caplog.at_level(logging.WARNING, logger="llm_cache"):
+        assert asyncio.run(cache.get("k")) is None
+        asyncio.run(cache.store("k2", "tipps", 0.5))
+    info = cache.info()
+    assert info["errors"] == 2
+    assert info["misses"] == 1 and info["stored"] == 1
+    assert [r.levelno for r in caplog.records] == [logging.WARNING, logging.WARNING]
+    assert "DiskBackend" in caplog.records[0].getMessage()
+
+
+def test_unerwartete_fehler_werden_nicht_verschluckt():
+    class KaputtesBackend(MemoryBackend):
+        async def get(self, key):
+            raise TypeError("Programmierfehler")
+
+    cache = ResponseCache(KaputtesBackend(16, 60))
+    with pytest.raises(TypeError):
+        asyncio.run(cache.get("k"))
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Tests der gemeinsamen Metriken (common/metrics.py): Fehler beim Auslesen und Profiling.
+"""
+
+import logging
+from collections import Counter
+
+import pytest
+
+from common.metrics import Registry, RequestProfiler
+
+
+class _Abtaster:
+    def beenden(self):
+        return Counter({"a;b": 3})
+
+
+def test_profiler_schreibt_stichprobe(tmp_path):
+    profiler = RequestProfiler(1.0, str(tmp_path / "profile"))
+    profiler.stop(_Abtaster(), "/tips", 0.25)
+    assert profiler.samples == 1 and profiler.errors == 0
+    (datei,) = (tmp_path / "profile").iterdir()
+    assert datei.read_text(encoding="utf-8") == "a;b 3\n"
+
+
+def test_profiler_zaehlt_und_protokolliert_schreibfehler(tmp_path, caplog):
+    blockiert = tmp_path / "datei"
+    blockiert.write_text("")
+    profiler = RequestProfiler(1.0, str(blockiert / "profile"))  # Verzeichnis unter einer Datei
+    with caplog.at_level(logging.ERROR, logger="common.metrics"):
+        profiler.stop(_Abtaster(), "/tips", 0.25)
+    assert profiler.samples == 0 and profiler.errors == 1
+    assert "/tips" in caplog.records[0].getMessage()
+    assert not profiler._aktiv  # nächste Stichprobe bleibt möglich
+
+
+def test_callback_fehler_wird_gezaehlt(caplog):
+    metriken = Registry("t_")
+    metriken.callback("ok", "ok", lambda: 1)
+    kaputt = metriken.callback("kaputt", "kaputt", lambda: None.info())
+    with caplog.at_level(logging.ERROR, logger="common.metrics"):
+        text = metriken.render()
+    assert "t_ok 1" in text and "t_kaputt" not in text
+    assert kaputt.errors == 1
+    assert "t_kaputt" in caplog.records[0].getMessage()
+
+
+def test_unerwartete_callback_fehler_werden_nicht_verschluckt():
+    metriken = Registry("t_")
+
+    def fehler():
+        raise RuntimeError("Programmierfehler")
+
+    metriken.callback("kaputt", "kaputt", fehler)
+    with pytest.raises(RuntimeError):
+        metriken.render()
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Tests des kompilierten Sicherheitsfilters (safety_filter.py).
+
+Semantik: ein Begriff trifft, sobald er als Teilstring im kleingeschriebenen
+Text vorkommt (keine Wortgrenzen), wie die ursprünglichen ``in``-Schleifen.
+"""
+
+import random
+
+import pytest
+
+from safety_filter import DEFAULT_TERMS, UNSICHER_MELDUNG, SafetyFilter, StreamGuard, load_terms
+
+
+@pytest.fixture(scope="module")
+def sicherheitsfilter() -> SafetyFilter:
+    return SafetyFilter(DEFAULT_TERMS)
+
+
+def filter_vorher(llm_text: str) -> str:
+    """Ursprüngliche Logik aus dem /tips-Handler (Referenz)."""
+    llm_lower = llm_text.lower()
+    for begriff in DEFAULT_TERMS["verbotene_begriffe"]:
+        if begriff in llm_lower:
+            return UNSICHER_MELDUNG
+    for wort in DEFAULT_TERMS["gefaehrliche_woerter"]:
+        if wort in llm_lower:
+            return UNSICHER_MELDUNG
+    return llm_text
+
+
+@pytest.mark.parametrize("text, unsicher", [
+    ("Nutzen Sie LED-Lampen und schalten Sie Standby-Geräte aus.", False),
+    ("Waschen Sie bei 30°C statt 60°C.", False),
+    ("", False),
+    ("Sie sollten den Hauptschalter ausschalten, bevor Sie gehen.", True),
+    ("Stromzähler manipulieren ist strafbar.", True),
+    ("Die elektrische Installation prüfen lassen.", True),
+    ("Elektrische Geräte ausschalten.", False),
+])
+def test_feste_faelle(sicherheitsfilter, text, unsicher):
+    assert sicherheitsfilter.is_unsafe(text) is unsicher
+
+
+@pytest.mark.parametrize("text", [
+    "HOCHSPANNUNG ist gefährlich.",
+    "Hochspannung ist gefährlich.",
+    "hOcHsPaNnUnG",
+    "KABEL DURCHTRENNEN",
+])
+def test_gross_kleinschreibung(sicherheitsfilter, text):
+    assert sicherheitsfilter.is_unsafe(text)
+
+
+@pytest.mark.parametrize("text, unsicher", [
+    ("Eine Sicherung ÜBERBRÜCKEN spart nichts.", True),
+    ("Das Überbrücken von Kontakten ist verboten.", True),
+    ("STROMZÄHLER MANIPULIEREN", True),
+    ("Elektrische Anlage ÖFFNEN", True),
+    ("Ueberbruecken", False),  # Umschreibung ohne Umlaut ist kein Treffer
+])
+def test_umlaute(sicherheitsfilter, text, unsicher):
+    assert sicherheitsfilter.is_unsafe(text) is unsicher
+
+
+@pytest.mark.parametrize("text, unsicher", [
+    ("Starkstromanschluss nur vom Fachbetrieb.", True),   # Teilstring innerhalb eines Wortes
+    ("Keine Manipulationen am Zähler.", True),
+    ("Sicherungenentfernen", False),                        # Leerzeichen gehört zum Begriff
+    ("Sicherungen sind wichtig.", False),
+    ("sicherungen entfernen", True),
+])
+def test_teilstrings_ohne_wortgrenzen(sicherheitsfilter, text, unsicher):
+    assert sicherheitsfilter.is_unsafe(text) is unsicher
+
+
+def test_ueberlappende_begriffe_mit_kategorie(sicherheitsfilter):
+    treffer = sicherheitsfilter.matches("Sicherung überbrücken oder Hochspannung")
+    paare = {(t.begriff, t.kategorie) for t in treffer}
+    assert ("sicherung überbrücken", "verbotene_begriffe") in paare
+    assert ("überbrücken", "gefaehrliche_woerter") in paare
+    assert ("hochspannung", "gefaehrliche_woerter") in paare
+
+
+def test_laengster_begriff_je_startposition(sicherheitsfilter):
+    text = "bitte keine sicherungen entfernen"
+    treffer = sicherheitsfilter.matches(text)
+    assert [t.begriff for t in treffer] == ["sicherungen entfernen"]
+    t = treffer[0]
+    assert text[t.start:t.ende] == t.begriff
+
+
+def test_gleiche_entscheidung_wie_bisherige_schleifen(sicherheitsfilter):
+    zufall = random.Random(1)
+    woerter = ("energie sparen led standby gerät kühlschrank deckel waschen heizung "
+               "sicherung kabel strom zähler schalter anlage elektrische").split()
+    alle = [t for liste in DEFAULT_TERMS.values() for t in liste]
+    for i in range(2000):
+        teile = [zufall.choice(woerter) for _ in range(50)]
+        if i % 4 == 0:
+            teile.insert(zufall.randrange(len(teile)), zufall.choice(alle).upper())
+        text = " ".join(teile)
+        vorher = filter_vorher(text) == UNSICHER_MELDUNG
+        assert sicherheitsfilter.is_unsafe(text) is vorher, text
+        if vorher:
+            assert sicherheitsfilter.matches(text)
+
+
+def test_ohne_begriffe():
+    leer = SafetyFilter({})
+    assert not leer.is_unsafe("Hochspannung")
+    assert leer.matches("Hochspannung") == []
+
+
+def test_stream_guard_begriff_ueber_chunk_grenzen(sicherheitsfilter):
+    guard = StreamGuard(sicherheitsfilter)
+    gesendet = ""
+    for chunk in ("Bitte die Siche", "rung über", "brücken, dann ..."):
+        gesendet += guard.feed(chunk)
+    gesendet += guard.finish()
+    assert guard.blockiert
+    assert "sicherung" not in gesendet.lower()
+
+
+def test_stream_guard_gibt_sicheren_text_vollstaendig_frei(sicherheitsfilter):
+    text = "Nutzen Sie LED-Lampen und waschen Sie bei 30°C."
+    guard = StreamGuard(sicherheitsfilter)
+    gesendet = "".join(guard.feed(text[i:i + 3]) for i in range(0, len(text), 3)) + guard.finish()
+    assert not guard.blockiert
+    assert gesendet == text
+
+
+def test_load_terms(tmp_path):
+    assert load_terms(None) is DEFAULT_TERMS
+    datei = tmp_path / "begriffe.json"
+    datei.write_text('{"eigene": ["Gasleitung"]}', encoding="utf-8")
+    assert SafetyFilter(load_terms(str(datei))).is_unsafe("die GASLEITUNG")
+    datei.write_text('["kein", "objekt"]', encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_terms(str(datei))
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Tests der Verbrauchsquelle "inprocess" (usage_provider.py) und der Obergrenze für days.
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from usage_provider import InProcessUsageProvider
+
+SIM_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "usage-sim-api")
+
+
+@pytest.fixture
+def quelle() -> InProcessUsageProvider:
+    return InProcessUsageProvider(SIM_PATH, 8 * 1024 * 1024)
+
+
+def test_gleicher_durchschnitt_mit_und_ohne_cache(quelle):
+    kalt = asyncio.run(quelle.avg(30, timeout=5))
+    warm = asyncio.run(quelle.avg(30, timeout=5))
+    assert warm == kalt == quelle.stats(30)["avg"]
+
+
+def test_belegter_cache_blockiert_event_loop_nicht(quelle):
+    asyncio.run(quelle.avg(30, timeout=5))  # Fenster liegt im Cache
+    gehalten = threading.Event()
+
+    def erweitern_simulieren():
+        with quelle.cache._lock:
+            gehalten.set()
+            time.sleep(0.5)
+
+    thread = threading.Thread(target=erweitern_simulieren)
+    thread.start()
+    gehalten.wait()
+
+    async def ablauf():
+        ticks = 0
+
+        async def uhr():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        taktgeber = asyncio.create_task(uhr())
+        avg = await quelle.avg(30, timeout=5)
+        taktgeber.cancel()
+        return avg, ticks
+
+    avg, ticks = asyncio.run(ablauf())
+    thread.join()
+    assert avg == quelle.stats(30)["avg"]
+    assert ticks >= 10  # der Loop lief weiter, während auf den Lock gewartet wurde
+
+
+@pytest.mark.parametrize("pfad", ["/tips", "/tips/stream"])
+def test_days_obergrenze(pfad):
+    r = TestClient(app.app).post(pfad, json={"days": app.TIPS_MAX_DAYS + 1})
+    assert r.status_code == 400, r.text
+
+
+def test_days_obergrenze_batch():
+    items = [{"days": 7}, {"days": app.TIPS_MAX_DAYS + 1}]
+    r = TestClient(app.app).post("/tips/batch", json={"items": items})
+    assert r.status_code == 400, r.text
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Tests der Ausfallsicherheit beim Abruf der Verbrauchsdaten (get_avg in app.py).
+
+Die Verbrauchsquelle wird durch eine steuerbare Attrappe ersetzt, der
+Leistungsschalter bekommt eine künstliche Uhr. Geprüft werden Ablauf der
+Frist, Öffnen des Schalters, Erholung über den halboffenen Zustand und der
+Rückgriff auf den letzten gültigen Durchschnitt.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+import app
+from resilience import GESCHLOSSEN, HALBOFFEN, OFFEN, CircuitBreaker, Deadline
+from singleflight import SingleFlight
+from ttl_cache import TTLCache
+from usage_provider import UsageUnavailable
+
+COOLDOWN = 10.0
+
+
+class Uhr:
+    """Künstliche Uhr für Leistungsschalter und Fristen."""
+
+    def __init__(self):
+        self.jetzt = 0.0
+
+    def __call__(self) -> float:
+        return self.jetzt
+
+
+class Verbrauchsquelle:
+    """Attrappe der Verbrauchsquelle: gesund, langsam oder ausgefallen."""
+
+    def __init__(self, wert: float = 0.47):
+        self.wert = wert
+        self.latenz = 0.0
+        self.ausfall = False
+        self.aufrufe = 0
+
+    async def avg(self, days: int, timeout: float) -> float:
+        self.aufrufe += 1
+        if self.latenz:
+            await asyncio.sleep(self.latenz)
+        if self.ausfall:
+            raise UsageUnavailable("status 500")
+        return self.wert
+
+    async def warm(self):
+        pass
+
+
+@pytest.fixture
+def uhr() -> Uhr:
+    return Uhr()
+
+
+@pytest.fixture
+def quelle(monkeypatch, uhr) -> Verbrauchsquelle:
+    q = Verbrauchsquelle()
+    monkeypatch.setattr(app, "usage_provider", q)
+    monkeypatch.setattr(app, "stats_flight", SingleFlight())
+    monkeypatch.setattr(app, "last_good_avg", TTLCache(1024, app.USAGE_LAST_GOOD_TTL))
+    monkeypatch.setattr(app, "usage_breaker", CircuitBreaker(
+        failure_rate=0.5, window=10, min_calls=3, cooldown=COOLDOWN, clock=uhr))
+    monkeypatch.setattr(app, "USAGE_DEADLINE", 0.05)
+    return q
+
+
+def abrufen(days: int = 7, deadline: Deadline | None = None) -> float | None:
+    return asyncio.run(app.get_avg(days, deadline))
+
+
+def test_gesunde_quelle(quelle):
+    assert abrufen() == pytest.approx(0.47)
+    assert app.usage_breaker.state == GESCHLOSSEN
+    assert app.last_good_avg.get(7) == pytest.approx(0.47)
+
+
+def test_frist_begrenzt_langsame_quelle(quelle):
+    quelle.latenz = 5.0
+    start = time.perf_counter()
+    assert abrufen() is None
+    assert time.perf_counter() - start < 1.0
+
+
+def test_frist_aus_anfrage_budget(quelle):
+    quelle.latenz = 5.0
+    start = time.perf_counter()
+    assert abrufen(deadline=Deadline(0.01)) is None
+    assert time.perf_counter() - start < app.USAGE_DEADLINE + 0.5
+
+
+def test_letzter_gueltiger_durchschnitt_bei_ausfall(quelle):
+    assert abrufen() == pytest.approx(0.47)
+    vorher = app.usage_fallbacks.value()
+    quelle.ausfall = True
+    assert abrufen() == pytest.approx(0.47)
+    assert app.usage_fallbacks.value() == vorher + 1
+    # für andere days gibt es keinen gültigen Wert
+    assert abrufen(30) is None
+
+
+def test_letzter_gueltiger_durchschnitt_bei_ablauf_der_frist(quelle):
+    assert abrufen() == pytest.approx(0.47)
+    quelle.latenz = 5.0
+    assert abrufen() == pytest.approx(0.47)
+
+
+def test_ohne_letzten_gueltigen_durchschnitt(quelle, monkeypatch):
+    monkeypatch.setattr(app, "USAGE_LAST_GOOD_TTL", 0)
+    assert abrufen() == pytest.approx(0.47)
+    quelle.ausfall = True
+    assert abrufen() is None
+
+
+def test_schalter_oeffnet_und_weist_ab(quelle):
+    quelle.ausfall = True
+    for _ in range(3):
+        assert abrufen() is None
+    assert app.usage_breaker.state == OFFEN
+    assert quelle.aufrufe == 3
+    assert abrufen() is None
+    assert quelle.aufrufe == 3  # offener Kreis: kein Aufruf der Quelle
+    assert app.usage_breaker.rejected == 1
+
+
+def test_halboffene_probe_schliesst_kreis(quelle, uhr):
+    quelle.ausfall = True
+    for _ in range(3):
+        abrufen()
+    assert app.usage_breaker.state == OFFEN
+    uhr.jetzt += COOLDOWN
+    assert app.usage_breaker.state == HALBOFFEN
+    quelle.ausfall = False
+    assert abrufen() == pytest.approx(0.47)
+    assert app.usage_breaker.state == GESCHLOSSEN
+    assert quelle.aufrufe == 4
+
+
+def test_halboffene_probe_scheitert(quelle, uhr):
+    quelle.ausfall = True
+    for _ in range(3):
+        abrufen()
+    uhr.jetzt += COOLDOWN
+    assert abrufen() is None
+    assert app.usage_breaker.state == OFFEN
+    assert app.usage_breaker.opened == 2
+    uhr.jetzt += COOLDOWN - 1
+    abrufen()
+    assert quelle.aufrufe == 4  # Abkühlzeit beginnt neu
+
+
+def test_nur_eine_probe_im_halboffenen_zustand(uhr):
+    schalter = CircuitBreaker(failure_rate=0.5, window=10, min_calls=2, cooldown=COOLDOWN, clock=uhr)
+    schalter.record(False)
+    schalter.record(False)
+    uhr.jetzt += COOLDOWN
+    assert schalter.allow()
+    assert not schalter.allow()
+    schalter.record(True)
+    assert schalter.state == GESCHLOSSEN and schalter.allow()
+
+
+def test_min_calls_vor_dem_oeffnen(uhr):
+    schalter = CircuitBreaker(failure_rate=0.5, window=10, min_calls=5, cooldown=COOLDOWN, clock=uhr)
+    for _ in range(4):
+        schalter.record(False)
+    assert schalter.state == GESCHLOSSEN
+    schalter.record(False)
+    assert schalter.state == OFFEN
+
+
+def test_deadline(uhr):
+    frist = Deadline(2.0, clock=uhr)
+    assert frist.remaining() == 2.0
+    assert frist.remaining(cap=0.5) == 0.5
+    uhr.jetzt += 1.5
+    assert frist.remaining() == pytest.approx(0.5)
+    uhr.jetzt += 1.0
+    assert frist.remaining() == 0.0 and frist.expired
@@ -0,0 +1,67 @@
+"""
+Größenbegrenzter In-Memory-Cache mit LRU-Verdrängung und TTL
+
+Einträge verfallen nach ttl Sekunden (ttl <= 0: kein Verfall); ist maxsize
+erreicht, wird der am längsten nicht genutzte Eintrag verdrängt.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+_FEHLT = object()
+
+
+class TTLCache:
+    """
+    LRU-Cache mit Ablaufzeit und Trefferzählern
+
+    Attribute:
+        hits: Anzahl Treffer
+        misses: Anzahl Fehlschläge (inkl. abgelaufener Einträge)
+        evictions: Anzahl verdrängter Einträge
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 3600.0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._daten: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        eintrag = self._daten.get(key, _FEHLT)
+        if eintrag is _FEHLT or (self.ttl > 0 and eintrag[0] <= self._clock()):
+            if eintrag is not _FEHLT:
+                del self._daten[key]
+            self.misses += 1
+            return default
+        self._daten.move_to_end(key)
+        self.hits += 1
+        return eintrag[1]
+
+    def set(self, key: Hashable, value: Any):
+        self._daten[key] = (self._clock() + self.ttl, value)
+        self._daten.move_to_end(key)
+        while len(self._daten) > self.maxsize:
+            self._daten.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._daten.clear()
+
+    def __len__(self) -> int:
+        return len(self._daten)
+
+    def info(self) -> dict:
+        anfragen = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / anfragen, 4) if anfragen else 0.0,
+            "size": len(self._daten),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+        }
@@ -0,0 +1,117 @@
+"""
+Quelle der Verbrauchsdaten für /tips
+
+Backends:
+- "http":      GET /stats der usage-sim-api über den gemeinsamen Verbindungspool (Standard)
+- "inprocess": ruft den Statistik-Kern der usage-sim-api (``usage_stats.window_stats``)
+               direkt im selben Prozess auf, ohne HTTP-Umweg. Für Einzelknoten-
+               Installationen, in denen beide Dienste nebeneinander liegen; der
+               Code wird aus USAGE_SIM_PATH geladen und hält einen eigenen
+               Rollup-Cache.
+"""
+import asyncio
+import importlib
+import sys
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    import httpx
+
+
+class UsageUnavailable(Exception):
+    """
+    Die Quelle hat keinen gültigen Durchschnitt geliefert (Nachricht = Fehlertyp)
+    """
+
+
+class HttpUsageProvider:
+    """
+    Durchschnitt über GET {base_url}/stats
+
+    Args:
+        base_url: Basis-URL der usage-sim-api
+        client: liefert den gemeinsamen HTTP-Client
+    """
+
+    name = "http"
+
+    def __init__(self, base_url: str, client: Callable[[], "httpx.AsyncClient"]):
+        self.base_url = base_url
+        self._client = client
+
+    async def avg(self, days: int, timeout: float) -> float:
+        r = await self._client().get(f"{self.base_url}/stats", params={"days": days}, timeout=timeout)
+        if r.status_code != 200:
+            raise UsageUnavailable(f"http_{r.status_code}")
+        daten = r.json()
+        if "avg" not in daten:
+            raise UsageUnavailable("ohne_avg")
+        return float(daten["avg"])
+
+    async def warm(self, timeout: float):
+        """
+        Baut eine erste Verbindung zur usage-sim-api auf
+        """
+        await self._client().get(f"{self.base_url}/", timeout=timeout)
+
+
+class InProcessUsageProvider:
+    """
+    Durchschnitt direkt aus dem Statistik-Kern der usage-sim-api
+
+    Fenster, die der Rollup-Cache schon abdeckt, werden direkt nachgeschlagen,
+    sofern der Lock des Caches frei ist; alles andere (Erweiterung des Caches,
+    Durchlauf bei großen Fenstern, Warten auf eine laufende Erweiterung) läuft
+    in einem Thread. Den Zeitrahmen setzt der Aufrufer über asyncio.wait_for.
+
+    Args:
+        path: Verzeichnis mit dem Code der usage-sim-api
+        cache_bytes: Speicherobergrenze des Rollup-Caches
+        block_days: Tage pro Block bei Fenstern am Cache vorbei
+    """
+
+    name = "inprocess"
+
+    def __init__(self, path: str, cache_bytes: int, block_days: int = 30):
+        # Anhängen statt voranstellen: gleichnamige eigene Module haben Vorrang
+        if path not in sys.path:
+            sys.path.append(path)
+        try:
+            usage_stats = importlib.import_module("usage_stats")
+            series_cache = importlib.import_module("series_cache")
+        except ImportError as e:
+            raise RuntimeError(f"USAGE_PROVIDER=inprocess: usage-sim-api nicht unter {path} gefunden") from e
+        self._window_stats = usage_stats.window_stats
+        self.cache = series_cache.SeriesCache(cache_bytes)
+        self.block_days = block_days
+
+    def stats(self, days: int) -> dict:
+        if days < 1:
+            raise UsageUnavailable("http_400")  # wie /stats der usage-sim-api
+        return self._window_stats(self.cache, days, block_days=self.block_days)
+
+    async def avg(self, days: int, timeout: float) -> float:
+        if days >= 1:
+            # try_stats wartet nie: blockiert den Event-Loop nicht, während ein Thread den Cache erweitert
+            werte = self.cache.try_stats(days)
+            if werte is not None:
+                return round(werte[0], 3)
+        return float((await asyncio.to_thread(self.stats, days))["avg"])
+
+    async def warm(self, timeout: float):
+        """
+        Legt den Rollup-Cache für die Standard-Fenster an
+        """
+        await asyncio.to_thread(self.stats, 30)
+
+
+def make_provider(name: str, usage_api: str, client: Callable[[], "httpx.AsyncClient"],
+                  sim_path: str, cache_bytes: int):
+    """
+    Erzeugt die konfigurierte Quelle der Verbrauchsdaten
+    """
+    if name == "inprocess":
+        return InProcessUsageProvider(sim_path, cache_bytes)
+    if name != "http":
+        raise RuntimeError(f"Unbekannter USAGE_PROVIDER '{name}' (erlaubt: http, inprocess)")
+    return HttpUsageProvider(usage_api, client)
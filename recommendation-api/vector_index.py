@@ -0,0 +1,140 @@
+"""
+Index-Backends für das Tipp-Retrieval
+
+Alle Vektoren sind L2-normalisiert, das Skalarprodukt entspricht also der
+Kosinus-Ähnlichkeit. Jedes Backend bietet ``search(queries, k)`` mit der
+Rückgabe von faiss: (scores, indices), aufgefüllt mit -1 bzw. -inf.
+
+Backends:
+- "numpy": exakte Suche ohne faiss; blockweises Matrix-Vektor-Produkt mit
+           argpartition-Top-k (für kleine Kataloge und Hosts ohne faiss)
+- "flat":  faiss.IndexFlatIP, exakt
+- "ivf":   faiss.IndexIVFFlat; nlist Zellen, bei der Suche nprobe Zellen
+- "hnsw":  faiss.IndexHNSWFlat; M Nachbarn, efConstruction beim Bau, efSearch bei der Suche
+- "auto":  "flat", falls faiss installiert ist, sonst "numpy"
+"""
+from typing import TYPE_CHECKING, NamedTuple, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+BACKENDS = ("numpy", "flat", "ivf", "hnsw")
+FAISS_BACKENDS = ("flat", "ivf", "hnsw")
+# faiss empfiehlt mindestens 39 Trainingsvektoren je IVF-Zelle
+IVF_MIN_PUNKTE_JE_ZELLE = 39
+
+
+class IndexParams(NamedTuple):
+    ivf_nlist: int = 256
+    ivf_nprobe: int = 8
+    hnsw_m: int = 32
+    hnsw_ef_construction: int = 200
+    hnsw_ef_search: int = 64
+    numpy_block: int = 65536
+
+
+def resolve_backend(name: str, faiss_available: bool) -> str:
+    """
+    Wählt das Backend; faiss-Backends ohne installiertes faiss fallen auf "numpy" zurück
+    """
+    if name == "auto":
+        return "flat" if faiss_available else "numpy"
+    if name not in BACKENDS:
+        raise ValueError(f"Unbekanntes Index-Backend '{name}' (erlaubt: auto, {', '.join(BACKENDS)})")
+    if name in FAISS_BACKENDS and not faiss_available:
+        return "numpy"
+    return name
+
+
+def index_tag(backend: str, params: IndexParams) -> str:
+    """
+    Dateikennung eines faiss-Index (nur Bau-Parameter; "" für flat)
+    """
+    if backend == "ivf":
+        return f"ivf{params.ivf_nlist}"
+    if backend == "hnsw":
+        return f"hnsw{params.hnsw_m}-{params.hnsw_ef_construction}"
+    return ""
+
+
+def normalize(vektoren) -> "np.ndarray":
+    """
+    L2-normalisierte float32-Kopie (Nullvektoren bleiben null)
+    """
+    import numpy as np
+    v = np.array(vektoren, dtype="float32", ndmin=2)
+    norm = np.linalg.norm(v, axis=1, keepdims=True)
+    return v / np.where(norm > 0, norm, 1.0)
+
+
+class NumpyIndex:
+    """
+    Exakter Inner-Product-Index auf einem (ggf. memory-mapped) Vektor-Array
+
+    Die Scores werden blockweise über ``block`` Katalogzeilen berechnet; pro
+    Block bleiben nur die besten k Kandidaten je Query übrig.
+    """
+
+    def __init__(self, vektoren: "np.ndarray", block: int = 65536):
+        self.vektoren = vektoren
+        self.block = max(block, 1)
+
+    @property
+    def ntotal(self) -> int:
+        return len(self.vektoren)
+
+    def search(self, queries: "np.ndarray", k: int) -> Tuple["np.ndarray", "np.ndarray"]:
+        import numpy as np
+        queries = np.asarray(queries, dtype="float32")
+        n = len(queries)
+        scores = np.full((n, k), -np.inf, dtype="float32")
+        indices = np.full((n, k), -1, dtype="int64")
+        for start in range(0, self.ntotal, self.block):
+            teil = queries @ np.asarray(self.vektoren[start:start + self.block]).T
+            kandidaten = min(k, teil.shape[1])
+            if kandidaten < teil.shape[1]:
+                auswahl = np.argpartition(-teil, kandidaten - 1, axis=1)[:, :kandidaten]
+            else:
+                auswahl = np.broadcast_to(np.arange(teil.shape[1]), teil.shape)
+            alle_scores = np.concatenate([scores, np.take_along_axis(teil, auswahl, axis=1)], axis=1)
+            alle_indices = np.concatenate([indices, auswahl + start], axis=1)
+            beste = np.argsort(-alle_scores, axis=1, kind="stable")[:, :k]
+            scores = np.take_along_axis(alle_scores, beste, axis=1)
+            indices = np.take_along_axis(alle_indices, beste, axis=1)
+        return scores, indices
+
+
+def build_index(backend: str, vektoren: "np.ndarray", params: IndexParams, faiss=None):
+    """
+    Baut den Index über normalisierte Vektoren
+    """
+    import numpy as np
+    if backend == "numpy":
+        return NumpyIndex(vektoren, params.numpy_block)
+    vektoren = np.ascontiguousarray(vektoren, dtype="float32")
+    n, dim = vektoren.shape
+    if backend == "ivf":
+        nlist = max(1, min(params.ivf_nlist, n // IVF_MIN_PUNKTE_JE_ZELLE))
+        quantizer = faiss.IndexFlatIP(dim)
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.cp.min_points_per_centroid = min(index.cp.min_points_per_centroid, max(1, n // nlist))
+        index.train(vektoren)
+    elif backend == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, params.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = params.hnsw_ef_construction
+    else:
+        index = faiss.IndexFlatIP(dim)
+    index.add(vektoren)
+    configure(index, backend, params, faiss)
+    return index
+
+
+def configure(index, backend: str, params: IndexParams, faiss=None):
+    """
+    Setzt die Suchparameter (auch nach dem Laden von Platte)
+    """
+    if backend == "ivf":
+        faiss.extract_index_ivf(index).nprobe = params.ivf_nprobe
+    elif backend == "hnsw":
+        index.hnsw.efSearch = params.hnsw_ef_search
+    return index
@@ -4,15 +4,78 @@ usage-sim-api
 -------------
 Einfache Simulations-API für Stromverbrauchsdaten.
 - /simulate: Gibt stündliche oder tägliche Dummy-Verbrauchswerte zurück.
-- /stats:    Liefert Basisstatistiken (Durchschnitt/Min/Max) über N Tage.
+- /stats:    Liefert Statistiken (Durchschnitt/Min/Max, optional Varianz,
+             Perzentile, gleitende Mittel und Spitzenstunden) über N Tage.
+- /meters/ingest: Nimmt echte Zählerstände (CSV, NDJSON, binär) entgegen;
+             /simulate und /stats liefern sie mit ``meter_id`` in derselben Form.
+- /metrics:  Kennzahlen im Prometheus-Format.
 
-Hinweis: Es handelt sich um simulierte Daten, nicht um echte Messwerte.
+Hinweis: Ohne ``meter_id`` handelt es sich um simulierte Daten, nicht um echte Messwerte.
 """
 
-from fastapi import FastAPI, HTTPException
-import random, math
+import os
+import sys
+from contextlib import asynccontextmanager
+import numpy as np
+from fastapi import FastAPI, HTTPException, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from simulation import gen_hourly_arrays, daily_sums, rows_from_arrays, iter_blocks, hour_index
+from series_cache import SeriesCache
+from formats import ENCODERS, TABLE_ENCODERS, MEDIA_TYPES, MAX_DAY, available_formats, negotiate_format
+from households import iter_batch, shutdown_pools
+from streaming_stats import METRICS
+from usage_stats import meter_stats, window_stats
+from meter_store import MeterSeries, MeterStore
+from meter_ingest import PARSERS, ingest_format
+# common/ liegt im Repository neben den Diensten, im Container unter /app/common
+_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if os.path.isdir(os.path.join(_REPO, "common")) and _REPO not in sys.path:
+    sys.path.append(_REPO)
+from common.metrics import CONTENT_TYPE, MetricsMiddleware, Registry, RequestProfiler, cache_callbacks
 
-app = FastAPI(title="usage-sim-api")
+# Tage pro Block im Streaming-Modus (begrenzt den Speicherbedarf pro Anfrage)
+STREAM_BLOCK_DAYS = int(os.getenv("STREAM_BLOCK_DAYS", "30"))
+# Speicherobergrenze des Rollup-Caches in MB
+SERIES_CACHE_MAX_MB = float(os.getenv("SERIES_CACHE_MAX_MB", "64"))
+# Obergrenzen für die Anzahl Haushalte und Tage pro Batch-Anfrage
+BATCH_MAX_HOUSEHOLDS = int(os.getenv("BATCH_MAX_HOUSEHOLDS", "100000"))
+BATCH_MAX_DAYS = int(os.getenv("BATCH_MAX_DAYS", "3660"))
+# Profiling-Stichproben: Anteil der Anfragen (0 = aus), Zielverzeichnis, Abtastintervall (s)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+# Zählerstände: Speicherverzeichnis, Epoche (Tag 0, erster eines Monats, UTC),
+# maximale Größe einer Ingest-Anfrage in MB, erlaubte Tage in der Zukunft (Uhrenabweichung)
+METER_STORE_DIR = os.getenv("METER_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "meter_data"))
+METER_EPOCH = os.getenv("METER_EPOCH", "2020-01-01")
+METER_INGEST_MAX_MB = float(os.getenv("METER_INGEST_MAX_MB", "64"))
+METER_MAX_FUTURE_DAYS = float(os.getenv("METER_MAX_FUTURE_DAYS", "7"))
+
+series_cache = SeriesCache(int(SERIES_CACHE_MAX_MB * 1024 * 1024))
+meter_store: MeterStore | None = None
+
+# Metriken: Dauer je Stufe, ausgelieferte Formate, Rollup-Cache
+metrics = Registry("usage_")
+stage_seconds = metrics.histogram("stage_duration_seconds", "Dauer je Verarbeitungsstufe", ("stufe",))
+responses = metrics.counter("responses_total", "Antworten je Endpunkt und Format", ("endpunkt", "format"))
+cache_callbacks(metrics, {"rollup": series_cache.info})
+metrics.callback("cache_bypasses_total", "Anfragen am Rollup-Cache vorbei (Fenster zu groß)",
+                 lambda: series_cache.info()["bypasses"], typ="counter")
+metrics.callback("meter_readings_total", "Eingelieferte Zählerstände",
+                 lambda: meter_store.ingested if meter_store else 0, typ="counter")
+profiler = RequestProfiler(PROFILE_SAMPLE_RATE, PROFILE_DIR, PROFILE_INTERVAL)
+metrics.callback("profile_samples_total", "Geschriebene Profiling-Stichproben", lambda: profiler.samples, typ="counter")
+metrics.callback("profile_errors_total", "Nicht geschriebene Profiling-Stichproben", lambda: profiler.errors, typ="counter")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Beendet beim Herunterfahren die Prozess-Pools der Batch-Simulation."""
+    yield
+    await run_in_threadpool(shutdown_pools)
+
+app = FastAPI(title="usage-sim-api", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware, registry=metrics, profiler=profiler)
 
 @app.get("/")
 def root():
@@ -24,49 +87,260 @@ def root():
         "version": "1.0.0",
         "beschreibung": "Simulations-API für Stromverbrauchsdaten",
         "verfuegbare_endpunkte": {
-            "/simulate": "GET - Simulierte Verbrauchsdaten",
-            "/stats": "GET - Basisstatistiken über N Tage"
+            "/simulate": "GET - Simulierte Verbrauchsdaten (JSON, NDJSON-Stream oder spaltenbasiert binär)",
+            "/simulate/batch": "GET - Aggregate für viele Haushalte (NDJSON-Stream oder spaltenbasiert)",
+            "/stats": "GET - Statistiken über N Tage (Basis, Varianz, Perzentile, gleitende Mittel, Spitzen)",
+            "/meters/ingest": "POST - Zählerstände einliefern (CSV, NDJSON oder binär)",
+            "/meters": "GET - Bekannte Zähler mit Zeitraum und Anzahl Werte",
+            "/cache": "GET - Zähler und Speicherbelegung des Rollup-Caches",
+            "/metrics": "GET - Kennzahlen im Prometheus-Format"
         },
-        "hinweis": "Es handelt sich um simulierte Daten, nicht um echte Messwerte."
+        "hinweis": "Ohne meter_id handelt es sich um simulierte Daten, nicht um echte Messwerte."
     }
 
-def gen_hourly(days: int = 7):
-    """Erzeugt stündliche Verbrauchswerte (kWh) für mehrere Tage."""
-    random.seed(42)  # Reproduzierbare Werte
-    data = []
-    for d in range(days):
-        for h in range(24):
-            # Einfache Tageskurve + abendliche Spitze + leichte Zufallsschwankung
-            basis = 0.4 + 0.2 * math.sin(h / 24 * 2 * math.pi)
-            abend_peak = 0.6 if 18 <= h <= 22 else 0.0
-            kwh = round(max(0.1, basis + abend_peak + random.uniform(-0.1, 0.1)), 3)
-            data.append({"day": d, "hour": h, "kwh": kwh})
-    return data
+def get_meter_store() -> MeterStore:
+    """Liefert den Speicher der Zählerstände (wird beim ersten Zugriff geöffnet)."""
+    global meter_store
+    if meter_store is None:
+        meter_store = MeterStore(METER_STORE_DIR, METER_EPOCH, METER_MAX_FUTURE_DAYS)
+    return meter_store
+
+def get_meter(meter_id: str) -> MeterSeries:
+    """Zähler ``meter_id`` oder 404."""
+    serie = get_meter_store().get(meter_id)
+    if serie is None:
+        raise HTTPException(404, f"Unbekannter Zähler '{meter_id}'.")
+    return serie
+
+def gen_hourly(days: int = 7, start_day: int = 0):
+    """Erzeugt stündliche Verbrauchswerte (kWh) für mehrere Tage als Zeilen."""
+    return rows_from_arrays(*gen_hourly_arrays(days, start_day))
+
+def ndjson_stream(granularity: str, days: int, start_day: int = 0):
+    """Liefert die Verbrauchsdaten als NDJSON, ein Chunk pro Block."""
+    for day, hour, kwh in iter_blocks(days, start_day, STREAM_BLOCK_DAYS):
+        if granularity == "day":
+            zeilen = (
+                f'{{"day":{d},"kwh":{v}}}\n'
+                for d, v in zip(day[::24].tolist(), daily_sums(kwh).tolist())
+            )
+        else:
+            zeilen = (
+                f'{{"day":{d},"hour":{h},"kwh":{k}}}\n'
+                for d, h, k in zip(day.tolist(), hour.tolist(), kwh.tolist())
+            )
+        yield "".join(zeilen).encode()
+
+def meter_ndjson_stream(serie: MeterSeries, granularity: str, days: int, start_day: int = 0):
+    """Wie ``ndjson_stream`` für einen Zähler; Stunden/Tage ohne Messung mit "kwh":null."""
+    for offset in range(0, max(days, 0), STREAM_BLOCK_DAYS):
+        n = min(STREAM_BLOCK_DAYS, days - offset)
+        if granularity == "day":
+            werte = serie.daily(n, start_day + offset)
+            zeilen = (f'{{"day":{d},"kwh":{_json_wert(v)}}}\n' for d, v in enumerate(werte.tolist(), start_day + offset))
+        else:
+            day, hour = hour_index(n, start_day + offset)
+            werte = serie.hourly(n, start_day + offset)
+            zeilen = (
+                f'{{"day":{d},"hour":{h},"kwh":{_json_wert(k)}}}\n'
+                for d, h, k in zip(day.tolist(), hour.tolist(), werte.tolist())
+            )
+        yield "".join(zeilen).encode()
+
+def _json_wert(kwh: float) -> str:
+    return "null" if kwh != kwh else repr(kwh)
+
+def series_window(granularity: str, days: int, start_day: int = 0, serie: MeterSeries | None = None):
+    """
+    Stündliche Werte oder Tagessummen des Fensters, bevorzugt aus dem Rollup-Cache
+    (bzw. aus dem Speicher des Zählers ``serie``, NaN = keine Messung).
+    """
+    if serie is not None:
+        with stage_seconds.time(stufe="zaehler_rollups"):
+            return serie.daily(days, start_day) if granularity == "day" else serie.hourly(days, start_day)
+    with stage_seconds.time(stufe="rollup_cache"):
+        store = series_cache.get(start_day + days)
+    if store is None:
+        with stage_seconds.time(stufe="generierung"):
+            _, _, kwh = gen_hourly_arrays(days, start_day)
+            return daily_sums(kwh) if granularity == "day" else kwh
+    if granularity == "day":
+        return store.daily(days, start_day)
+    return store.hourly(days, start_day)
 
 @app.get("/simulate")
-def simulate(granularity: str = "hour", days: int = 7):
+def simulate(
+    granularity: str = "hour",
+    days: int = 7,
+    start_day: int = 0,
+    format: str | None = None,
+    meter_id: str | None = None,
+    accept: str | None = Header(None),
+):
     """
     Liefert simulierte Verbrauchsdaten.
     - granularity: "hour" oder "day"
     - days: Anzahl der simulierten Tage
+    - start_day: Erster Tag des Zeitfensters (Standard: 0; start_day + days höchstens 2³¹ − 1)
+    - format: "json" (Liste), "ndjson" (gestreamt, eine Zeile pro Wert) oder
+      spaltenbasiert "float32", "msgpack", "arrow". Ohne Angabe wird das Format
+      über den Accept-Header bestimmt (Standard: "json").
+    - meter_id: statt der Simulation die Messwerte dieses Zählers (Tag 0 =
+      METER_EPOCH); ohne Messung ist kwh null (JSON/NDJSON) bzw. NaN (binär)
     """
     if granularity not in {"hour", "day"}:
         raise HTTPException(400, "granularity muss 'hour' oder 'day' sein.")
-    stunden = gen_hourly(days)
-    if granularity == "day":
-        summen = {}
-        for r in stunden:
-            summen[r["day"]] = summen.get(r["day"], 0.0) + r["kwh"]
-        return [{"day": d, "kwh": round(v, 3)} for d, v in summen.items()]
-    return stunden
+    if start_day < 0:
+        raise HTTPException(400, "start_day darf nicht negativ sein.")
+    if days < 0:
+        raise HTTPException(400, "days darf nicht negativ sein.")
+    if start_day + days > MAX_DAY:
+        raise HTTPException(400, f"start_day + days darf höchstens {MAX_DAY} sein.")
+    format = format or negotiate_format(accept)
+    if format not in MEDIA_TYPES:
+        raise HTTPException(400, f"format muss eines von {sorted(MEDIA_TYPES)} sein.")
+    if format not in available_formats():
+        raise HTTPException(406, f"format '{format}' ist auf diesem Server nicht verfügbar.")
+    serie = get_meter(meter_id) if meter_id is not None else None
+    responses.inc(endpunkt="/simulate", format=format)
+    if format == "ndjson":
+        if serie is not None:
+            return StreamingResponse(meter_ndjson_stream(serie, granularity, days, start_day),
+                                     media_type=MEDIA_TYPES["ndjson"])
+        return StreamingResponse(ndjson_stream(granularity, days, start_day), media_type=MEDIA_TYPES["ndjson"])
+    werte = series_window(granularity, days, start_day, serie)
+    with stage_seconds.time(stufe="kodierung"):
+        if format != "json":
+            return Response(ENCODERS[format](granularity, werte, start_day), media_type=MEDIA_TYPES[format])
+        if serie is not None:
+            werte = np.where(np.isnan(werte), None, werte)
+        if granularity == "day":
+            return [{"day": d, "kwh": v} for d, v in enumerate(werte.tolist(), start=start_day)]
+        return rows_from_arrays(*hour_index(days, start_day), werte)
+
+def batch_ndjson_stream(households: int, days: int, start_day: int = 0):
+    """Liefert die Haushalts-Aggregate als NDJSON, ein Chunk pro Shard."""
+    for shard in iter_batch(households, days, start_day):
+        namen = list(shard)
+        spalten = zip(*(shard[n].tolist() for n in namen))
+        yield "".join(
+            "{" + ",".join(f'"{n}":{v}' for n, v in zip(namen, zeile)) + "}\n" for zeile in spalten
+        ).encode()
+
+@app.get("/simulate/batch")
+def simulate_batch(households: int = 100, days: int = 7, start_day: int = 0, format: str = "ndjson"):
+    """
+    Simuliert viele Haushalte mit eigenem Seed und Profil und liefert Aggregate
+    pro Haushalt (total_kwh, avg, min, max, peak_hour).
+    - households: Anzahl der Haushalte
+    - days: Anzahl der simulierten Tage
+    - start_day: Erster Tag des Zeitfensters (Standard: 0; start_day + days höchstens 2³¹ − 1)
+    - format: "ndjson" (gestreamt pro Shard), "json", "msgpack" oder "arrow"
+    """
+    if not 1 <= households <= BATCH_MAX_HOUSEHOLDS:
+        raise HTTPException(400, f"households muss zwischen 1 und {BATCH_MAX_HOUSEHOLDS} liegen.")
+    if not 1 <= days <= BATCH_MAX_DAYS:
+        raise HTTPException(400, f"days muss zwischen 1 und {BATCH_MAX_DAYS} liegen.")
+    if start_day < 0:
+        raise HTTPException(400, "start_day darf nicht negativ sein.")
+    if start_day + days > MAX_DAY:
+        raise HTTPException(400, f"start_day + days darf höchstens {MAX_DAY} sein.")
+    if format not in {"ndjson", "json", *TABLE_ENCODERS}:
+        raise HTTPException(400, "format muss 'ndjson', 'json', 'msgpack' oder 'arrow' sein.")
+    if format not in available_formats():
+        raise HTTPException(406, f"format '{format}' ist auf diesem Server nicht verfügbar.")
+    responses.inc(endpunkt="/simulate/batch", format=format)
+    if format == "ndjson":
+        return StreamingResponse(batch_ndjson_stream(households, days, start_day), media_type=MEDIA_TYPES["ndjson"])
+    with stage_seconds.time(stufe="batch_simulation"):
+        shards = list(iter_batch(households, days, start_day))
+        spalten = {name: np.concatenate([s[name] for s in shards]) for name in shards[0]}
+    with stage_seconds.time(stufe="kodierung"):
+        if format == "json":
+            return [dict(zip(spalten, zeile)) for zeile in zip(*(a.tolist() for a in spalten.values()))]
+        meta = {"households": households, "days": days, "start_day": start_day}
+        return Response(TABLE_ENCODERS[format](spalten, meta), media_type=MEDIA_TYPES[format])
 
 @app.get("/stats")
-def stats(days: int = 7):
-    """Berechnet Durchschnitt/Min/Max über stündliche Werte der letzten N Tage."""
-    werte = [r["kwh"] for r in gen_hourly(days)]
+def stats(days: int = 7, start_day: int = 0, metrics: str = "basic", top_k: int = 5, meter_id: str | None = None):
+    """
+    Berechnet Statistiken über stündliche Werte von N Tagen ab start_day.
+    - metrics: kommagetrennte Auswahl aus "basic" (Durchschnitt/Min/Max),
+      "variance", "percentiles" (p50/p95/p99), "rolling" (gleitende 24h/7d-Mittel),
+      "peaks" (Top-K-Stunden) oder "all"
+    - top_k: Anzahl der Spitzenstunden bei "peaks"
+    - meter_id: statt der Simulation die Messwerte dieses Zählers (nur Stunden mit Messung)
+
+    Durchschnitt/Min/Max kommen aus dem Rollup-Cache (bzw. den Tages- und
+    Monats-Rollups des Zählers); alle weiteren Kennzahlen werden in einem
+    Durchlauf über den blockweise erzeugten Datenstrom berechnet.
+    """
+    if start_day < 0:
+        raise HTTPException(400, "start_day darf nicht negativ sein.")
+    if days < 1:
+        raise HTTPException(400, "days muss mindestens 1 sein.")
+    gewuenscht = set(METRICS) if metrics == "all" else {m.strip() for m in metrics.split(",") if m.strip()}
+    if not gewuenscht <= set(METRICS):
+        raise HTTPException(400, f"metrics muss aus {list(METRICS)} oder 'all' bestehen.")
+    if not 1 <= top_k <= 1000:
+        raise HTTPException(400, "top_k muss zwischen 1 und 1000 liegen.")
+    timer = lambda stufe: stage_seconds.time(stufe=stufe)  # noqa: E731
+    if meter_id is not None:
+        ergebnis = meter_stats(get_meter(meter_id), days, start_day, gewuenscht - {"basic"}, top_k,
+                               STREAM_BLOCK_DAYS, timer=timer)
+        if ergebnis is None:
+            raise HTTPException(404, f"Keine Messwerte für Zähler '{meter_id}' im Zeitraum.")
+        return ergebnis
+    return window_stats(series_cache, days, start_day, gewuenscht - {"basic"}, top_k, STREAM_BLOCK_DAYS,
+                        timer=timer)
+
+@app.post("/meters/ingest")
+async def meters_ingest(request: Request, format: str | None = None):
+    """
+    Nimmt einen Stapel Zählerstände (meter_id, timestamp, kwh) entgegen.
+    - format: "csv", "ndjson" oder "binary"; ohne Angabe über den Content-Type
+      (text/csv, application/x-ndjson, application/octet-stream)
+
+    Der Stapel wird vollständig geprüft, bevor etwas gespeichert wird; bei
+    Fehlern antwortet der Endpunkt mit 400 und der betroffenen Zeile bzw.
+    dem betroffenen Block.
+    """
+    format = format or ingest_format(request.headers.get("content-type"))
+    if format not in PARSERS:
+        raise HTTPException(400, f"format muss eines von {sorted(PARSERS)} sein (oder per Content-Type).")
+    grenze = int(METER_INGEST_MAX_MB * 1024 * 1024)
+    if int(request.headers.get("content-length") or 0) > grenze:
+        raise HTTPException(413, f"Anfrage größer als {METER_INGEST_MAX_MB} MB.")
+    daten = bytearray()
+    async for teil in request.stream():
+        daten += teil
+        if len(daten) > grenze:
+            raise HTTPException(413, f"Anfrage größer als {METER_INGEST_MAX_MB} MB.")
+    try:
+        with stage_seconds.time(stufe="ingest_parsen"):
+            spalten = await run_in_threadpool(PARSERS[format], bytes(daten))
+        with stage_seconds.time(stufe="ingest_speichern"):
+            angenommen = await run_in_threadpool(get_meter_store().ingest, *spalten)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    responses.inc(endpunkt="/meters/ingest", format=format)
+    return {"werte": sum(angenommen.values()), "zaehler": angenommen}
+
+@app.get("/meters")
+def meters():
+    """Bekannte Zähler mit erstem/letztem Tag, Stunden mit Messung und Anzahl Rohwerte."""
+    store = get_meter_store()
     return {
-        "days": days,
-        "avg": round(sum(werte) / len(werte), 3),
-        "max": round(max(werte), 3),
-        "min": round(min(werte), 3),
+        "epoche": METER_EPOCH,
+        "zaehler": {meter_id: store.get(meter_id).info() for meter_id in store.meter_ids()},
     }
+
+@app.get("/cache")
+def cache_info():
+    """Zähler (hits/misses/bypasses), abgedeckte Tage und Speicherbelegung des Rollup-Caches."""
+    return series_cache.info()
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Kennzahlen im Prometheus-Textformat (Anfragedauer, Dauer je Stufe, Formate, Rollup-Cache)."""
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Kompakte Antwortformate für /simulate.
+
+Die Reihe wird spaltenweise direkt aus den Arrays der Engine kodiert, ohne
+Zwischenobjekte pro Zeile:
+- "float32": gepackter Little-Endian-Puffer mit 16-Byte-Header
+- "msgpack": Map mit Spalten-Arrays (optional, benötigt ``msgpack``)
+- "arrow":   Arrow-IPC-Stream mit einem Record-Batch (optional, benötigt ``pyarrow``)
+
+msgpack und Arrow stehen über ``TABLE_ENCODERS`` auch für beliebige Tabellen
+(z.B. Haushalts-Aggregate aus /simulate/batch) zur Verfügung.
+
+Header des float32-Formats (``<4sBBHII``):
+    magic b"ESIM", version (1), granularity (0 = hour, 1 = day),
+    reserviert (0), start_day, Anzahl Werte
+Tag und Stunde ergeben sich aus start_day und der Position im Puffer.
+"""
+
+import struct
+
+import numpy as np
+
+from simulation import hour_index
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+    msgpack = None
+
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+    pa = None
+
+FLOAT32_MAGIC = b"ESIM"
+FLOAT32_VERSION = 1
+FLOAT32_HEADER = struct.Struct("<4sBBHII")
+# Letzter Tag, den alle Formate darstellen können (Arrow-Spalte day ist int32,
+# start_day im float32-Header uint32)
+MAX_DAY = 2**31 - 1
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "float32": "application/octet-stream",
+    "msgpack": "application/msgpack",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+# Zusätzliche Accept-Werte, die auf ein Format abgebildet werden
+_ALIASE = {"application/x-msgpack": "msgpack"}
+
+
+def available_formats() -> set[str]:
+    """Formate, die in diesem Prozess kodiert werden können."""
+    formate = {"json", "ndjson", "float32"}
+    if MSGPACK_AVAILABLE:
+        formate.add("msgpack")
+    if ARROW_AVAILABLE:
+        formate.add("arrow")
+    return formate
+
+
+def negotiate_format(accept: str | None) -> str:
+    """
+    Wählt das Antwortformat anhand des Accept-Headers (Reihenfolge der Angabe).
+
+    Unbekannte oder nicht installierte Formate werden übersprungen, Standard ist "json".
+    """
+    formate = available_formats()
+    nach_typ = {typ: fmt for fmt, typ in MEDIA_TYPES.items()} | _ALIASE
+    for teil in (accept or "").split(","):
+        fmt = nach_typ.get(teil.split(";")[0].strip().lower())
+        if fmt in formate:
+            return fmt
+    return "json"
+
+
+def _spalten(granularity: str, werte: np.ndarray, start_day: int) -> dict[str, np.ndarray]:
+    """Spalten der Antwort: day (+ hour bei stündlicher Auflösung) und kwh."""
+    if granularity == "day":
+        return {"day": np.arange(start_day, start_day + len(werte)), "kwh": werte}
+    day, hour = hour_index(len(werte) // 24, start_day)
+    return {"day": day, "hour": hour, "kwh": werte}
+
+
+def encode_float32(granularity: str, werte: np.ndarray, start_day: int) -> bytes:
+    """Packt die Werte als Little-Endian-float32 hinter den Header."""
+    header = FLOAT32_HEADER.pack(
+        FLOAT32_MAGIC, FLOAT32_VERSION, 1 if granularity == "day" else 0, 0, start_day, len(werte)
+    )
+    return header + werte.astype("<f4").tobytes()
+
+
+def table_msgpack(spalten: dict[str, np.ndarray], meta: dict | None = None) -> bytes:
+    """Kodiert beliebige Spalten als msgpack-Map von Arrays (plus Metadaten)."""
+    return msgpack.packb({**(meta or {}), **{name: arr.tolist() for name, arr in spalten.items()}})
+
+
+# Kompakte Arrow-Typen für bekannte Spalten, alle übrigen werden abgeleitet
+_ARROW_TYPEN = {"day": "int32", "hour": "int8", "kwh": "float64"}
+
+
+def table_arrow(spalten: dict[str, np.ndarray], meta: dict | None = None) -> bytes:
+    """Kodiert beliebige Spalten als Arrow-IPC-Stream (Metadaten im Schema)."""
+    batch = pa.record_batch(
+        [pa.array(arr, type=_ARROW_TYPEN.get(name)) for name, arr in spalten.items()],
+        names=list(spalten),
+    )
+    schema = batch.schema.with_metadata({k: str(v) for k, v in (meta or {}).items()})
+    senke = pa.BufferOutputStream()
+    with pa.ipc.new_stream(senke, schema) as writer:
+        writer.write_batch(batch.replace_schema_metadata(schema.metadata))
+    return senke.getvalue().to_pybytes()
+
+
+def encode_msgpack(granularity: str, werte: np.ndarray, start_day: int) -> bytes:
+    """Kodiert die Spalten der Reihe als msgpack-Map von Arrays."""
+    return table_msgpack(
+        _spalten(granularity, werte, start_day), {"granularity": granularity, "start_day": start_day}
+    )
+
+
+def encode_arrow(granularity: str, werte: np.ndarray, start_day: int) -> bytes:
+    """Kodiert die Spalten der Reihe als Arrow-IPC-Stream."""
+    return table_arrow(
+        _spalten(granularity, werte, start_day), {"granularity": granularity, "start_day": start_day}
+    )
+
+
+ENCODERS = {
+    "float32": encode_float32,
+    "msgpack": encode_msgpack,
+    "arrow": encode_arrow,
+}
+
+TABLE_ENCODERS = {
+    "msgpack": table_msgpack,
+    "arrow": table_arrow,
+}
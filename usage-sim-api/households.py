@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Batch-Simulation vieler Haushalte.
+
+Jeder Haushalt hat einen eigenen Philox-Schlüssel (Seed im unteren, Haushalts-
+nummer + 1 im oberen 64-Bit-Wort) und daraus abgeleitete Profilparameter:
+Grundlast, Beginn der abendlichen Spitze und Rauschamplitude. Die Kurven
+werden als 2-D-Array (Haushalte × Stunden) berechnet; große Anfragen werden
+in Shards zerlegt und über einen Prozess-Pool auf alle Kerne verteilt, sodass
+der GIL den Durchsatz nicht begrenzt.
+
+Die Werte eines Haushalts hängen nur von Seed, Haushaltsnummer und Zeitfenster
+ab, nicht von der Shard-Aufteilung.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from simulation import SEED, STUNDEN_PRO_TAG, uniform_window
+
+# Zählerbereich für die Profilparameter (getrennt vom Stundenstrom ab Zähler 0)
+_PROFIL_ZAEHLER = 1 << 128
+_STUNDEN = np.arange(STUNDEN_PRO_TAG)
+_SPITZEN_DAUER = 5
+
+# Maximale Anzahl Stundenwerte pro Shard (begrenzt den Speicher je Worker)
+SHARD_VALUES = int(os.getenv("BATCH_SHARD_VALUES", "2000000"))
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", str(os.cpu_count() or 1)))
+
+# Kein fork: der Pool entsteht erst bei der ersten Batch-Anfrage in einem Thread des
+# laufenden Servers, und ein geforkter Prozess erbte Locks, die andere Threads gerade halten
+_MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+_pools: dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def household_key(household: int, seed: int = SEED) -> int:
+    """128-Bit-Philox-Schlüssel eines Haushalts."""
+    return seed | ((household + 1) << 64)
+
+
+def household_profile(household: int, seed: int = SEED) -> dict:
+    """Profilparameter eines Haushalts (deterministisch aus Seed und Nummer)."""
+    rng = np.random.Generator(np.random.Philox(key=household_key(household, seed), counter=_PROFIL_ZAEHLER))
+    grundlast, spitze, rauschen = rng.random(3)
+    return {
+        "grundlast": round(float(0.25 + 0.3 * grundlast), 3),
+        "spitze_ab": 16 + int(spitze * 5),
+        "rauschen": round(float(0.05 + 0.1 * rauschen), 3),
+    }
+
+
+def households_hourly(first: int, count: int, days: int, start_day: int = 0, seed: int = SEED) -> np.ndarray:
+    """
+    Stündliche Werte (kWh) der Haushalte [first, first + count) als 2-D-Array.
+
+    Returns:
+        Array der Form (count, days * 24)
+    """
+    profile = [household_profile(h, seed) for h in range(first, first + count)]
+    grundlast = np.array([p["grundlast"] for p in profile])[:, None]
+    spitze_ab = np.array([p["spitze_ab"] for p in profile])[:, None]
+    amplitude = np.array([p["rauschen"] for p in profile])[:, None]
+
+    tageskurve = grundlast + 0.2 * np.sin(_STUNDEN / 24 * 2 * np.pi)
+    tageskurve += np.where((_STUNDEN >= spitze_ab) & (_STUNDEN < spitze_ab + _SPITZEN_DAUER), 0.6, 0.0)
+    gleich = np.stack([
+        uniform_window(household_key(h, seed), start_day * STUNDEN_PRO_TAG, days * STUNDEN_PRO_TAG)
+        for h in range(first, first + count)
+    ]) if count else np.empty((0, days * STUNDEN_PRO_TAG))
+    rauschen = amplitude * (2 * gleich - 1)
+    return np.round(np.maximum(0.1, np.tile(tageskurve, days) + rauschen), 3)
+
+
+def shard_aggregates(first: int, count: int, days: int, start_day: int = 0, seed: int = SEED) -> dict[str, np.ndarray]:
+    """Aggregate pro Haushalt (Summe, Durchschnitt, Min, Max, Spitzenstunde) für einen Shard."""
+    werte = households_hourly(first, count, days, start_day, seed)
+    stunden_mittel = werte.reshape(count, days, STUNDEN_PRO_TAG).mean(axis=1)
+    return {
+        "household": np.arange(first, first + count),
+        "total_kwh": np.round(werte.sum(axis=1), 3),
+        "avg": np.round(werte.mean(axis=1), 3),
+        "min": werte.min(axis=1),
+        "max": werte.max(axis=1),
+        "peak_hour": stunden_mittel.argmax(axis=1),
+    }
+
+
+def _shard_aufrufe(households: int, days: int, start_day: int, seed: int):
+    """Zerlegt die Haushalte in Shards mit höchstens SHARD_VALUES Stundenwerten."""
+    pro_shard = max(1, SHARD_VALUES // max(days * STUNDEN_PRO_TAG, 1))
+    for first in range(0, households, pro_shard):
+        yield first, min(pro_shard, households - first), days, start_day, seed
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Prozess-Pool mit ``workers`` Prozessen (einmal erzeugt, danach wiederverwendet)."""
+    with _pools_lock:
+        if workers not in _pools:
+            _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=_MP_CONTEXT)
+        return _pools[workers]
+
+
+def shutdown_pools():
+    """Beendet alle Prozess-Pools (beim Herunterfahren der App)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_batch(households: int, days: int, start_day: int = 0, seed: int = SEED, workers: int | None = None):
+    """
+    Liefert die Aggregate Shard für Shard in Haushaltsreihenfolge.
+
+    Mit mehr als einem Shard und mehr als einem Worker werden die Shards im
+    Prozess-Pool berechnet, sonst im aktuellen Prozess.
+    """
+    aufrufe = list(_shard_aufrufe(households, days, start_day, seed))
+    workers = BATCH_WORKERS if workers is None else workers
+    if len(aufrufe) > 1 and workers > 1:
+        yield from _get_pool(workers).map(shard_aggregates, *zip(*aufrufe))
+    else:
+        for aufruf in aufrufe:
+            yield shard_aggregates(*aufruf)
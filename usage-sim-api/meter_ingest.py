@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Eingangsformate für POST /meters/ingest.
+
+Jeder Datensatz ist (meter_id, timestamp, kwh). kwh ist die Energie des
+Messintervalls; sie wird der Stunde zugeordnet, in der timestamp liegt.
+timestamp wird als Unix-Sekunden oder ISO-8601 angegeben (ohne Zeitzone = UTC).
+
+- "csv":    Spalten meter_id,timestamp,kwh (Kopfzeile optional)
+- "ndjson": je Zeile {"meter_id": ..., "timestamp": ..., "kwh": ...}
+- "binary": ein oder mehrere spaltenbasierte Blöcke, je Block ein Zähler
+
+Header eines Binär-Blocks (``<4sBBHI``):
+    magic b"EMTR", version (1), reserviert (0), Länge der meter_id in Bytes,
+    Anzahl Werte; danach meter_id (UTF-8), Zeitstempel als Little-Endian-int64
+    (Unix-Sekunden) und kWh als Little-Endian-float32
+
+Alle Parser liefern die Spalten (meter_ids, ts, kwh) als NumPy-Arrays; Fehler
+werden als ValueError mit Zeilen- bzw. Blockangabe gemeldet.
+"""
+
+import csv
+import io
+import json
+import struct
+from datetime import datetime, timezone
+
+import numpy as np
+
+BINARY_MAGIC = b"EMTR"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sBBHI")
+
+INGEST_MEDIA_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/octet-stream": "binary",
+}
+
+
+def ingest_format(content_type: str | None) -> str | None:
+    """Eingangsformat zum Content-Type (ohne Parameter wie charset)."""
+    return INGEST_MEDIA_TYPES.get((content_type or "").split(";")[0].strip().lower())
+
+
+def _sekunden(wert) -> int:
+    """Unix-Sekunden aus Zahl, Zahl als Text oder ISO-8601."""
+    if isinstance(wert, (int, float)) and not isinstance(wert, bool):
+        return int(wert // 1)
+    text = str(wert).strip()
+    try:
+        return int(float(text) // 1)
+    except ValueError:
+        pass
+    zeitpunkt = datetime.fromisoformat(text)
+    if zeitpunkt.tzinfo is None:
+        zeitpunkt = zeitpunkt.replace(tzinfo=timezone.utc)
+    return int(zeitpunkt.timestamp() // 1)
+
+
+def _spalten(ids: list, zeiten: list, werte: list, ort: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    ts = np.empty(len(zeiten), dtype=np.int64)
+    kwh = np.empty(len(werte), dtype=np.float64)
+    for i, (zeit, wert) in enumerate(zip(zeiten, werte)):
+        try:
+            ts[i] = _sekunden(zeit)
+            kwh[i] = float(wert)
+        except (TypeError, ValueError, OverflowError) as e:
+            raise ValueError(f"{ort} {i + 1}: {e}") from None
+    return np.array(ids, dtype=str), ts, kwh
+
+
+def parse_csv(daten: bytes) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """CSV mit den Spalten meter_id,timestamp,kwh."""
+    ids, zeiten, werte = [], [], []
+    for nr, zeile in enumerate(csv.reader(io.StringIO(daten.decode("utf-8"))), start=1):
+        if not zeile:
+            continue
+        if len(zeile) != 3:
+            raise ValueError(f"Zeile {nr}: erwartet meter_id,timestamp,kwh")
+        if nr == 1 and zeile[2].strip().lower() == "kwh":
+            continue  # Kopfzeile
+        ids.append(zeile[0].strip())
+        zeiten.append(zeile[1])
+        werte.append(zeile[2])
+    return _spalten(ids, zeiten, werte, "Datensatz")
+
+
+def parse_ndjson(daten: bytes) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Eine JSON-Map pro Zeile mit meter_id, timestamp und kwh."""
+    ids, zeiten, werte = [], [], []
+    for nr, zeile in enumerate(daten.splitlines(), start=1):
+        if not zeile.strip():
+            continue
+        try:
+            satz = json.loads(zeile)
+            ids.append(str(satz["meter_id"]))
+            zeiten.append(satz["timestamp"])
+            werte.append(satz["kwh"])
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Zeile {nr}: {e!r}") from None
+    return _spalten(ids, zeiten, werte, "Datensatz")
+
+
+def parse_binary(daten: bytes) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Spaltenbasierte Blöcke (siehe Modulbeschreibung), ohne Umweg über Python-Objekte."""
+    ids, zeiten, werte = [], [], []
+    pos = block = 0
+    while pos < len(daten):
+        block += 1
+        if len(daten) - pos < BINARY_HEADER.size:
+            raise ValueError(f"Block {block}: unvollständiger Header")
+        magic, version, _, id_laenge, anzahl = BINARY_HEADER.unpack_from(daten, pos)
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            raise ValueError(f"Block {block}: unbekanntes Format {magic!r} v{version}")
+        pos += BINARY_HEADER.size
+        ende = pos + id_laenge + anzahl * 12
+        if ende > len(daten):
+            raise ValueError(f"Block {block}: {anzahl} Werte angekündigt, Daten zu kurz")
+        meter_id = daten[pos:pos + id_laenge].decode("utf-8")
+        pos += id_laenge
+        zeiten.append(np.frombuffer(daten, "<i8", anzahl, pos))
+        werte.append(np.frombuffer(daten, "<f4", anzahl, pos + anzahl * 8))
+        ids.append(np.full(anzahl, meter_id))
+        pos = ende
+    if not ids:
+        return np.empty(0, dtype=str), np.empty(0, dtype=np.int64), np.empty(0)
+    return np.concatenate(ids), np.concatenate(zeiten).astype(np.int64), np.concatenate(werte).astype(np.float64)
+
+
+def encode_binary(meter_id: str, ts: np.ndarray, kwh: np.ndarray) -> bytes:
+    """Kodiert die Werte eines Zählers als Binär-Block (für Clients und Benchmarks)."""
+    kennung = meter_id.encode("utf-8")
+    header = BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 0, len(kennung), len(ts))
+    return header + kennung + np.asarray(ts, "<i8").tobytes() + np.asarray(kwh, "<f4").tobytes()
+
+
+PARSERS = {
+    "csv": parse_csv,
+    "ndjson": parse_ndjson,
+    "binary": parse_binary,
+}
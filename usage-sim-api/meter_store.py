@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""
+Speicher für echte Zählerstände.
+
+Pro Zähler gibt es ein Verzeichnis mit memory-mapped Arrays. Sie sind dicht
+und beginnen an der Epoche (Tag 0 = METER_EPOCH, erster eines Monats, UTC):
+- ``stunden.f4``:    Stundensummen in kWh (NaN = keine Messung in der Stunde)
+- ``tage.rollup``:   je Kalendertag Summe, Anzahl Stunden mit Messung sowie
+                     Minimum und Maximum der Stundenwerte
+- ``monate.rollup``: dasselbe je Kalendermonat
+- ``roh.bin``:       Anhängeprotokoll der eingelieferten Rohwerte (Unix-Sekunden, kWh)
+
+Beim Einliefern werden die Werte zu Stundensummen addiert. Danach werden nur
+die berührten Tages- und Monats-Rollups neu berechnet. Eine Bereichsstatistik
+setzt sich aus höchstens zwei angeschnittenen Monaten (Tages-Rollups) und den
+vollen Monaten dazwischen (Monats-Rollups) zusammen. Auch über Jahre werden
+dabei keine Stunden- oder Rohwerte gelesen.
+
+Die Dateien wachsen um mindestens ein Jahr bzw. verdoppeln sich. Zeitpunkte
+nach jetzt + ``max_future_days`` werden abgewiesen; ein einzelner Wert kann
+die Dateien also nicht beliebig weit vergrößern.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from typing import Callable
+
+import numpy as np
+
+from simulation import STUNDEN_PRO_TAG, hour_index
+
+ROLLUP = np.dtype([("sum", "<f8"), ("stunden", "<u4"), ("min", "<f4"), ("max", "<f4")])
+ROH = np.dtype([("ts", "<i8"), ("kwh", "<f4")])
+STUNDE = np.dtype("<f4")
+_LEER = (0.0, 0, np.inf, -np.inf)
+MIN_WACHSTUM_TAGE = 366
+# erstes Zeichen alphanumerisch: keine Verzeichnisnamen wie "." oder ".."
+METER_ID = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]{0,63}")
+
+
+def _memmap(pfad: str, dtype: np.dtype, anzahl: int, leer) -> np.memmap:
+    """Öffnet eine Datei als memmap mit mindestens ``anzahl`` Einträgen; neue Einträge = ``leer``."""
+    vorhanden = os.path.getsize(pfad) // dtype.itemsize if os.path.exists(pfad) else 0
+    if anzahl > vorhanden:
+        with open(pfad, "ab") as f:
+            f.truncate(anzahl * dtype.itemsize)
+    arr = np.memmap(pfad, dtype=dtype, mode="r+", shape=(max(anzahl, vorhanden),))
+    if anzahl > vorhanden:
+        arr[vorhanden:] = leer
+    return arr
+
+
+def _monatsanfaenge(epoche: np.datetime64, tage: int) -> np.ndarray:
+    """Erster Tag (relativ zur Epoche) jedes Monats bis über ``tage`` hinaus."""
+    monate = int((epoche + np.timedelta64(tage, "D")).astype("datetime64[M]") - epoche.astype("datetime64[M]")) + 2
+    anfaenge = epoche.astype("datetime64[M]") + np.arange(monate)
+    return (anfaenge.astype("datetime64[D]") - epoche).astype(np.int64)
+
+
+def _zusammenfassen(teil: np.ndarray) -> tuple[float, int, float, float]:
+    return (
+        float(teil["sum"].sum()),
+        int(teil["stunden"].sum()),
+        float(teil["min"].min(initial=np.inf)),
+        float(teil["max"].max(initial=-np.inf)),
+    )
+
+
+class MeterSeries:
+    """Stundenreihe und Rollups eines Zählers (ein Verzeichnis)."""
+
+    def __init__(self, verzeichnis: str, epoche: np.datetime64):
+        self.verzeichnis = verzeichnis
+        self.epoche = epoche
+        self.lock = threading.RLock()
+        os.makedirs(verzeichnis, exist_ok=True)
+        vorhanden = os.path.join(verzeichnis, "stunden.f4")
+        tage = os.path.getsize(vorhanden) // (STUNDE.itemsize * STUNDEN_PRO_TAG) if os.path.exists(vorhanden) else 0
+        self._oeffnen(max(tage, MIN_WACHSTUM_TAGE))
+
+    def _pfad(self, name: str) -> str:
+        return os.path.join(self.verzeichnis, name)
+
+    def _oeffnen(self, tage: int):
+        self.stunden = _memmap(self._pfad("stunden.f4"), STUNDE, tage * STUNDEN_PRO_TAG, np.nan)
+        self.kapazitaet = len(self.stunden) // STUNDEN_PRO_TAG
+        self.tage = _memmap(self._pfad("tage.rollup"), ROLLUP, self.kapazitaet, _LEER)
+        self.monatsanfang = _monatsanfaenge(self.epoche, self.kapazitaet)
+        self.monate = _memmap(self._pfad("monate.rollup"), ROLLUP, len(self.monatsanfang) - 1, _LEER)
+
+    def _wachsen(self, tage: int):
+        for arr in (self.stunden, self.tage, self.monate):
+            arr.flush()
+        self._oeffnen(max(tage, 2 * self.kapazitaet, self.kapazitaet + MIN_WACHSTUM_TAGE))
+
+    def append(self, stunde: np.ndarray, ts: np.ndarray, kwh: np.ndarray):
+        """
+        Fügt Werte hinzu (``stunde`` = Stundenindex ab Epoche, nicht negativ).
+
+        Werte derselben Stunde werden addiert, auch über mehrere Aufrufe hinweg.
+        """
+        with self.lock:
+            noetig = int(stunde.max()) // STUNDEN_PRO_TAG + 1
+            if noetig > self.kapazitaet:
+                self._wachsen(noetig)
+            roh = np.empty(len(ts), dtype=ROH)
+            roh["ts"], roh["kwh"] = ts, kwh
+            with open(self._pfad("roh.bin"), "ab") as f:
+                f.write(roh.tobytes())
+
+            stunden, zuordnung = np.unique(stunde, return_inverse=True)
+            summen = np.bincount(zuordnung, weights=kwh)
+            self.stunden[stunden] = np.nan_to_num(self.stunden[stunden]) + summen
+            tage = np.unique(stunden // STUNDEN_PRO_TAG)
+            self._tage_neu(tage)
+            self._monate_neu(np.unique(np.searchsorted(self.monatsanfang, tage, "right") - 1))
+            for arr in (self.stunden, self.tage, self.monate):
+                arr.flush()
+
+    def _tage_neu(self, tage: np.ndarray):
+        block = self.stunden.reshape(-1, STUNDEN_PRO_TAG)[tage]
+        gueltig = ~np.isnan(block)
+        minimum = np.fmin.reduce(block, axis=1)
+        maximum = np.fmax.reduce(block, axis=1)
+        self.tage["sum"][tage] = np.where(gueltig, block, 0.0).sum(axis=1)
+        self.tage["stunden"][tage] = gueltig.sum(axis=1)
+        self.tage["min"][tage] = np.where(np.isnan(minimum), np.inf, minimum)
+        self.tage["max"][tage] = np.where(np.isnan(maximum), -np.inf, maximum)
+
+    def _monate_neu(self, monate: np.ndarray):
+        for m in monate.tolist():
+            self.monate[m] = _zusammenfassen(self.tage[self.monatsanfang[m]:self.monatsanfang[m + 1]])
+
+    def stats(self, days: int, start_day: int = 0) -> tuple[float, int, float, float]:
+        """
+        Summe, Anzahl Stunden mit Messung, Minimum und Maximum des Fensters aus den Rollups.
+        """
+        with self.lock:
+            d0, d1 = min(start_day, self.kapazitaet), min(start_day + days, self.kapazitaet)
+            if d1 <= d0:
+                return _zusammenfassen(self.tage[:0])
+            anfang = self.monatsanfang
+            erster = int(np.searchsorted(anfang, d0, "left"))      # erster Monat, der im Fenster beginnt
+            letzter = int(np.searchsorted(anfang, d1, "right")) - 1  # Monat, in dem das Fenster endet
+            if erster >= letzter:
+                return _zusammenfassen(self.tage[d0:d1])
+            return _zusammenfassen(np.concatenate([
+                self.tage[d0:anfang[erster]],
+                self.monate[erster:letzter],
+                self.tage[anfang[letzter]:d1],
+            ]))
+
+    def hourly(self, days: int, start_day: int = 0) -> np.ndarray:
+        """Stundenwerte des Fensters (Kopie, NaN = keine Messung)."""
+        werte = np.full(max(days, 0) * STUNDEN_PRO_TAG, np.nan)
+        with self.lock:
+            teil = self.stunden[start_day * STUNDEN_PRO_TAG:(start_day + days) * STUNDEN_PRO_TAG]
+            werte[:len(teil)] = teil
+        return np.round(werte, 3)
+
+    def daily(self, days: int, start_day: int = 0) -> np.ndarray:
+        """Tagessummen des Fensters aus den Tages-Rollups (NaN = keine Messung am Tag)."""
+        werte = np.full(max(days, 0), np.nan)
+        with self.lock:
+            teil = self.tage[start_day:start_day + days]
+            werte[:len(teil)] = np.where(teil["stunden"] > 0, teil["sum"], np.nan)
+        return np.round(werte, 3)
+
+    def iter_blocks(self, days: int, start_day: int = 0, block_days: int = 30):
+        """
+        Stundenwerte blockweise als (day, hour, kwh) wie ``simulation.iter_blocks``.
+
+        Stunden ohne Messung werden ausgelassen.
+        """
+        block_days = max(block_days, 1)
+        for offset in range(0, max(days, 0), block_days):
+            n = min(block_days, days - offset)
+            kwh = self.hourly(n, start_day + offset)
+            gueltig = ~np.isnan(kwh)
+            if gueltig.any():
+                day, hour = hour_index(n, start_day + offset)
+                yield day[gueltig], hour[gueltig], kwh[gueltig]
+
+    def info(self) -> dict:
+        with self.lock:
+            tage = np.flatnonzero(self.tage["stunden"])
+            roh = self._pfad("roh.bin")
+            return {
+                "erster_tag": int(tage[0]) if len(tage) else None,
+                "letzter_tag": int(tage[-1]) if len(tage) else None,
+                "stunden_mit_messung": int(self.tage["stunden"].sum()),
+                "werte": os.path.getsize(roh) // ROH.itemsize if os.path.exists(roh) else 0,
+                "bytes": sum(arr.nbytes for arr in (self.stunden, self.tage, self.monate)),
+            }
+
+
+class MeterStore:
+    """
+    Alle Zähler unter einem Verzeichnis; Zähler werden bei Bedarf geöffnet.
+
+    Die Epoche wird beim ersten Anlegen in ``meta.json`` festgehalten und gilt
+    danach für das Verzeichnis (eine abweichende Angabe ist ein Fehler).
+    Eingeliefert werden nur Zeitpunkte von der Epoche bis jetzt + ``max_future_days``.
+    """
+
+    def __init__(self, verzeichnis: str, epoche: str = "2020-01-01", max_future_days: float = 7.0,
+                 clock: Callable[[], float] = time.time):
+        self.verzeichnis = verzeichnis
+        self._wurzel = os.path.realpath(verzeichnis)
+        self.max_future_days = max_future_days
+        self._clock = clock
+        os.makedirs(verzeichnis, exist_ok=True)
+        meta = os.path.join(verzeichnis, "meta.json")
+        if os.path.exists(meta):
+            with open(meta) as f:
+                gespeichert = json.load(f)["epoche"]
+            if gespeichert != epoche:
+                raise ValueError(f"{verzeichnis} wurde mit Epoche {gespeichert} angelegt, nicht {epoche}")
+        self.epoche = np.datetime64(epoche, "D")
+        if self.epoche != self.epoche.astype("datetime64[M]").astype("datetime64[D]"):
+            raise ValueError("Die Epoche muss der erste Tag eines Monats sein")
+        if not os.path.exists(meta):
+            with open(meta, "w") as f:
+                json.dump({"epoche": epoche}, f)
+        self.epoche_s = int(self.epoche.astype("datetime64[s]").astype(np.int64))
+        self._zaehler: dict[str, MeterSeries] = {}
+        self._lock = threading.Lock()
+        self.ingested = 0
+
+    def meter_ids(self) -> list[str]:
+        return sorted(
+            name for name in os.listdir(self.verzeichnis)
+            if self._pfad(name) is not None and os.path.isdir(os.path.join(self.verzeichnis, name))
+        )
+
+    def _pfad(self, meter_id: str) -> str | None:
+        """Verzeichnis des Zählers; None bei ungültiger meter_id oder einem Pfad außerhalb des Speichers."""
+        if not METER_ID.fullmatch(meter_id):
+            return None
+        pfad = os.path.join(self.verzeichnis, meter_id)
+        if os.path.dirname(os.path.realpath(pfad)) != self._wurzel:
+            return None
+        return pfad
+
+    def get(self, meter_id: str, anlegen: bool = False) -> MeterSeries | None:
+        """Zähler ``meter_id`` (None, wenn unbekannt und ``anlegen`` nicht gesetzt)."""
+        pfad = self._pfad(meter_id)
+        if pfad is None:
+            return None
+        with self._lock:
+            serie = self._zaehler.get(meter_id)
+            if serie is None:
+                if not anlegen and not os.path.isdir(pfad):
+                    return None
+                serie = self._zaehler[meter_id] = MeterSeries(pfad, self.epoche)
+            return serie
+
+    def ingest(self, meter_ids: np.ndarray, ts: np.ndarray, kwh: np.ndarray) -> dict[str, int]:
+        """
+        Prüft und speichert einen Stapel (meter_id, Unix-Sekunden, kWh).
+
+        Der Stapel wird vollständig geprüft, bevor etwas geschrieben wird.
+
+        Returns:
+            Anzahl gespeicherter Werte je Zähler
+
+        Raises:
+            ValueError: ungültige meter_id, Zeitpunkt vor der Epoche oder nach
+                jetzt + max_future_days, kWh nicht endlich
+        """
+        if not len(ts):
+            return {}
+        ids, zuordnung = np.unique(meter_ids, return_inverse=True)
+        for meter_id in ids.tolist():
+            if self._pfad(meter_id) is None:
+                raise ValueError(f"Ungültige meter_id {meter_id!r} (erlaubt: A-Z a-z 0-9 _ . -, "
+                                 "beginnend mit Buchstabe oder Ziffer, max. 64 Zeichen)")
+        if ts.min() < self.epoche_s:
+            raise ValueError(f"Zeitpunkt vor der Epoche {self.epoche} (Unix-Sekunden {int(ts.min())})")
+        horizont = int(self._clock() + self.max_future_days * 86400)
+        if ts.max() > horizont:
+            raise ValueError(f"Zeitpunkt mehr als {self.max_future_days:g} Tage in der Zukunft "
+                             f"(Unix-Sekunden {int(ts.max())}, erlaubt bis {horizont})")
+        if not np.isfinite(kwh).all():
+            raise ValueError("kwh muss eine endliche Zahl sein")
+        stunde = (ts - self.epoche_s) // 3600
+        reihenfolge = np.argsort(zuordnung, kind="stable")
+        grenzen = np.cumsum(np.bincount(zuordnung, minlength=len(ids)))[:-1]
+        angenommen = {}
+        for meter_id, auswahl in zip(ids.tolist(), np.split(reihenfolge, grenzen)):
+            self.get(meter_id, anlegen=True).append(stunde[auswahl], ts[auswahl], kwh[auswahl])
+            angenommen[meter_id] = len(auswahl)
+        with self._lock:  # mehrere Ingest-Anfragen laufen parallel im Threadpool
+            self.ingested += len(ts)
+        return angenommen
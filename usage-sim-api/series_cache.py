@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Rollup-Cache für die simulierte Zeitreihe.
+
+Die Reihe ist für einen Seed deterministisch. Statt sie pro Anfrage neu zu
+erzeugen, hält ``SeriesStore`` die stündlichen Werte zusammen mit
+Tagessummen, kumulierten Summen, Tages- und laufenden Min/Max-Werten sowie
+Min/Max je Block von BLOCK_TAGE Tagen. Der Speicher wird bei Bedarf
+verlängert (mindestens verdoppelt). Kosten von ``stats``:
+- Durchschnitt: O(1) über die Präfixsummen
+- Min/Max ab Tag 0: O(1) über die laufenden Werte
+- Min/Max ab start_day > 0: O(days / BLOCK_TAGE + BLOCK_TAGE) über die
+  Blockwerte und die Tageswerte an den Rändern
+
+``SeriesCache`` hält den Store der simulierten Reihe (ein Seed) mit
+Speicherobergrenze; Anfragen, deren Horizont die Obergrenze sprengen würde,
+werden am Cache vorbei direkt berechnet (``bypasses``).
+"""
+
+import threading
+
+import numpy as np
+
+from simulation import SEED, STUNDEN_PRO_TAG, gen_hourly_arrays
+
+# Bytes pro Tag: 24 Stundenwerte + Tagessumme, Präfixsumme, Tages-Min/Max, laufendes Min/Max
+# (die Block-Min/Max-Werte belegen weniger als 1 Byte pro Tag und werden nicht mitgezählt)
+BYTES_PRO_TAG = (STUNDEN_PRO_TAG + 6) * 8
+BLOCK_TAGE = 64
+
+
+class SeriesStore:
+    """Lazily verlängerte Zeitreihe eines Seeds mit vorberechneten Rollups."""
+
+    def __init__(self, seed: int = SEED):
+        self.seed = seed
+        self.days = 0
+        self.kwh = np.empty(0)
+        self.tages_summe = np.empty(0)
+        self.praefix = np.zeros(1)
+        self.tages_min = np.empty(0)
+        self.tages_max = np.empty(0)
+        self.lauf_min = np.empty(0)
+        self.lauf_max = np.empty(0)
+        self.block_min = np.empty(0)
+        self.block_max = np.empty(0)
+
+    @property
+    def nbytes(self) -> int:
+        return self.days * BYTES_PRO_TAG
+
+    def extend(self, days: int):
+        """Verlängert den Store auf genau ``days`` Tage."""
+        if days <= self.days:
+            return
+        _, _, neu = gen_hourly_arrays(days - self.days, self.days, self.seed)
+        tage = neu.reshape(-1, STUNDEN_PRO_TAG)
+        summe = tage.sum(axis=1)
+        t_min = tage.min(axis=1)
+        t_max = tage.max(axis=1)
+        l_min = np.minimum.accumulate(t_min)
+        l_max = np.maximum.accumulate(t_max)
+        if self.days:
+            l_min = np.minimum(l_min, self.lauf_min[-1])
+            l_max = np.maximum(l_max, self.lauf_max[-1])
+
+        self.kwh = np.concatenate([self.kwh, neu])
+        self.tages_summe = np.concatenate([self.tages_summe, summe])
+        self.praefix = np.concatenate([self.praefix, self.praefix[-1] + np.cumsum(summe)])
+        self.tages_min = np.concatenate([self.tages_min, t_min])
+        self.tages_max = np.concatenate([self.tages_max, t_max])
+        self.lauf_min = np.concatenate([self.lauf_min, l_min])
+        self.lauf_max = np.concatenate([self.lauf_max, l_max])
+        self.days = days
+        voll = days // BLOCK_TAGE * BLOCK_TAGE
+        self.block_min = self.tages_min[:voll].reshape(-1, BLOCK_TAGE).min(axis=1)
+        self.block_max = self.tages_max[:voll].reshape(-1, BLOCK_TAGE).max(axis=1)
+
+    @staticmethod
+    def _pruefen(days: int, start_day: int):
+        if days < 0 or start_day < 0:
+            raise ValueError(f"Ungültiges Fenster: days={days}, start_day={start_day}")
+
+    def hourly(self, days: int, start_day: int = 0) -> np.ndarray:
+        """Stündliche Werte des Fensters (Sicht auf den Store, keine Kopie)."""
+        self._pruefen(days, start_day)
+        return self.kwh[start_day * STUNDEN_PRO_TAG:(start_day + days) * STUNDEN_PRO_TAG]
+
+    def daily(self, days: int, start_day: int = 0) -> np.ndarray:
+        """Tagessummen des Fensters (gerundet auf 3 Nachkommastellen)."""
+        self._pruefen(days, start_day)
+        return np.round(self.tages_summe[start_day:start_day + days], 3)
+
+    def stats(self, days: int, start_day: int = 0) -> tuple[float, float, float]:
+        """Durchschnitt, Maximum und Minimum des Fensters (days >= 1) aus den Rollups."""
+        if days < 1 or start_day < 0:
+            raise ValueError(f"Ungültiges Fenster: days={days}, start_day={start_day}")
+        ende = start_day + days
+        avg = (self.praefix[ende] - self.praefix[start_day]) / (days * STUNDEN_PRO_TAG)
+        if start_day == 0:
+            return float(avg), float(self.lauf_max[ende - 1]), float(self.lauf_min[ende - 1])
+        minimum, maximum = self._min_max(start_day, ende)
+        return float(avg), maximum, minimum
+
+    def _min_max(self, start: int, ende: int) -> tuple[float, float]:
+        """Min/Max der Tage [start, ende): volle Blöcke aus den Blockwerten, Ränder aus den Tageswerten."""
+        erster = -(-start // BLOCK_TAGE)
+        letzter = ende // BLOCK_TAGE
+        if erster >= letzter:
+            return float(self.tages_min[start:ende].min()), float(self.tages_max[start:ende].max())
+        minima = [self.block_min[erster:letzter].min()]
+        maxima = [self.block_max[erster:letzter].max()]
+        for a, b in ((start, erster * BLOCK_TAGE), (letzter * BLOCK_TAGE, ende)):
+            if a < b:
+                minima.append(self.tages_min[a:b].min())
+                maxima.append(self.tages_max[a:b].max())
+        return float(min(minima)), float(max(maxima))
+
+
+class SeriesCache:
+    """Cache des ``SeriesStore`` der simulierten Reihe mit Speicherobergrenze und Zählern."""
+
+    def __init__(self, max_bytes: int, seed: int = SEED):
+        self.max_bytes = max_bytes
+        self._store = SeriesStore(seed)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+
+    def get(self, end_day: int) -> SeriesStore | None:
+        """
+        Liefert einen Store, der mindestens die Tage [0, end_day) abdeckt.
+
+        Returns:
+            Store oder None, wenn der Horizont die Speicherobergrenze übersteigt
+        """
+        if end_day * BYTES_PRO_TAG > self.max_bytes:
+            with self._lock:
+                self.bypasses += 1
+            return None
+        with self._lock:
+            store = self._store
+            if end_day <= store.days:
+                self.hits += 1
+                return store
+            self.misses += 1
+            # Mindestens verdoppeln, damit wachsende Horizonte amortisiert O(1) bleiben
+            ziel = max(end_day, min(2 * store.days, self.max_bytes // BYTES_PRO_TAG))
+            store.extend(ziel)
+            return store
+
+    def try_stats(self, days: int, start_day: int = 0) -> tuple[float, float, float] | None:
+        """
+        ``SeriesStore.stats`` ohne Warten auf den Lock (z.B. direkt auf dem Event-Loop).
+
+        Returns:
+            (avg, max, min) oder None, wenn das Fenster nicht abgedeckt ist oder
+            der Store gerade von einem anderen Thread erweitert wird
+        """
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            if start_day + days > self._store.days:
+                return None
+            self.hits += 1
+            return self._store.stats(days, start_day)
+        finally:
+            self._lock.release()
+
+    def covers(self, end_day: int) -> bool:
+        """True, wenn der Store [0, end_day) bereits abdeckt (Abfrage ohne Erzeugung)."""
+        with self._lock:
+            return end_day <= self._store.days
+
+    @property
+    def nbytes(self) -> int:
+        return self._store.nbytes
+
+    def info(self) -> dict:
+        """Zähler und Speicherbelegung für Monitoring."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypasses": self.bypasses,
+                "days": self._store.days,
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+            }
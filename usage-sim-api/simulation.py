@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Spaltenbasierte Simulations-Engine für usage-sim-api.
+
+Statt pro Stunde ein Python-Dict zu erzeugen, werden Tageskurve, abendliche
+Spitze, Zufallsschwankung sowie Clamp/Rundung als ganze NumPy-Arrays berechnet.
+Erst wenn eine JSON-Antwort tatsächlich Zeilen benötigt, werden die Spalten in
+Dicts umgewandelt (siehe ``rows_from_arrays``).
+
+Die Zufallsschwankung stammt aus einem zählerbasierten Generator (Philox),
+dessen Schlüssel der Seed und dessen Zähler der Stundenindex ist. Jedes
+Zeitfenster lässt sich dadurch in O(Fenster) berechnen und liefert exakt die
+Werte, die es auch innerhalb eines längeren Laufs hätte. Jeder Aufruf nutzt
+einen eigenen Generator, es gibt keinen prozessweiten Zufallszustand.
+"""
+
+import numpy as np
+
+SEED = 42
+STUNDEN_PRO_TAG = 24
+
+# Konstante Tageskurve (einmal berechnet, pro Anfrage nur noch gekachelt)
+_STUNDEN = np.arange(STUNDEN_PRO_TAG)
+_BASIS = 0.4 + 0.2 * np.sin(_STUNDEN / 24 * 2 * np.pi)
+_ABEND_PEAK = np.where((_STUNDEN >= 18) & (_STUNDEN <= 22), 0.6, 0.0)
+_PROFIL = _BASIS + _ABEND_PEAK
+
+
+# Philox liefert pro Zählerschritt einen Block aus vier 64-Bit-Werten
+_WERTE_PRO_BLOCK = 4
+
+
+def uniform_window(key: int, start_stunde: int, n: int) -> np.ndarray:
+    """
+    Gleichverteilte Werte in [0, 1) für die Stunden [start_stunde, start_stunde + n).
+
+    ``key`` ist der (bis zu 128 Bit lange) Philox-Schlüssel, z.B. der Seed.
+    """
+    block, versatz = divmod(start_stunde, _WERTE_PRO_BLOCK)
+    rng = np.random.Generator(np.random.Philox(key=key, counter=block))
+    return rng.random(n + versatz)[versatz:]
+
+
+def gen_hourly_arrays(days: int = 7, start_day: int = 0, seed: int = SEED) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Erzeugt stündliche Verbrauchswerte (kWh) als Spalten.
+
+    Args:
+        days: Anzahl der Tage im Fenster
+        start_day: Erster Tag des Fensters (0 = Simulationsbeginn)
+        seed: Schlüssel des Zufallsgenerators
+
+    Returns:
+        Tupel (day, hour, kwh) als NumPy-Arrays der Länge days * 24
+    """
+    days = max(days, 0)
+    rauschen = -0.1 + 0.2 * uniform_window(seed, start_day * STUNDEN_PRO_TAG, days * STUNDEN_PRO_TAG)
+    kwh = np.round(np.maximum(0.1, np.tile(_PROFIL, days) + rauschen), 3)
+    return (*hour_index(days, start_day), kwh)
+
+
+def hour_index(days: int, start_day: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """Spalten (day, hour) für ein Fenster von ``days`` Tagen ab ``start_day``."""
+    days = max(days, 0)
+    return np.repeat(np.arange(start_day, start_day + days), STUNDEN_PRO_TAG), np.tile(_STUNDEN, days)
+
+
+def iter_blocks(days: int, start_day: int = 0, block_days: int = 30, seed: int = SEED):
+    """
+    Erzeugt das Fenster blockweise, jeweils ``block_days`` Tage pro Block.
+
+    Der Speicherbedarf hängt nur von der Blockgröße ab, nicht von ``days``.
+    """
+    block_days = max(block_days, 1)
+    for offset in range(0, max(days, 0), block_days):
+        yield gen_hourly_arrays(min(block_days, days - offset), start_day + offset, seed)
+
+
+def daily_sums(kwh: np.ndarray) -> np.ndarray:
+    """Summiert stündliche Werte zu Tageswerten (gerundet auf 3 Nachkommastellen)."""
+    return np.round(kwh.reshape(-1, STUNDEN_PRO_TAG).sum(axis=1), 3)
+
+
+def rows_from_arrays(day: np.ndarray, hour: np.ndarray, kwh: np.ndarray) -> list[dict]:
+    """Wandelt Spalten in die JSON-Zeilenform ``{"day", "hour", "kwh"}`` um."""
+    return [
+        {"day": d, "hour": h, "kwh": k}
+        for d, h, k in zip(day.tolist(), hour.tolist(), kwh.tolist())
+    ]
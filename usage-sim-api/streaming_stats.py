@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Einpass-Statistiken über den stündlichen Datenstrom.
+
+Alle Bausteine verarbeiten die Reihe blockweise (siehe ``simulation.iter_blocks``)
+und halten nur konstanten Zustand, unabhängig von der Anzahl der Tage:
+- ``Welford``:     Mittelwert und Varianz (Chan/Welford, blockweise zusammengeführt)
+- ``TDigest``:     zusammenführbare Quantil-Skizze (Merging-t-Digest, Skala k1)
+- ``TopK``:        Heap der K höchsten Stundenwerte
+- ``RollingMean``: gleitende Mittelwerte über eine Deque der letzten N Stunden
+``StatsPipeline`` kombiniert die gewünschten Kennzahlen.
+"""
+
+import heapq
+from collections import deque
+
+import numpy as np
+
+METRICS = ("basic", "variance", "percentiles", "rolling", "peaks")
+PERCENTILES = (50, 95, 99)
+ROLLING_WINDOWS = {"24h": 24, "7d": 168}
+
+
+class Welford:
+    """Laufender Mittelwert und Varianz, numerisch stabil und zusammenführbar."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+
+    def update(self, werte: np.ndarray):
+        if not len(werte):
+            return
+        self._merge(len(werte), float(werte.mean()), float(((werte - werte.mean()) ** 2).sum()))
+        self.min = min(self.min, float(werte.min()))
+        self.max = max(self.max, float(werte.max()))
+
+    def merge(self, other: "Welford"):
+        self._merge(other.n, other.mean, other.m2)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def _merge(self, n: int, mean: float, m2: float):
+        if not n:
+            return
+        gesamt = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / gesamt
+        self.m2 += m2 + delta * delta * self.n * n / gesamt
+        self.n = gesamt
+
+    @property
+    def variance(self) -> float:
+        """Populationsvarianz (wie ``numpy.var``)."""
+        return self.m2 / self.n if self.n else 0.0
+
+
+class TDigest:
+    """
+    Merging-t-Digest für Quantile mit beschränktem Speicher.
+
+    Neue Werte werden gepuffert und zusammen mit den bestehenden Zentroiden
+    komprimiert: Punkte mit gleichem ganzzahligen Wert der Skalenfunktion
+    k1(q) = compression / (2π) · asin(2q − 1) bilden einen Zentroiden. An den
+    Rändern (q nahe 0 oder 1) sind die Zentroiden dadurch besonders klein.
+    """
+
+    def __init__(self, compression: int = 200, puffer: int = 2000):
+        self.compression = compression
+        self.puffer_limit = puffer
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self._puffer: list[np.ndarray] = []
+        self._gepuffert = 0
+        self.min = float("inf")
+        self.max = float("-inf")
+
+    def update(self, werte: np.ndarray):
+        if not len(werte):
+            return
+        self._puffer.append(np.asarray(werte, dtype=float))
+        self._gepuffert += len(werte)
+        self.min = min(self.min, float(werte.min()))
+        self.max = max(self.max, float(werte.max()))
+        if self._gepuffert >= self.puffer_limit:
+            self._compress()
+
+    def merge(self, other: "TDigest"):
+        other._compress()
+        self._compress(other.means, other.weights)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def _compress(self, extra_means: np.ndarray | None = None, extra_weights: np.ndarray | None = None):
+        means = [self.means, *self._puffer]
+        weights = [self.weights, *(np.ones(len(p)) for p in self._puffer)]
+        if extra_means is not None:
+            means.append(extra_means)
+            weights.append(extra_weights)
+        means, weights = np.concatenate(means), np.concatenate(weights)
+        self._puffer, self._gepuffert = [], 0
+        if not len(means):
+            return
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        q = (np.cumsum(weights) - weights / 2) / weights.sum()
+        k = np.floor(self.compression / (2 * np.pi) * np.arcsin(2 * q - 1))
+        starts = np.r_[0, np.flatnonzero(np.diff(k)) + 1]
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q: float) -> float:
+        """Schätzt das q-Quantil (0 ≤ q ≤ 1)."""
+        self._compress()
+        if not len(self.means):
+            return float("nan")
+        gesamt = self.weights.sum()
+        mitten = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * gesamt, np.r_[0, mitten, gesamt], np.r_[self.min, self.means, self.max]))
+
+
+class TopK:
+    """Die K höchsten Stundenwerte (bei Gleichstand der frühere Zeitpunkt)."""
+
+    def __init__(self, k: int = 5):
+        self.k = k
+        self._heap: list[tuple[float, int, int, int]] = []
+
+    def update(self, day: np.ndarray, hour: np.ndarray, kwh: np.ndarray):
+        if len(kwh) > self.k:
+            # alle Werte ab dem k-größten, davon stabil nach (-kwh, Zeitpunkt) die ersten k:
+            # Gleichstände an der Grenze gehen an die früheren Stunden
+            grenze = np.partition(kwh, len(kwh) - self.k)[len(kwh) - self.k]
+            auswahl = np.flatnonzero(kwh >= grenze)
+            zeit = day[auswahl].astype(np.int64) * 24 + hour[auswahl]
+            kandidaten = auswahl[np.lexsort((zeit, -kwh[auswahl]))[:self.k]]
+        else:
+            kandidaten = np.arange(len(kwh))
+        for i in kandidaten.tolist():
+            d, h = int(day[i]), int(hour[i])
+            eintrag = (float(kwh[i]), -(d * 24 + h), d, h)
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, eintrag)
+            elif eintrag > self._heap[0]:
+                heapq.heapreplace(self._heap, eintrag)
+
+    def result(self) -> list[dict]:
+        return [
+            {"day": d, "hour": h, "kwh": kwh}
+            for kwh, _, d, h in sorted(self._heap, reverse=True)
+        ]
+
+
+class RollingMean:
+    """
+    Gleitender Mittelwert über die letzten ``window`` Stunden.
+
+    Die Deque hält nur die letzten ``window`` Werte; pro Block werden die
+    Fenstersummen vektorisiert aus Deque-Inhalt + Block berechnet.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._fenster: deque[float] = deque(maxlen=window)
+        self.max = float("-inf")
+        self.min = float("inf")
+
+    def update(self, werte: np.ndarray):
+        if not len(werte):
+            return
+        vorher = np.fromiter(self._fenster, dtype=float, count=len(self._fenster))
+        kette = np.r_[vorher, werte]
+        if len(kette) >= self.window:
+            kum = np.r_[0.0, np.cumsum(kette)]
+            mittel = (kum[self.window:] - kum[:-self.window]) / self.window
+            self.max = max(self.max, float(mittel.max()))
+            self.min = min(self.min, float(mittel.min()))
+        self._fenster.extend(werte[-self.window:].tolist())
+
+    def result(self) -> dict:
+        if len(self._fenster) < self.window:
+            return {"last": None, "max": None, "min": None}
+        return {
+            "last": round(sum(self._fenster) / self.window, 3),
+            "max": round(self.max, 3),
+            "min": round(self.min, 3),
+        }
+
+
+class StatsPipeline:
+    """Berechnet die gewählten Kennzahlen in einem Durchlauf über die Blöcke."""
+
+    def __init__(self, metrics: set[str], top_k: int = 5):
+        self.metrics = metrics
+        self.welford = Welford()
+        self.digest = TDigest() if "percentiles" in metrics else None
+        self.top = TopK(top_k) if "peaks" in metrics else None
+        self.rolling = (
+            {name: RollingMean(n) for name, n in ROLLING_WINDOWS.items()} if "rolling" in metrics else {}
+        )
+
+    def update(self, day: np.ndarray, hour: np.ndarray, kwh: np.ndarray):
+        self.welford.update(kwh)
+        if self.digest:
+            self.digest.update(kwh)
+        if self.top:
+            self.top.update(day, hour, kwh)
+        for fenster in self.rolling.values():
+            fenster.update(kwh)
+
+    def consume(self, blocks) -> "StatsPipeline":
+        for day, hour, kwh in blocks:
+            self.update(day, hour, kwh)
+        return self
+
+    def result(self) -> dict:
+        w = self.welford
+        ergebnis = {"avg": round(w.mean, 3), "max": round(w.max, 3), "min": round(w.min, 3)}
+        if "variance" in self.metrics:
+            ergebnis["variance"] = round(w.variance, 4)
+            ergebnis["std"] = round(w.variance ** 0.5, 4)
+        if self.digest:
+            ergebnis["percentiles"] = {f"p{p}": round(self.digest.quantile(p / 100), 3) for p in PERCENTILES}
+        if self.rolling:
+            ergebnis["rolling_mean"] = {name: f.result() for name, f in self.rolling.items()}
+        if self.top:
+            ergebnis["peaks"] = self.top.result()
+        return ergebnis
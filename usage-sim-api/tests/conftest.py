@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""Tests der usage-sim-api: Module liegen flach im Dienstverzeichnis."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Tests der Antwortformate von /simulate (formats.py) und ihrer Grenzen.
+
+Referenz ist jeweils die JSON-Antwort für dasselbe Fenster.
+"""
+
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from formats import FLOAT32_HEADER, FLOAT32_MAGIC, FLOAT32_VERSION, MAX_DAY, MEDIA_TYPES
+
+
+@pytest.fixture(scope="module")
+def client() -> TestClient:
+    return TestClient(app.app)
+
+
+def simulieren(client: TestClient, **params):
+    r = client.get("/simulate", params=params)
+    assert r.status_code == 200, r.text
+    return r
+
+
+def referenz(client: TestClient, granularity: str, days: int, start_day: int) -> list[dict]:
+    return simulieren(client, granularity=granularity, days=days, start_day=start_day, format="json").json()
+
+
+FENSTER = [("hour", 3, 0), ("hour", 2, 40), ("day", 45, 10)]
+
+
+@pytest.mark.parametrize("granularity, days, start_day", FENSTER)
+def test_ndjson(client, granularity, days, start_day):
+    r = simulieren(client, granularity=granularity, days=days, start_day=start_day, format="ndjson")
+    assert r.headers["content-type"].startswith(MEDIA_TYPES["ndjson"])
+    zeilen = [json.loads(z) for z in r.text.splitlines()]
+    assert zeilen == referenz(client, granularity, days, start_day)
+
+
+@pytest.mark.parametrize("granularity, days, start_day", FENSTER)
+def test_float32(client, granularity, days, start_day):
+    daten = simulieren(client, granularity=granularity, days=days, start_day=start_day, format="float32").content
+    magic, version, art, _, tag, anzahl = FLOAT32_HEADER.unpack_from(daten)
+    assert (magic, version, art, tag) == (FLOAT32_MAGIC, FLOAT32_VERSION, int(granularity == "day"), start_day)
+    werte = np.frombuffer(daten, "<f4", anzahl, FLOAT32_HEADER.size)
+    assert len(daten) == FLOAT32_HEADER.size + 4 * anzahl
+    erwartet = [z["kwh"] for z in referenz(client, granularity, days, start_day)]
+    np.testing.assert_allclose(werte, erwartet, rtol=1e-6)
+
+
+@pytest.mark.parametrize("granularity, days, start_day", FENSTER)
+def test_msgpack(client, granularity, days, start_day):
+    msgpack = pytest.importorskip("msgpack")
+    daten = msgpack.unpackb(simulieren(client, granularity=granularity, days=days, start_day=start_day,
+                                       format="msgpack").content)
+    assert daten["granularity"] == granularity and daten["start_day"] == start_day
+    zeilen = referenz(client, granularity, days, start_day)
+    for spalte in zeilen[0]:
+        assert daten[spalte] == [z[spalte] for z in zeilen]
+
+
+@pytest.mark.parametrize("granularity, days, start_day", FENSTER)
+def test_arrow(client, granularity, days, start_day):
+    pa = pytest.importorskip("pyarrow")
+    tabelle = pa.ipc.open_stream(simulieren(client, granularity=granularity, days=days, start_day=start_day,
+                                            format="arrow").content).read_all()
+    assert tabelle.schema.metadata[b"start_day"] == str(start_day).encode()
+    assert tabelle.to_pylist() == referenz(client, granularity, days, start_day)
+
+
+@pytest.mark.parametrize("accept, format", [
+    ("application/x-ndjson", "ndjson"),
+    ("application/octet-stream", "float32"),
+    ("text/html, application/msgpack;q=0.9", "msgpack"),
+    ("text/html", "json"),
+    (None, "json"),
+])
+def test_accept_header(client, accept, format):
+    if format in {"msgpack", "arrow"}:
+        pytest.importorskip(format)
+    headers = {"accept": accept} if accept else {}
+    r = client.get("/simulate", params={"days": 1}, headers=headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith(MEDIA_TYPES[format])
+
+
+@pytest.mark.parametrize("params", [
+    {"format": "xml"},
+    {"granularity": "minute"},
+    {"days": -1},
+    {"start_day": -1},
+])
+def test_ungueltige_parameter(client, params):
+    assert client.get("/simulate", params=params).status_code == 400
+
+
+@pytest.mark.parametrize("format", ["json", "ndjson", "float32", "msgpack", "arrow"])
+@pytest.mark.parametrize("granularity", ["hour", "day"])
+def test_letzter_darstellbarer_tag(client, format, granularity):
+    r = client.get("/simulate", params={"days": 1, "start_day": MAX_DAY - 1, "format": format,
+                                         "granularity": granularity})
+    assert r.status_code == 200, r.text
+
+
+@pytest.mark.parametrize("format", ["json", "ndjson", "float32", "msgpack", "arrow"])
+@pytest.mark.parametrize("start_day, days", [(MAX_DAY, 1), (5_000_000_000, 1), (MAX_DAY - 1, 2)])
+def test_tag_ausserhalb_des_bereichs(client, format, start_day, days):
+    r = client.get("/simulate", params={"days": days, "start_day": start_day, "format": format})
+    assert r.status_code == 400, r.text
+
+
+def test_batch_tag_ausserhalb_des_bereichs(client):
+    r = client.get("/simulate/batch", params={"households": 1, "days": 1, "start_day": MAX_DAY})
+    assert r.status_code == 400, r.text
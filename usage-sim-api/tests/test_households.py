@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+Tests der Batch-Simulation (households.py): Prozess-Pool und Shard-Unabhängigkeit.
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+import households
+
+
+@pytest.fixture
+def kleine_shards(monkeypatch):
+    monkeypatch.setattr(households, "SHARD_VALUES", 7 * 24 * 3)  # drei Haushalte je Shard bei 7 Tagen
+    yield
+    households.shutdown_pools()
+
+
+def _zusammen(shards) -> dict[str, np.ndarray]:
+    shards = list(shards)
+    return {name: np.concatenate([s[name] for s in shards]) for name in shards[0]}
+
+
+def test_pool_ohne_fork():
+    assert households._MP_CONTEXT.get_start_method() != "fork"
+
+
+def test_pool_gleiches_ergebnis_wie_im_prozess(kleine_shards):
+    im_prozess = _zusammen(households.iter_batch(10, 7, workers=1))
+    # Pool aus einem Nebenthread erzeugen, wie im Threadpool des Servers
+    ergebnis = {}
+    thread = threading.Thread(target=lambda: ergebnis.update(_zusammen(households.iter_batch(10, 7, workers=2))))
+    thread.start()
+    thread.join(60)
+    assert not thread.is_alive()
+    assert households._pools[2]._mp_context is households._MP_CONTEXT
+    for name, werte in im_prozess.items():
+        np.testing.assert_array_equal(ergebnis[name], werte, err_msg=name)
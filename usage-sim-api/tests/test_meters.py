@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Tests der Zählerstände (meter_store.py, meter_ingest.py, POST /meters/ingest):
+Prüfung beim Einliefern, Eingangsformate und Rollups gegen eine direkte Summe.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from meter_ingest import encode_binary
+from meter_store import MeterStore
+
+EPOCHE = "2020-01-01"
+EPOCHE_S = 1577836800
+
+
+@pytest.fixture
+def speicher(tmp_path) -> MeterStore:
+    return MeterStore(str(tmp_path / "meter_data"), EPOCHE)
+
+
+@pytest.fixture
+def client(monkeypatch, speicher) -> TestClient:
+    monkeypatch.setattr(app, "meter_store", speicher)
+    return TestClient(app.app)
+
+
+def einliefern(client: TestClient, text: str):
+    return client.post("/meters/ingest", content=text, headers={"content-type": "text/csv"})
+
+
+@pytest.mark.parametrize("meter_id", ["..", ".", ".versteckt", "-a", "a" * 65])
+def test_ungueltige_meter_id(client, speicher, tmp_path, meter_id):
+    r = einliefern(client, f"{meter_id},{EPOCHE_S},1.0\n")
+    assert r.status_code == 400, r.text
+    assert "meter_id" in r.json()["detail"]
+    # nichts außerhalb oder in der Wurzel des Speichers angelegt
+    assert sorted(os.listdir(tmp_path)) == ["meter_data"]
+    assert sorted(os.listdir(speicher.verzeichnis)) == ["meta.json"]
+
+
+@pytest.mark.parametrize("meter_id", ["..", ".", "a/b", "a\n"])
+def test_ungueltige_meter_id_im_speicher(speicher, meter_id):
+    assert speicher.get(meter_id, anlegen=True) is None
+    with pytest.raises(ValueError):
+        speicher.ingest(np.array([meter_id]), np.array([EPOCHE_S]), np.array([1.0]))
+
+
+def test_symlink_aus_dem_speicher_heraus(speicher, tmp_path):
+    (tmp_path / "draussen").mkdir()
+    os.symlink(tmp_path / "draussen", os.path.join(speicher.verzeichnis, "link"))
+    assert speicher.get("link", anlegen=True) is None
+    assert speicher.meter_ids() == []
+
+
+def test_gueltige_meter_id(client, speicher):
+    r = einliefern(client, f"Z-1.a_b,{EPOCHE_S},1.0\n")
+    assert r.status_code == 200, r.text
+    assert speicher.meter_ids() == ["Z-1.a_b"]
+
+
+def test_ingested_bei_parallelen_anfragen(speicher):
+    def stapel(nr: int):
+        ts = EPOCHE_S + np.arange(50) * 3600
+        speicher.ingest(np.full(50, f"z{nr % 4}"), ts, np.ones(50))
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(stapel, range(64)))
+    assert speicher.ingested == 64 * 50
+    assert sum(speicher.get(f"z{i}").info()["werte"] for i in range(4)) == 64 * 50
+
+
+def messwerte(seed: int = 0, n: int = 5000, tage: int = 800) -> tuple[np.ndarray, np.ndarray]:
+    """Zufällige Zeitpunkte über mehrere Monate (und über die Anfangskapazität hinaus)."""
+    zufall = np.random.default_rng(seed)
+    ts = EPOCHE_S + zufall.integers(0, 140 * 86400, n)
+    ts[-50:] = EPOCHE_S + zufall.integers(0, tage * 86400, 50)
+    return ts, np.round(zufall.uniform(0.0, 2.0, n), 3)
+
+
+def direkt(ts: np.ndarray, kwh: np.ndarray, days: int, start_day: int) -> tuple[float, int, float, float]:
+    """Summe, Stunden mit Messung, Minimum und Maximum des Fensters ohne Rollups."""
+    stunde = (ts - EPOCHE_S) // 3600
+    auswahl = (stunde >= start_day * 24) & (stunde < (start_day + days) * 24)
+    stunden, zuordnung = np.unique(stunde[auswahl], return_inverse=True)
+    summen = np.bincount(zuordnung, weights=kwh[auswahl], minlength=len(stunden)).astype(np.float32)
+    if not len(stunden):
+        return 0.0, 0, np.inf, -np.inf
+    return float(summen.sum()), len(stunden), float(summen.min()), float(summen.max())
+
+
+@pytest.mark.parametrize("days, start_day", [
+    (1, 0), (7, 3), (31, 0), (29, 31), (45, 20), (140, 0), (90, 50), (800, 0), (365, 400), (10, 5000),
+])
+def test_rollups_gegen_direkte_summe(speicher, days, start_day):
+    ts, kwh = messwerte()
+    halb = len(ts) // 2  # zwei Stapel: Werte derselben Stunde werden addiert
+    speicher.ingest(np.full(halb, "z"), ts[:halb], kwh[:halb])
+    speicher.ingest(np.full(len(ts) - halb, "z"), ts[halb:], kwh[halb:])
+    summe, stunden, minimum, maximum = speicher.get("z").stats(days, start_day)
+    d_summe, d_stunden, d_min, d_max = direkt(ts, kwh, days, start_day)
+    assert stunden == d_stunden
+    assert summe == pytest.approx(d_summe, rel=1e-5)
+    assert (minimum, maximum) == pytest.approx((d_min, d_max), rel=1e-6)
+
+
+def test_stundenwerte_und_statistik_endpunkt(client, speicher):
+    ts, kwh = messwerte(1, 2000)
+    speicher.ingest(np.full(len(ts), "z"), ts, kwh)
+    serie = speicher.get("z")
+    stunde = (ts - EPOCHE_S) // 3600
+    erwartet = np.full(40 * 24, np.nan)
+    for h in np.unique(stunde[stunde < 40 * 24]):
+        erwartet[h] = kwh[stunde == h].sum()
+    np.testing.assert_allclose(serie.hourly(40), np.round(erwartet, 3), rtol=1e-6, atol=1e-3)
+
+    r = client.get("/stats", params={"days": 40, "meter_id": "z"})
+    assert r.status_code == 200, r.text
+    summe, stunden, _, _ = direkt(ts, kwh, 40, 0)
+    assert r.json()["avg"] == pytest.approx(summe / stunden, abs=1e-3)
+    zeilen = client.get("/simulate", params={"days": 1, "meter_id": "z"}).json()
+    assert [z["kwh"] for z in zeilen] == [None if np.isnan(w) else w for w in np.round(erwartet[:24], 3).tolist()]
+    assert client.get("/stats", params={"days": 10, "start_day": 5000, "meter_id": "z"}).status_code == 404
+    assert client.get("/stats", params={"meter_id": "unbekannt"}).status_code == 404
+
+
+def test_eingangsformate_gleich(client, speicher):
+    ts, kwh = messwerte(2, 300, tage=100)
+    csv_text = "meter_id,timestamp,kwh\n" + "".join(
+        f"csv,{time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(int(t)))},{k}\n" if i % 2 else f"csv,{t},{k}\n"
+        for i, (t, k) in enumerate(zip(ts.tolist(), kwh.tolist()))
+    )
+    ndjson_text = "".join(json.dumps({"meter_id": "ndjson", "timestamp": t, "kwh": k}) + "\n"
+                          for t, k in zip(ts.tolist(), kwh.tolist()))
+    for inhalt, typ in ((csv_text, "text/csv"), (ndjson_text, "application/x-ndjson"),
+                        (encode_binary("binary", ts, kwh), "application/octet-stream")):
+        r = client.post("/meters/ingest", content=inhalt, headers={"content-type": typ})
+        assert r.status_code == 200, r.text
+        assert r.json()["werte"] == len(ts)
+    stunden = [speicher.get(m).hourly(100) for m in ("csv", "ndjson", "binary")]
+    np.testing.assert_allclose(stunden[0], stunden[1])
+    np.testing.assert_allclose(stunden[0], stunden[2], atol=1e-3)  # binär: kWh als float32
+    assert client.get("/meters").json()["zaehler"].keys() == {"csv", "ndjson", "binary"}
+
+
+@pytest.mark.parametrize("inhalt", [
+    "m1,kein-zeitpunkt,1\n",
+    f"m1,{EPOCHE_S},kein-wert\n",
+    f"m1,{EPOCHE_S},1,zu-viel\n",
+    f"m1,{2**70},1\n",                     # passt nicht in int64
+    f"m1,{EPOCHE_S - 1},1\n",              # vor der Epoche
+    f"m1,{2**62},1\n",                     # weit in der Zukunft
+    f"m1,{EPOCHE_S},nan\n",
+    f"m1,{EPOCHE_S},inf\n",
+])
+def test_ungueltige_datensaetze(client, speicher, inhalt):
+    r = einliefern(client, f"m0,{EPOCHE_S},1\n" + inhalt)
+    assert r.status_code == 400, r.text
+    assert speicher.meter_ids() == []  # Stapel wird ganz oder gar nicht gespeichert
+
+
+@pytest.mark.parametrize("inhalt", [
+    b"{kein json}\n",
+    b'{"meter_id": "m1", "kwh": 1}\n',
+    b'{"meter_id": "m1", "timestamp": 1e400, "kwh": 1}\n',
+])
+def test_ungueltiges_ndjson(client, inhalt):
+    r = client.post("/meters/ingest", content=inhalt, headers={"content-type": "application/x-ndjson"})
+    assert r.status_code == 400, r.text
+
+
+@pytest.mark.parametrize("inhalt", [
+    b"EMTR",                                                               # Header unvollständig
+    b"XXXX" + encode_binary("m1", np.array([EPOCHE_S]), np.array([1.0]))[4:],   # falsches Magic
+    encode_binary("m1", np.array([EPOCHE_S, EPOCHE_S]), np.array([1.0, 2.0]))[:-4],  # zu kurz
+])
+def test_ungueltige_binaerbloecke(client, inhalt):
+    r = client.post("/meters/ingest", content=inhalt, headers={"content-type": "application/octet-stream"})
+    assert r.status_code == 400, r.text
+    assert "Block 1" in r.json()["detail"]
+
+
+def test_unbekanntes_format_und_groesse(client, monkeypatch):
+    r = client.post("/meters/ingest", content=b"x", headers={"content-type": "application/xml"})
+    assert r.status_code == 400
+    monkeypatch.setattr(app, "METER_INGEST_MAX_MB", 1 / 1024)  # 1 KiB
+    assert einliefern(client, f"m1,{EPOCHE_S},1\n" * 100).status_code == 413
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Statistiken über ein Zeitfenster – gemeinsamer Kern von ``/stats``.
+
+Ohne FastAPI-Abhängigkeit, damit recommendation-api die Funktion im
+Co-Location-Modus (``USAGE_PROVIDER=inprocess``) direkt aufrufen kann,
+statt für einen Durchschnitt einen HTTP-Aufruf zu machen.
+
+- ``window_stats``: simulierte Reihe (Rollup-Cache)
+- ``meter_stats``:  echte Zählerstände (Tages-/Monats-Rollups des ``MeterStore``)
+"""
+
+from contextlib import nullcontext
+
+from meter_store import MeterSeries
+from series_cache import SeriesCache
+from simulation import iter_blocks
+from streaming_stats import StatsPipeline
+
+
+def _ohne_zeitmessung(stufe: str):
+    return nullcontext()
+
+
+def window_stats(cache: SeriesCache, days: int, start_day: int = 0, extra: set[str] = frozenset(),
+                 top_k: int = 5, block_days: int = 30, timer=_ohne_zeitmessung) -> dict:
+    """
+    Berechnet die Statistiken von N Tagen ab start_day.
+
+    Durchschnitt/Min/Max kommen aus dem Rollup-Cache; die Kennzahlen aus
+    ``extra`` (oder alles, falls das Fenster am Cache vorbeigeht) werden in
+    einem Durchlauf über den blockweise erzeugten Datenstrom berechnet.
+    ``timer(stufe)`` liefert einen Kontextmanager zur Zeitmessung je Stufe.
+    """
+    with timer("rollup_cache"):
+        store = cache.get(start_day + days)
+    ergebnis = {}
+    if extra or store is None:
+        with timer("statistik_durchlauf"):
+            pipeline = StatsPipeline(set(extra), top_k)
+            ergebnis = pipeline.consume(iter_blocks(days, start_day, block_days)).result()
+    if store is not None:
+        avg, maximum, minimum = store.stats(days, start_day)
+        ergebnis.update(avg=round(avg, 3), max=round(maximum, 3), min=round(minimum, 3))
+    return {"days": days, "start_day": start_day, **ergebnis}
+
+
+def meter_stats(serie: MeterSeries, days: int, start_day: int = 0, extra: set[str] = frozenset(),
+                top_k: int = 5, block_days: int = 30, timer=_ohne_zeitmessung) -> dict | None:
+    """
+    Wie ``window_stats``, aber über die Messwerte eines Zählers.
+
+    Durchschnitt/Min/Max beziehen sich auf die Stunden mit Messung und kommen
+    aus den Rollups. Die Kennzahlen aus ``extra`` werden in einem Durchlauf
+    über die Stundenwerte berechnet; Lücken werden dabei übersprungen.
+
+    Returns:
+        Statistik oder None, wenn im Fenster keine Messung liegt
+    """
+    with timer("zaehler_rollups"):
+        summe, stunden, minimum, maximum = serie.stats(days, start_day)
+    if not stunden:
+        return None
+    ergebnis = {}
+    if extra:
+        with timer("statistik_durchlauf"):
+            pipeline = StatsPipeline(set(extra), top_k)
+            ergebnis = pipeline.consume(serie.iter_blocks(days, start_day, block_days)).result()
+    ergebnis.update(avg=round(summe / stunden, 3), max=round(maximum, 3), min=round(minimum, 3))
+    return {"days": days, "start_day": start_day, **ergebnis}